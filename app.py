@@ -1,148 +1,23 @@
-import sqlite3
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta
+import altair as alt
+from datetime import date, datetime, timedelta
 import re
-
-# -------------------------------------------------------------------
-#  Database initialisation – creates tables if they don't exist
-# -------------------------------------------------------------------
-def init_db():
-    conn = sqlite3.connect('final.db')
-    conn.execute("PRAGMA foreign_keys = ON")   # enforce foreign keys
-    c = conn.cursor()
-
-    # RoomType table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS RoomType (
-            type_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            type_name TEXT NOT NULL,
-            base_price REAL NOT NULL
-        )
-    ''')
-
-    # Room table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS Room (
-            room_no INTEGER PRIMARY KEY,
-            type_id INTEGER NOT NULL,
-            room_status TEXT NOT NULL DEFAULT 'vacant',
-            FOREIGN KEY (type_id) REFERENCES RoomType(type_id)
-        )
-    ''')
-
-    # Guest table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS Guest (
-            guest_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            guest_Fname TEXT NOT NULL,
-            guest_Lname TEXT NOT NULL,
-            guest_email TEXT NOT NULL UNIQUE,
-            CNIC TEXT NOT NULL UNIQUE,
-            age INTEGER NOT NULL,
-            gender TEXT NOT NULL,
-            City TEXT
-        )
-    ''')
-
-    # Reservation table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS Reservation (
-            reservation_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            reservation_date TEXT NOT NULL,
-            guest_id INTEGER NOT NULL,
-            room_no INTEGER NOT NULL,
-            check_in TEXT NOT NULL,
-            check_out TEXT NOT NULL,
-            adults INTEGER NOT NULL,
-            children INTEGER NOT NULL,
-            FOREIGN KEY (guest_id) REFERENCES Guest(guest_id),
-            FOREIGN KEY (room_no) REFERENCES Room(room_no)
-        )
-    ''')
-
-    # Billing table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS Billing (
-            reservation_id INTEGER PRIMARY KEY,
-            room_charges REAL NOT NULL DEFAULT 0,
-            service_charges REAL NOT NULL DEFAULT 0,
-            total REAL NOT NULL DEFAULT 0,
-            payment_status TEXT NOT NULL DEFAULT 'pending',
-            payment_method TEXT,
-            payment_date TEXT,
-            FOREIGN KEY (reservation_id) REFERENCES Reservation(reservation_id)
-        )
-    ''')
-
-    # Services table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS Services (
-            service_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            service_name TEXT NOT NULL,
-            service_price REAL NOT NULL
-        )
-    ''')
-
-    # ReservationServices table (junction)
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS ReservationServices (
-            res_service_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            reservation_id INTEGER NOT NULL,
-            service_id INTEGER NOT NULL,
-            quantity INTEGER NOT NULL DEFAULT 1,
-            service_date TEXT NOT NULL,
-            FOREIGN KEY (reservation_id) REFERENCES Reservation(reservation_id),
-            FOREIGN KEY (service_id) REFERENCES Services(service_id)
-        )
-    ''')
-
-    # Insert default room types if they don't exist
-    c.execute("SELECT COUNT(*) FROM RoomType")
-    if c.fetchone()[0] == 0:
-        c.executemany(
-            "INSERT INTO RoomType (type_name, base_price) VALUES (?, ?)",
-            [('Single', 100), ('Double', 150), ('Suite', 250)]
-        )
-
-    # Insert default services if they don't exist
-    c.execute("SELECT COUNT(*) FROM Services")
-    if c.fetchone()[0] == 0:
-        c.executemany(
-            "INSERT INTO Services (service_name, service_price) VALUES (?, ?)",
-            [('Breakfast', 15), ('Lunch', 25), ('Dinner', 35), ('Spa', 50), ('Parking', 10)]
-        )
-
-    # Insert a few sample rooms if none exist
-    c.execute("SELECT COUNT(*) FROM Room")
-    if c.fetchone()[0] == 0:
-        # Get type ids
-        c.execute("SELECT type_id FROM RoomType WHERE type_name = 'Single'")
-        single_id = c.fetchone()[0]
-        c.execute("SELECT type_id FROM RoomType WHERE type_name = 'Double'")
-        double_id = c.fetchone()[0]
-        c.execute("SELECT type_id FROM RoomType WHERE type_name = 'Suite'")
-        suite_id = c.fetchone()[0]
-
-        rooms_data = [
-            (101, single_id, 'vacant'),
-            (102, single_id, 'vacant'),
-            (201, double_id, 'vacant'),
-            (202, double_id, 'vacant'),
-            (301, suite_id, 'vacant'),
-        ]
-        c.executemany(
-            "INSERT INTO Room (room_no, type_id, room_status) VALUES (?, ?, ?)",
-            rooms_data
-        )
-
-    conn.commit()
-    conn.close()
-
-# -------------------------------------------------------------------
-#  Initialise the database when the app starts
-# -------------------------------------------------------------------
-init_db()
+import cProfile
+import time
+
+from catalog import CATALOG_VERSION
+from backends import open_backend
+from db import CacheCounter
+import archive
+import assignment
+from exports import EXCEL_AVAILABLE, EXPORT_FORMATS
+from guests import FIRST_PAGE, guest_label, page_key
+from imports import IMPORTS, detect_format
+from operations import OperationError
+from querylog import QueryLog, profile_report
+from rates import RATE_VERSION
+from snapshot import RevenueSnapshot
 
 # -------------------------------------------------------------------
 #  Safe type casting helpers
@@ -160,13 +35,105 @@ def safe_int(val):
         return 0
 
 # -------------------------------------------------------------------
-#  Database connection – autocommit + row factory
+#  Storage backend – pooled connections per process and every page read
+#  and write. SQLite (final.db) unless secrets.toml has a [storage]
+#  table, e.g. backend = "mysql" with the connection options.
 # -------------------------------------------------------------------
+@st.cache_resource
+def get_query_log():
+    return QueryLog()
+
+@st.cache_resource
+def get_backend():
+    try:
+        settings = st.secrets.get('storage', {})
+    except FileNotFoundError:            # no secrets.toml at all
+        settings = {}
+    return open_backend(settings, query_log=get_query_log())
+
 def get_db_connection():
-    conn = sqlite3.connect('final.db', isolation_level=None)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
-    return conn
+    return get_backend().connection()
+
+# -------------------------------------------------------------------
+#  Database initialisation – applies pending schema migrations once
+#  per process; a no-op when the schema is already current
+# -------------------------------------------------------------------
+@st.cache_resource
+def init_db():
+    get_backend().migrate()
+
+init_db()
+
+# Reference data is reloaded only when the 'Catalog' version moves
+# (RoomType, Services or Room edits – not room_status changes)
+@st.cache_resource(max_entries=1)
+def get_catalog(version):
+    return get_backend().load_catalog(get_db_connection())
+
+# Rebuilt when any connection or process writes a Reservation (bookings,
+# imports, archiving, room reassignment); this session's own bookings
+# are also added in place so the rest of the rerun sees them
+RESERVATION_VERSION = ['Reservation']
+
+@st.cache_resource(max_entries=1)
+def get_availability_index(catalog_version, reservation_version):
+    return get_backend().load_availability(get_db_connection(), get_catalog(catalog_version).rooms)
+
+def availability_index(conn, catalog_version):
+    return get_availability_index(catalog_version, get_backend().data_version(conn, RESERVATION_VERSION))
+
+# Stay quotes: rebuilt when base prices (Catalog) or the rate calendar change
+@st.cache_resource(max_entries=1)
+def get_rate_calendar(catalog_version, rate_version, today):
+    room_types = get_catalog(catalog_version).room_types.values()
+    return get_backend().load_rate_calendar(get_db_connection(),
+                                            {room_type.type_id: room_type.base_price for room_type in room_types})
+
+# Rebuilt only when a Reservation, Billing or Room write bumps the version
+OCCUPANCY_TABLES = ['Reservation', 'Billing', 'Room']
+OCCUPANCY_DAYS = 90
+
+REPORT_PREVIEW_ROWS = 1000
+
+GUEST_PAGE_SIZE = 25
+GUEST_MATCHES = 20
+
+# -------------------------------------------------------------------
+#  Versioned result cache – results are keyed on the DataVersion
+#  counters of the tables they read (bumped by triggers on every write,
+#  from any connection) and on today's date for the DATE('now') filters
+# -------------------------------------------------------------------
+@st.cache_resource
+def get_cache_counter():
+    return CacheCounter()
+
+@st.cache_data(max_entries=4)
+def get_occupancy_calendar(version, start):
+    get_cache_counter().miss()
+    return get_backend().load_occupancy(get_db_connection(), date.fromisoformat(start), OCCUPANCY_DAYS)
+
+def occupancy_calendar(conn):
+    get_cache_counter().request()
+    return get_occupancy_calendar(get_backend().data_version(conn, OCCUPANCY_TABLES), date.today().isoformat())
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _cached_rows(name, params, version, today):
+    get_cache_counter().miss()
+    return get_backend().cached_rows(get_db_connection(), name, params)
+
+# Newly settled stays are appended to the columnar snapshot only when a
+# Billing write has bumped the version since the last extraction
+@st.cache_resource(max_entries=1)
+def refresh_snapshot(version):
+    return get_backend().refresh_snapshot(get_db_connection())
+
+def cached_query(conn, name, params=()):
+    """Rows of the backend's cached query name as dicts, served from cache
+    until one of the tables it reads is written."""
+    get_cache_counter().request()
+    backend = get_backend()
+    tables = backend.cached_queries[name]
+    return _cached_rows(name, params, backend.data_version(conn, tables), date.today().isoformat())
 
 # -------------------------------------------------------------------
 #  Streamlit UI
@@ -248,56 +215,89 @@ st.markdown("""
 
 st.markdown('<h1 class="title">Hotel Management System</h1>', unsafe_allow_html=True)
 
+# Pages that need a backend feature (backends.FEATURES) are listed only
+# when the backend has it
+PAGE_FEATURES = {"Room Rates": 'rates', "Bulk Import": 'import'}
+
+backend = get_backend()
 st.sidebar.title("Navigation")
-page = st.sidebar.radio("Select Page", [
+page = st.sidebar.radio("Select Page", [name for name in [
     "Dashboard",
     "Make Reservation",
+    "Group Booking",
+    "Room Rates",
     "Add Services",
     "Delete Services",
     "Check Out",
     "Delete Reservation",
     "Reports",
-    "Guest Management"
-])
-
-conn = get_db_connection()
-cursor = conn.cursor()
+    "Night Audit",
+    "Guest Management",
+    "Bulk Import",
+    "Query Performance"
+] if name not in PAGE_FEATURES or PAGE_FEATURES[name] in backend.features])
+
+# Per-rerun query timing, plus a one-shot cProfile requested from the
+# Query Performance page (a profiled rerun cut short by st.rerun() or
+# st.stop() is reported at the start of the next one)
+query_log = get_query_log()
+query_log.begin_rerun(page)
+profiler = st.session_state.pop('profiler', None)
+if profiler is not None:
+    profiler.disable()
+    st.session_state['profile_report'] = profile_report(profiler)
+if st.session_state.pop('profile_next_rerun', False):
+    profiler = cProfile.Profile()
+    st.session_state['profiler'] = profiler
+    st.session_state['profile_page'] = page
+    profiler.enable()
+
+conn = backend.connection()
+catalog_version = backend.data_version(conn, CATALOG_VERSION)
+catalog = get_catalog(catalog_version)
+rate_calendar = get_rate_calendar(catalog_version, backend.data_version(conn, RATE_VERSION), date.today().isoformat())
 
 if page == "Dashboard":
     st.markdown('<h2 class="subtitle">Hotel Dashboard</h2>', unsafe_allow_html=True)
 
-    cursor.execute("""
-        SELECT 
-            COUNT(*) AS total_rooms,
-            SUM(CASE WHEN room_status = 'occupied' THEN 1 ELSE 0 END) AS occupied_rooms,
-            ROUND(SUM(CASE WHEN room_status = 'occupied' THEN 1 ELSE 0 END) * 1.0 / COUNT(*) * 100, 2) AS occupancy_rate
-        FROM Room
-    """)
-    occupancy = cursor.fetchone()
+    calendar = occupancy_calendar(conn)
+    daily = calendar.daily()
+    today = daily.iloc[0]
+    total_rooms = len(calendar.room_nos)
 
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown('<h3>Hotel Occupancy</h3>', unsafe_allow_html=True)
     col1, col2, col3 = st.columns(3)
-    col1.metric("Total Rooms", safe_int(occupancy['total_rooms']))
-    col2.metric("Occupied Rooms", safe_int(occupancy['occupied_rooms']))
-    col3.metric("Occupancy Rate", f"{safe_float(occupancy['occupancy_rate']):.2f}%")
+    col1.metric("Total Rooms", total_rooms)
+    col2.metric("Occupied Rooms", safe_int(today['rooms_sold']))
+    col3.metric("Occupancy Rate", f"{safe_float(today['occupancy_rate']):.2f}%")
 
-    occupancy_rate = safe_float(occupancy['occupancy_rate']) / 100
-    st.progress(occupancy_rate)
+    occupancy_rate = safe_float(today['occupancy_rate']) / 100
+    st.progress(min(occupancy_rate, 1.0))
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    st.markdown(f'<h3>Next {OCCUPANCY_DAYS} Days</h3>', unsafe_allow_html=True)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Avg. Occupancy", f"{daily['occupancy_rate'].mean():.2f}%")
+    col2.metric("ADR", f"${daily['room_revenue'].sum() / max(daily['rooms_sold'].sum(), 1):.2f}")
+    col3.metric("RevPAR", f"${daily['revpar'].mean():.2f}")
+
+    heatmap = alt.Chart(calendar.heatmap_frame()).mark_rect().encode(
+        x=alt.X('yearmonthdate(date):O', title=None, axis=alt.Axis(format='%d %b', labelAngle=-90)),
+        y=alt.Y('room:O', title='Room'),
+        color=alt.Color('occupied:Q', scale=alt.Scale(domain=[0, 1], range=['#ecf0f1', '#2c3e50']), legend=None),
+        tooltip=['room', alt.Tooltip('date:T', format='%Y-%m-%d'), 'occupied'],
+    ).properties(height=min(max(total_rooms * 14, 120), 1400))
+    st.altair_chart(heatmap, use_container_width=True)
+
+    st.line_chart(daily[['occupancy_rate']].rename(columns={'occupancy_rate': 'Occupancy %'}))
+    st.line_chart(daily[['adr', 'revpar']].rename(columns={'adr': 'ADR', 'revpar': 'RevPAR'}))
     st.markdown('</div>', unsafe_allow_html=True)
 
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown('<h3>Current Reservations</h3>', unsafe_allow_html=True)
-    cursor.execute("""
-        SELECT r.reservation_id, g.guest_Fname, g.guest_Lname, 
-               r.room_no, r.check_in, r.check_out, b.payment_status
-        FROM Reservation r
-        JOIN Guest g ON r.guest_id = g.guest_id
-        JOIN Billing b ON r.reservation_id = b.reservation_id
-        WHERE r.check_out >= DATE('now')
-        ORDER BY r.check_in
-    """)
-    current_reservations = pd.DataFrame(cursor.fetchall())
+    current_reservations = pd.DataFrame(cached_query(conn, 'CURRENT_RESERVATIONS'))
     if not current_reservations.empty:
         st.dataframe(current_reservations)
     else:
@@ -307,42 +307,68 @@ if page == "Dashboard":
 elif page == "Make Reservation":
     st.markdown('<h2 class="subtitle">Make Reservation</h2>', unsafe_allow_html=True)
 
-    cursor.execute("SELECT guest_id, guest_Fname || ' ' || guest_Lname AS guest_name FROM Guest")
-    guests = {row['guest_name']: row['guest_id'] for row in cursor.fetchall()}
-    if not guests:
+    if not backend.has_guests(conn):
         st.warning("No guests found. Please add a guest first in Guest Management.")
         st.stop()
 
+    # Typeahead: only the top matches of the prefix search reach the form,
+    # keyed by a label that includes the ID so namesakes stay distinct
+    guest_search = st.text_input("Find Guest", placeholder="Start typing a name, email, CNIC or city")
+    guest_matches = backend.search_guests(conn, guest_search, limit=GUEST_MATCHES)
+    guests = {guest_label(guest): guest['guest_id'] for guest in guest_matches}
+
+    # Stay criteria sit outside the form so the room list follows them
+    col1, col2 = st.columns(2)
+    check_in = col1.date_input("Check-in Date", value=datetime.now())
+    check_out = col2.date_input("Check-out Date", value=datetime.now() + timedelta(days=1))
+    col1, col2, col3 = st.columns(3)
+    adults = col1.number_input("Adults", min_value=1, value=1)
+    children = col2.number_input("Children", min_value=0, value=0)
+
+    availability = availability_index(conn, catalog_version)
+    room_types = col3.multiselect("Room Type", catalog.type_names(), placeholder="Any")
+
+    check_in_str = check_in.strftime('%Y-%m-%d')
+    check_out_str = check_out.strftime('%Y-%m-%d')
+    if check_out <= check_in:
+        st.error("Check-out date must be after check-in date.")
+        rooms = []
+    else:
+        type_ids = {room_type.type_id for room_type in catalog.room_types.values() if room_type.type_name in room_types} or None
+        rooms = availability.available_rooms(check_in_str, check_out_str, type_ids, adults + children)
+
     with st.form("reservation_form"):
-        guest_name = st.selectbox("Guest", list(guests.keys()))
-
-        cursor.execute("""
-            SELECT r.room_no, rt.type_name, r.room_status, rt.base_price
-            FROM Room r
-            JOIN RoomType rt ON r.type_id = rt.type_id
-            WHERE r.room_status = 'vacant'
-            ORDER BY r.room_no
-        """)
-        rooms = cursor.fetchall()
-
-        room_options = [
-            f"Room {room['room_no']} ({room['type_name']}) - {room['room_status'].capitalize()} - ${room['base_price']}/night"
-            for room in rooms if room['room_status'] == 'vacant'
-        ]
+        if guests:
+            guest_name = st.selectbox("Guest", list(guests.keys()))
+        else:
+            st.error("No guests match your search.")
+            guest_name = None
+
+        # Every listed room quoted in one pass over the rate calendar
+        nights = (check_out - check_in).days
+        quotes = rate_calendar.quote_many([room.type_id for room in rooms], [check_in_str] * len(rooms),
+                                          [check_out_str] * len(rooms)) if rooms else []
+        stay = f"for {nights} night{'s' if nights != 1 else ''}"
+        # "Any room" of a type lets assignment.best_room pick the room that
+        # leaves the fewest unsellable gaps; listed first, so it is the default
+        room_options = {}
+        if 'assignment' in backend.features:
+            for room, quote in zip(rooms, quotes):
+                room_options.setdefault(f"Any {room.type_name} room - auto-assigned - ${quote:,.2f} {stay}",
+                                        (room.type_id, None))
+        for room, quote in zip(rooms, quotes):
+            room_options[f"Room {room.room_no} ({room.type_name}) - Sleeps {room.room_capacity} - "
+                         f"${quote:,.2f} {stay}"] = (room.type_id, room.room_no)
         if not room_options:
-            st.error("No vacant rooms available. Please check back later or contact administration to free up rooms.")
+            st.error("No rooms available for the selected dates. Try other dates or room types.")
             room_no = st.selectbox("Room", ["No rooms available"])
             disable_submit = True
         else:
-            room_no = st.selectbox("Room", room_options)
-            selected_room_no = int(room_no.split()[1])
+            room_no = st.selectbox("Room", list(room_options))
+            selected_type_id, selected_room_no = room_options[room_no]
             disable_submit = False
 
-            adults = st.number_input("Adults", min_value=1, value=1)
-            children = st.number_input("Children", min_value=0, value=0)
-            check_in = st.date_input("Check-in Date", value=datetime.now())
-            check_out = st.date_input("Check-out Date", value=datetime.now() + timedelta(days=1))
-
+        disable_submit = disable_submit or guest_name is None
         submitted = st.form_submit_button("Reserve", disabled=disable_submit)
 
         if submitted and not disable_submit:
@@ -350,77 +376,136 @@ elif page == "Make Reservation":
                 st.error("Check-out date must be after check-in date.")
             else:
                 try:
-                    check_in_str = check_in.strftime('%Y-%m-%d')
-                    check_out_str = check_out.strftime('%Y-%m-%d')
-                    cursor.execute("""
-                        SELECT COUNT(*) AS conflicts
-                        FROM Reservation r
-                        WHERE r.room_no = ?
-                        AND (
-                            (? BETWEEN r.check_in AND r.check_out) OR
-                            (? BETWEEN r.check_in AND r.check_out) OR
-                            (r.check_in BETWEEN ? AND ?)
-                        )
-                    """, (selected_room_no, check_in_str, check_out_str, check_in_str, check_out_str))
-                    conflicts = cursor.fetchone()['conflicts']
-
-                    if conflicts > 0:
-                        st.error("Room is already booked for the selected dates.")
+                    # One transaction: reservation, its bill and room-nights
+                    # (triggers) and the room status – or nothing at all
+                    if selected_room_no is None:
+                        reservation_id, selected_room_no = backend.book_best_fit(
+                            conn, guests[guest_name], selected_type_id, check_in_str, check_out_str, adults, children)
                     else:
-                        # Insert reservation
-                        cursor.execute("""
-                            INSERT INTO Reservation (reservation_date, guest_id, room_no, check_in, check_out, adults, children)
-                            VALUES (DATE('now'), ?, ?, ?, ?, ?, ?)
-                        """, (guests[guest_name], selected_room_no, check_in_str, check_out_str, adults, children))
-
-                        reservation_id = cursor.lastrowid
-
-                        # ---- MANUALLY CREATE BILLING RECORD ----
-                        # Get base price of the room
-                        cursor.execute("""
-                            SELECT rt.base_price
-                            FROM Room r
-                            JOIN RoomType rt ON r.type_id = rt.type_id
-                            WHERE r.room_no = ?
-                        """, (selected_room_no,))
-                        base_price = safe_float(cursor.fetchone()['base_price'])
-
-                        # Calculate number of nights
-                        nights = (check_out - check_in).days
-                        room_charges = base_price * nights
-
-                        # Insert into Billing (total = room_charges initially, service_charges = 0)
-                        cursor.execute("""
-                            INSERT INTO Billing (reservation_id, room_charges, service_charges, total)
-                            VALUES (?, ?, 0, ?)
-                        """, (reservation_id, room_charges, room_charges))
-
-                        # Update room status to occupied
-                        cursor.execute("UPDATE Room SET room_status = 'occupied' WHERE room_no = ?", (selected_room_no,))
-
-                        st.success(f"Reservation successful! Room {selected_room_no} has been booked. Reservation ID: {reservation_id}")
-                        st.rerun()
-                except sqlite3.Error as e:
+                        reservation_id = backend.make_reservation(
+                            conn, guests[guest_name], selected_room_no, check_in_str, check_out_str, adults, children)
+                    availability.add(reservation_id, selected_room_no, check_in_str, check_out_str)
+
+                    st.success(f"Reservation successful! Room {selected_room_no} has been booked. Reservation ID: {reservation_id}")
+                    st.rerun()
+                except OperationError as e:
+                    st.error(str(e))
+                except backend.Error as e:
                     st.error(f"Database error: {e}")
 
+elif page == "Group Booking":
+    st.markdown('<h2 class="subtitle">Group Booking</h2>', unsafe_allow_html=True)
+
+    guest_search = st.text_input("Find Group Master", placeholder="Start typing a name, email, CNIC or city")
+    guest_matches = backend.search_guests(conn, guest_search, limit=GUEST_MATCHES)
+    guests = {guest_label(guest): guest['guest_id'] for guest in guest_matches}
+
+    col1, col2 = st.columns(2)
+    check_in = col1.date_input("Check-in Date", value=datetime.now())
+    check_out = col2.date_input("Check-out Date", value=datetime.now() + timedelta(days=1))
+    col1, col2 = st.columns(2)
+    adults = col1.number_input("Adults per Room", min_value=1, value=2)
+    children = col2.number_input("Children per Room", min_value=0, value=0)
+
+    check_in_str = check_in.strftime('%Y-%m-%d')
+    check_out_str = check_out.strftime('%Y-%m-%d')
+    availability = availability_index(conn, catalog_version)
+    if check_out <= check_in:
+        st.error("Check-out date must be after check-in date.")
+        free_by_type = {}
+    else:
+        free_by_type = availability.availability_by_type(check_in_str, check_out_str, adults + children)
+
+    with st.form("group_booking_form"):
+        guest_name = st.selectbox("Group Master", list(guests.keys())) if guests else None
+        if guest_name is None:
+            st.error("No guests match your search.")
+
+        room_mix = {}
+        columns = st.columns(max(len(catalog.room_types), 1))
+        for column, room_type in zip(columns, catalog.room_types.values()):
+            free = free_by_type.get(room_type.type_name, 0)
+            room_mix[room_type.type_id] = column.number_input(
+                f"{room_type.type_name} ({free} free)", min_value=0, max_value=free, value=0,
+                key=f"group_rooms_{room_type.type_id}")
+            if check_out > check_in:
+                column.caption(f"${rate_calendar.quote(room_type.type_id, check_in_str, check_out_str):,.2f} per room")
+
+        disable_submit = guest_name is None or check_out <= check_in
+        submitted = st.form_submit_button("Book Rooms", disabled=disable_submit)
+
+        if submitted and not disable_submit:
+            try:
+                booked = backend.book_group(conn, guests[guest_name], room_mix, check_in_str, check_out_str,
+                                               adults, children)
+                for reservation_id, room_no in booked:
+                    availability.add(reservation_id, room_no, check_in_str, check_out_str)
+                st.success(f"Group booking successful! {len(booked)} rooms booked: "
+                           + ', '.join(str(room_no) for _, room_no in booked))
+                st.rerun()
+            except OperationError as e:
+                st.error(str(e))
+            except backend.Error as e:
+                st.error(f"Database error: {e}")
+
+elif page == "Room Rates":
+    st.markdown('<h2 class="subtitle">Room Rates</h2>', unsafe_allow_html=True)
+
+    room_type_ids = {room_type.type_name: room_type.type_id for room_type in catalog.room_types.values()}
+    weekdays = {"Monday": 1, "Tuesday": 2, "Wednesday": 3, "Thursday": 4, "Friday": 5, "Saturday": 6, "Sunday": 0}
+
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    with st.form("room_rates_form"):
+        col1, col2 = st.columns(2)
+        rate_type = col1.selectbox("Room Type", list(room_type_ids))
+        rate_price = col2.number_input("Price per Night", min_value=0.0, value=100.0, step=5.0)
+        col1, col2 = st.columns(2)
+        rate_start = col1.date_input("From", value=datetime.now())
+        rate_end = col2.date_input("To (inclusive)", value=datetime.now() + timedelta(days=30))
+        rate_days = st.multiselect("Only these nights", list(weekdays), placeholder="Every night")
+        col1, col2 = st.columns(2)
+        set_submitted = col1.form_submit_button("Set Rate")
+        clear_submitted = col2.form_submit_button("Reset to Base Price")
+
+    if (set_submitted or clear_submitted) and rate_type:
+        try:
+            start_str, end_str = rate_start.strftime('%Y-%m-%d'), rate_end.strftime('%Y-%m-%d')
+            if set_submitted:
+                changed = backend.set_rates(conn, room_type_ids[rate_type], start_str, end_str, rate_price,
+                                            [weekdays[day] for day in rate_days] or None)
+                st.success(f"{rate_type}: {changed} night(s) set to ${rate_price:,.2f}")
+            else:
+                changed = backend.clear_rates(conn, room_type_ids[rate_type], start_str, end_str)
+                st.success(f"{rate_type}: {changed} night(s) back at the base price")
+            st.rerun()
+        except OperationError as e:
+            st.error(str(e))
+        except backend.Error as e:
+            st.error(f"Database error: {e}")
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    st.markdown('<h3>Nightly Prices</h3>', unsafe_allow_html=True)
+    grid_start = st.date_input("Starting", value=datetime.now(), key="rate_grid_start")
+    grid_days = 28
+    grid = pd.DataFrame(
+        rate_calendar.nightly(grid_start.strftime('%Y-%m-%d'), grid_days),
+        index=[catalog.room_types[int(type_id)].type_name for type_id in rate_calendar.type_ids],
+        columns=[(grid_start + timedelta(days=i)).strftime('%a %d %b') for i in range(grid_days)],
+    )
+    st.dataframe(grid)
+    st.markdown('</div>', unsafe_allow_html=True)
+
 elif page == "Add Services":
     st.markdown('<h2 class="subtitle">Add Services to Reservation</h2>', unsafe_allow_html=True)
 
-    cursor.execute("""
-        SELECT r.reservation_id, g.guest_Fname, g.guest_Lname, rm.room_no, rt.type_name
-        FROM Reservation r
-        JOIN Guest g ON r.guest_id = g.guest_id
-        JOIN Room rm ON r.room_no = rm.room_no
-        JOIN RoomType rt ON rm.type_id = rt.type_id
-        WHERE r.check_out >= DATE('now')
-    """)
-    reservations = cursor.fetchall()
+    reservations = cached_query(conn, 'ACTIVE_RESERVATIONS')
 
     if not reservations:
         st.warning("No active reservations found.")
     else:
         reservation_options = {
-            f"Reservation #{res['reservation_id']} - {res['guest_Fname']} {res['guest_Lname']} (Room {res['room_no']} - {res['type_name']})": res['reservation_id']
+            f"Reservation #{res['reservation_id']} - {res['guest_Fname']} {res['guest_Lname']} (Room {res['room_no']} - {catalog.type_name(res['room_no'])})": res['reservation_id']
             for res in reservations
         }
 
@@ -428,10 +513,9 @@ elif page == "Add Services":
             reservation_display = st.selectbox("Select Reservation", list(reservation_options.keys()))
             reservation_id = reservation_options[reservation_display]
 
-            cursor.execute("SELECT service_id, service_name, service_price FROM Services")
-            services = cursor.fetchall()
+            services = list(catalog.services.values())
             service_options = {
-                f"{service['service_name']} (${service['service_price']})": service['service_id']
+                f"{service.service_name} (${service.service_price})": service.service_id
                 for service in services
             }
 
@@ -449,50 +533,60 @@ elif page == "Add Services":
 
                 if submit_service:
                     try:
-                        cursor.execute("""
-                            INSERT INTO ReservationServices (reservation_id, service_id, quantity, service_date)
-                            VALUES (?, ?, ?, ?)
-                        """, (reservation_id, service_id, quantity, service_date_str))
-
-                        cursor.execute("""
-                            SELECT SUM(rs.quantity * s.service_price) AS new_service_charges
-                            FROM ReservationServices rs
-                            JOIN Services s ON rs.service_id = s.service_id
-                            WHERE rs.reservation_id = ?
-                        """, (reservation_id,))
-                        new_service_charges = safe_float(cursor.fetchone()['new_service_charges'] or 0)
-
-                        cursor.execute("""
-                            UPDATE Billing
-                            SET service_charges = ?,
-                                total = room_charges + ?
-                            WHERE reservation_id = ?
-                        """, (new_service_charges, new_service_charges, reservation_id))
-
+                        backend.add_service(conn, reservation_id, service_id, quantity, service_date_str)
                         st.success(f"Added {quantity} x {service_display.split(' (')[0]} to reservation #{reservation_id}")
                         st.rerun()
-                    except sqlite3.Error as e:
+                    except OperationError as e:
+                        st.error(str(e))
+                    except backend.Error as e:
                         st.error(f"Database error: {e}")
 
+    # Bulk posting: one service line to every matching stay in one transaction
+    st.markdown('<h3>Post to Many Reservations</h3>', unsafe_allow_html=True)
+    target = st.radio("Post To", ["All in-house guests", "Room types", "Selected reservations"], horizontal=True)
+    bulk_date = st.date_input("Posting Date", value=datetime.now(), key="bulk_service_date")
+    bulk_date_str = bulk_date.strftime('%Y-%m-%d')
+
+    type_ids = reservation_ids = None
+    if target == "Room types":
+        bulk_types = st.multiselect("Room Types", catalog.type_names())
+        type_ids = [room_type.type_id for room_type in catalog.room_types.values() if room_type.type_name in bulk_types]
+    elif target == "Selected reservations":
+        selected = st.multiselect("Reservations", list(reservation_options.keys()) if reservations else [])
+        reservation_ids = [reservation_options[label] for label in selected]
+    if reservation_ids is None:
+        in_house = backend.in_house(conn, bulk_date_str, type_ids)
+        st.caption(f"{len(in_house)} unpaid reservation(s) in house on {bulk_date_str}")
+
+    with st.form("bulk_services"):
+        service_options = {
+            f"{service.service_name} (${service.service_price})": service.service_id
+            for service in catalog.services.values()
+        }
+        bulk_service = st.selectbox("Service", list(service_options.keys()))
+        bulk_quantity = st.number_input("Quantity per Reservation", min_value=1, value=1)
+        submit_bulk = st.form_submit_button("Post Service", disabled=not service_options)
+
+        if submit_bulk:
+            try:
+                posted = backend.post_service_bulk(conn, service_options[bulk_service], bulk_quantity, bulk_date_str,
+                                                      type_ids, reservation_ids)
+                st.success(f"Posted {bulk_quantity} x {bulk_service.split(' (')[0]} to {len(posted)} reservation(s)")
+            except OperationError as e:
+                st.error(str(e))
+            except backend.Error as e:
+                st.error(f"Database error: {e}")
+
 elif page == "Delete Services":
     st.markdown('<h2 class="subtitle">Delete Services from Reservation</h2>', unsafe_allow_html=True)
 
-    cursor.execute("""
-        SELECT r.reservation_id, g.guest_Fname, g.guest_Lname, rm.room_no, rt.type_name
-        FROM Reservation r
-        JOIN Guest g ON r.guest_id = g.guest_id
-        JOIN Room rm ON r.room_no = rm.room_no
-        JOIN RoomType rt ON rm.type_id = rt.type_id
-        WHERE r.check_out >= DATE('now')
-        AND EXISTS (SELECT 1 FROM ReservationServices rs WHERE rs.reservation_id = r.reservation_id)
-    """)
-    reservations = cursor.fetchall()
+    reservations = cached_query(conn, 'ACTIVE_RESERVATIONS_WITH_SERVICES')
 
     if not reservations:
         st.warning("No active reservations with services found.")
     else:
         reservation_options = {
-            f"Reservation #{res['reservation_id']} - {res['guest_Fname']} {res['guest_Lname']} (Room {res['room_no']} - {res['type_name']})": res['reservation_id']
+            f"Reservation #{res['reservation_id']} - {res['guest_Fname']} {res['guest_Lname']} (Room {res['room_no']} - {catalog.type_name(res['room_no'])})": res['reservation_id']
             for res in reservations
         }
 
@@ -500,18 +594,12 @@ elif page == "Delete Services":
             reservation_display = st.selectbox("Select Reservation", list(reservation_options.keys()))
             reservation_id = reservation_options[reservation_display]
 
-            cursor.execute("""
-                SELECT rs.res_service_id, s.service_name, rs.quantity, rs.service_date
-                FROM ReservationServices rs
-                JOIN Services s ON rs.service_id = s.service_id
-                WHERE rs.reservation_id = ?
-            """, (reservation_id,))
-            services = cursor.fetchall()
+            services = backend.service_lines(conn, reservation_id)
 
             if not services:
                 st.warning("No services associated with this reservation.")
             else:
-                service_options = {f"Service ID {service['res_service_id']} - {service['service_name']} (Qty: {service['quantity']}, Date: {service['service_date']})": service['res_service_id'] for service in services}
+                service_options = {f"Service ID {service['res_service_id']} - {catalog.services[service['service_id']].service_name} (Qty: {service['quantity']}, Date: {service['service_date']})": service['res_service_id'] for service in services}
                 service_to_delete = st.selectbox("Select Service to Delete", list(service_options.keys()))
                 res_service_id = service_options[service_to_delete]
 
@@ -519,49 +607,24 @@ elif page == "Delete Services":
 
                 if submit_delete:
                     try:
-                        cursor.execute("DELETE FROM ReservationServices WHERE res_service_id = ?", (res_service_id,))
-
-                        cursor.execute("""
-                            SELECT SUM(rs.quantity * s.service_price) AS new_service_charges
-                            FROM ReservationServices rs
-                            JOIN Services s ON rs.service_id = s.service_id
-                            WHERE rs.reservation_id = ?
-                        """, (reservation_id,))
-                        new_service_charges = safe_float(cursor.fetchone()['new_service_charges'] or 0)
-
-                        cursor.execute("""
-                            UPDATE Billing
-                            SET service_charges = ?,
-                                total = room_charges + ?
-                            WHERE reservation_id = ?
-                        """, (new_service_charges, new_service_charges, reservation_id))
-
+                        backend.delete_service(conn, res_service_id)
                         st.success(f"Service with ID {res_service_id} deleted from reservation #{reservation_id}")
                         st.rerun()
-                    except sqlite3.Error as e:
+                    except OperationError as e:
+                        st.error(str(e))
+                    except backend.Error as e:
                         st.error(f"Database error: {e}")
 
 elif page == "Check Out":
     st.markdown('<h2 class="subtitle">Process Check Out</h2>', unsafe_allow_html=True)
 
-    cursor.execute("""
-        SELECT r.reservation_id, r.room_no, g.guest_Fname, g.guest_Lname, 
-               rt.type_name, b.total AS estimated_total, b.payment_status
-        FROM Reservation r
-        JOIN Guest g ON r.guest_id = g.guest_id
-        JOIN Room rm ON r.room_no = rm.room_no
-        JOIN RoomType rt ON rm.type_id = rt.type_id
-        JOIN Billing b ON r.reservation_id = b.reservation_id
-        WHERE r.check_out <= DATE('now')
-        AND b.payment_status = 'pending'
-    """)
-    checkout_reservations = cursor.fetchall()
+    checkout_reservations = cached_query(conn, 'CHECKOUT_RESERVATIONS')
 
     if not checkout_reservations:
         st.info("No reservations ready for checkout today.")
     else:
         reservation_options = {
-            f"Reservation #{res['reservation_id']} - {res['guest_Fname']} {res['guest_Lname']} (Room {res['room_no']} - {res['type_name']}) - ${safe_float(res['estimated_total']):.2f}": res['reservation_id']
+            f"Reservation #{res['reservation_id']} - {res['guest_Fname']} {res['guest_Lname']} (Room {res['room_no']} - {catalog.type_name(res['room_no'])}) - ${safe_float(res['estimated_total']):.2f}": res['reservation_id']
             for res in checkout_reservations
         }
 
@@ -569,21 +632,11 @@ elif page == "Check Out":
             reservation_display = st.selectbox("Select Reservation to Check Out", list(reservation_options.keys()))
             reservation_id = reservation_options[reservation_display]
 
-            cursor.execute("""
-                SELECT b.*, r.check_in, r.check_out, r.room_no, 
-                       g.guest_Fname, g.guest_Lname, rt.type_name
-                FROM Billing b
-                JOIN Reservation r ON b.reservation_id = r.reservation_id
-                JOIN Guest g ON r.guest_id = g.guest_id
-                JOIN Room rm ON r.room_no = rm.room_no
-                JOIN RoomType rt ON rm.type_id = rt.type_id
-                WHERE b.reservation_id = ?
-            """, (reservation_id,))
-            reservation_details = cursor.fetchone()
+            reservation_details = backend.checkout_details(conn, reservation_id)
 
             if reservation_details:
                 st.markdown(f"**Guest:** {reservation_details['guest_Fname']} {reservation_details['guest_Lname']}")
-                st.markdown(f"**Room:** {reservation_details['room_no']} ({reservation_details['type_name']})")
+                st.markdown(f"**Room:** {reservation_details['room_no']} ({catalog.type_name(reservation_details['room_no'])})")
                 st.markdown(f"**Stay:** {reservation_details['check_in']} to {reservation_details['check_out']}")
 
                 st.markdown("### Charges Summary")
@@ -598,38 +651,18 @@ elif page == "Check Out":
 
                 if submit_checkout:
                     try:
-                        cursor.execute("""
-                            UPDATE Billing
-                            SET payment_status = 'paid',
-                                payment_method = ?,
-                                payment_date = DATE('now')
-                            WHERE reservation_id = ?
-                        """, (payment_method, reservation_id))
-
-                        # Update room status to vacant
-                        cursor.execute("""
-                            UPDATE Room SET room_status = 'vacant'
-                            WHERE room_no = ?
-                        """, (reservation_details['room_no'],))
-
-                        st.success(f"Checkout processed successfully for Room {reservation_details['room_no']}")
+                        room_no = backend.check_out(conn, reservation_id, payment_method)
+                        st.success(f"Checkout processed successfully for Room {room_no}")
                         st.rerun()
-                    except sqlite3.Error as e:
+                    except OperationError as e:
+                        st.error(str(e))
+                    except backend.Error as e:
                         st.error(f"Error processing checkout: {e}")
 
 elif page == "Delete Reservation":
     st.markdown('<h2 class="subtitle">Delete Reservation</h2>', unsafe_allow_html=True)
 
-    cursor.execute("""
-        SELECT r.reservation_id, g.guest_Fname, g.guest_Lname, 
-               r.room_no, r.check_in, r.check_out, b.payment_status
-        FROM Reservation r
-        JOIN Guest g ON r.guest_id = g.guest_id
-        JOIN Billing b ON r.reservation_id = b.reservation_id
-        WHERE r.check_out >= DATE('now') AND b.payment_status = 'pending'
-        ORDER BY r.check_in
-    """)
-    active_reservations = cursor.fetchall()
+    active_reservations = cached_query(conn, 'DELETABLE_RESERVATIONS')
 
     if not active_reservations:
         st.info("No active reservations available for deletion.")
@@ -647,21 +680,12 @@ elif page == "Delete Reservation":
 
             if submit_delete:
                 try:
-                    cursor.execute("""
-                        SELECT COUNT(*) AS service_count
-                        FROM ReservationServices
-                        WHERE reservation_id = ?
-                    """, (reservation_id,))
-                    service_count = cursor.fetchone()['service_count']
-
-                    if service_count > 0:
-                        st.error("Cannot delete reservation with associated services. Use the 'Delete Services' page to remove services first.")
-                    else:
-                        cursor.execute("DELETE FROM Billing WHERE reservation_id = ?", (reservation_id,))
-                        cursor.execute("DELETE FROM Reservation WHERE reservation_id = ?", (reservation_id,))
-                        st.success(f"Reservation #{reservation_id} deleted successfully!")
-                        st.rerun()
-                except sqlite3.Error as e:
+                    backend.delete_reservation(conn, reservation_id)
+                    st.success(f"Reservation #{reservation_id} deleted successfully!")
+                    st.rerun()
+                except OperationError as e:
+                    st.error(str(e))
+                except backend.Error as e:
                     st.error(f"Database error: {e}")
 
 elif page == "Reports":
@@ -679,83 +703,228 @@ elif page == "Reports":
         try:
             start_str = start_date.strftime('%Y-%m-%d')
             end_str = end_date.strftime('%Y-%m-%d')
-            cursor.execute("""
-                SELECT 
-                    r.reservation_id,
-                    g.guest_Fname,
-                    g.guest_Lname,
-                    rm.room_no,
-                    rt.type_name,
-                    b.room_charges,
-                    b.service_charges,
-                    b.total,
-                    b.payment_status,
-                    b.payment_method,
-                    r.check_in,
-                    r.check_out
-                FROM Reservation r
-                JOIN Guest g ON r.guest_id = g.guest_id
-                JOIN Room rm ON r.room_no = rm.room_no
-                JOIN RoomType rt ON rm.type_id = rt.type_id
-                JOIN Billing b ON r.reservation_id = b.reservation_id
-                WHERE r.check_in BETWEEN ? AND ?
-                ORDER BY r.check_in
-            """, (start_str, end_str))
-
-            reservations = cursor.fetchall()
-
-            if reservations:
-                # Convert each row to a dictionary to ensure column names are preserved
-                data = [dict(row) for row in reservations]
-                report_df = pd.DataFrame(data)
-
-                # Safely access columns using .get() to avoid KeyError
-                total_revenue = safe_float(report_df['total'].sum()) if 'total' in report_df.columns else 0.0
-                total_room = safe_float(report_df['room_charges'].sum()) if 'room_charges' in report_df.columns else 0.0
-                total_service = safe_float(report_df['service_charges'].sum()) if 'service_charges' in report_df.columns else 0.0
-                paid_count = report_df[report_df['payment_status'] == 'paid'].shape[0] if 'payment_status' in report_df.columns else 0
-                pending_count = report_df[report_df['payment_status'] == 'pending'].shape[0] if 'payment_status' in report_df.columns else 0
+            # Summary metrics come from the DailyRevenue rollup (SQLite), not the detail rows
+            summary = backend.revenue_summary(conn, start_str, end_str)
 
+            if summary['reservations']:
                 st.markdown('<h3>Revenue Summary</h3>', unsafe_allow_html=True)
                 col1, col2, col3 = st.columns(3)
-                col1.metric("Total Revenue", f"${total_revenue:.2f}")
-                col2.metric("Room Revenue", f"${total_room:.2f}")
-                col3.metric("Service Revenue", f"${total_service:.2f}")
+                col1.metric("Total Revenue", f"${safe_float(summary['total_revenue']):.2f}")
+                col2.metric("Room Revenue", f"${safe_float(summary['room_revenue']):.2f}")
+                col3.metric("Service Revenue", f"${safe_float(summary['service_revenue']):.2f}")
 
                 col1, col2 = st.columns(2)
-                col1.metric("Paid Reservations", paid_count)
-                col2.metric("Pending Reservations", pending_count)
+                col1.metric("Paid Reservations", safe_int(summary['paid_count']))
+                col2.metric("Pending Reservations", safe_int(summary['pending_count']))
+
+                st.markdown('<h3>Revenue by Room Type and Payment Method</h3>', unsafe_allow_html=True)
+                st.dataframe(pd.DataFrame(backend.revenue_breakdown(conn, start_str, end_str)), hide_index=True)
+
+                # Only a preview is loaded into the page; exports stream the full range
+                report_df = pd.DataFrame(backend.report_rows(conn, start_str, end_str, REPORT_PREVIEW_ROWS))
 
                 st.markdown('<h3>Reservation Details</h3>', unsafe_allow_html=True)
                 st.dataframe(report_df)
+                if summary['reservations'] > REPORT_PREVIEW_ROWS:
+                    st.caption(f"Showing the first {REPORT_PREVIEW_ROWS:,} of {summary['reservations']:,} reservations. Export for the full list.")
 
-                csv = report_df.to_csv(index=False).encode('utf-8')
-                st.download_button(
-                    "Export to CSV",
-                    csv,
-                    f"hotel_report_{start_date}_to_{end_date}.csv",
-                    "text/csv",
-                    key='download-csv'
-                )
+                formats = [fmt for fmt in EXPORT_FORMATS if fmt == 'CSV' or EXCEL_AVAILABLE]
+                col1, col2 = st.columns(2)
+                export_format = col1.selectbox("Export Format", formats)
+                if col2.button("Prepare Export"):
+                    _, extension, mime = EXPORT_FORMATS[export_format]
+                    export_file = backend.export_report(conn, start_str, end_str, export_format)
+                    st.download_button(
+                        f"Download {export_format}",
+                        export_file,
+                        f"hotel_report_{start_date}_to_{end_date}.{extension}",
+                        mime,
+                        key='download-export'
+                    )
             else:
                 st.info("No reservations found for the selected period.")
-        except sqlite3.Error as err:
+        except backend.Error as err:
             st.error(f"Error generating reports: {err}")
 
     st.markdown('</div>', unsafe_allow_html=True)
 
+    # One day's settlements; on MySQL this is final.sql's sp_daily_revenue_report
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    st.markdown('<h3>Daily Revenue (bills settled that day)</h3>', unsafe_allow_html=True)
+    revenue_day = st.date_input("Settled On", value=datetime.now())
+    try:
+        daily = backend.daily_revenue(conn, revenue_day.strftime('%Y-%m-%d'))
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Settled Reservations", safe_int(daily['reservations']))
+        col2.metric("Total Revenue", f"${safe_float(daily['total_revenue']):.2f}")
+        col3.metric("Room Revenue", f"${safe_float(daily['room_revenue']):.2f}")
+        col4.metric("Service Revenue", f"${safe_float(daily['service_revenue']):.2f}")
+    except backend.Error as err:
+        st.error(f"Error loading the daily revenue: {err}")
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    st.markdown('<h3>Revenue Trends (settled stays, all history)</h3>', unsafe_allow_html=True)
+    col1, col2 = st.columns(2)
+    trend_period = col1.selectbox("Period", ["Month", "Week", "Day"])
+    breakdowns = {"None": None, "Room Type": 'room_type', "Payment Method": 'payment_method'}
+    trend_group = breakdowns[col2.selectbox("Breakdown", list(breakdowns))]
+    try:
+        refresh_snapshot(backend.data_version(conn, ['Billing']))
+        revenue_snapshot = RevenueSnapshot.load(backend.snapshot_path)
+        started = time.perf_counter()
+        trend = revenue_snapshot.aggregate(trend_period.lower(), group=trend_group)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if trend.empty:
+            st.info("No settled stays yet.")
+        else:
+            chart = alt.Chart(trend).mark_bar().encode(
+                x=alt.X('period:T', title=None),
+                y=alt.Y('total_revenue:Q', title='Revenue'),
+                color=alt.Color(f'{trend_group}:N', title=None) if trend_group else alt.value('#2c3e50'),
+                tooltip=[alt.Tooltip('period:T', format='%Y-%m-%d')] + ([trend_group] if trend_group else [])
+                        + ['reservations', 'nights', alt.Tooltip('total_revenue:Q', format=',.2f')],
+            )
+            st.altair_chart(chart, use_container_width=True)
+            st.caption(f"{len(revenue_snapshot):,} settled stays aggregated in {elapsed_ms:.0f} ms "
+                       f"(snapshot updated {revenue_snapshot.extracted_at})")
+    except (backend.Error, OSError) as err:
+        st.error(f"Error loading the revenue snapshot: {err}")
+    st.markdown('</div>', unsafe_allow_html=True)
+
+elif page == "Night Audit":
+    st.markdown('<h2 class="subtitle">Night Audit</h2>', unsafe_allow_html=True)
+
+    audit_date = st.date_input("Business Date", value=date.fromisoformat(backend.business_date(conn)))
+    audit_date_str = audit_date.strftime('%Y-%m-%d')
+
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    st.markdown('<h3>Departures to Settle</h3>', unsafe_allow_html=True)
+    due_out = {
+        f"Reservation #{row['reservation_id']} - {row['guest_Fname']} {row['guest_Lname']} "
+        f"(Room {row['room_no']}) - ${safe_float(row['total']):.2f}": row['reservation_id']
+        for row in backend.due_out(conn, audit_date_str)
+    }
+    with st.form("night_audit_form"):
+        if due_out:
+            settle = st.multiselect("Settle these checkouts", list(due_out), default=list(due_out))
+        else:
+            st.info("No unpaid departures on this date.")
+            settle = []
+        payment_method = st.selectbox("Payment Method", ["Cash", "Credit Card", "Debit Card", "Bank Transfer"])
+        submitted = st.form_submit_button("Run Night Audit")
+
+    if submitted:
+        try:
+            summary = backend.run_night_audit(conn, audit_date_str, [due_out[label] for label in settle],
+                                              payment_method)
+            st.success(f"Night audit for {summary['audit_date']} completed in {summary['ms']:.0f} ms")
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Checkouts Settled", summary['settled'])
+            col2.metric("Rooms Occupied", summary['rooms_occupied'], f"{summary['rooms_changed']} changed", delta_color="off")
+            col3.metric("Overdue Bills", summary['overdue'])
+            col1, col2 = st.columns(2)
+            col1.metric("Room-Nights Posted", summary['nights_posted'])
+            col2.metric("Room Revenue", f"${safe_float(summary['room_revenue']):,.2f}")
+        except backend.Error as e:
+            st.error(f"Database error: {e}")
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    st.markdown('<h3>Overdue Bills</h3>', unsafe_allow_html=True)
+    overdue = pd.DataFrame(backend.overdue_bills(conn, REPORT_PREVIEW_ROWS))
+    if overdue.empty:
+        st.info("No overdue bills.")
+    else:
+        st.dataframe(overdue, hide_index=True)
+
+    st.markdown('<h3>Recent Audits</h3>', unsafe_allow_html=True)
+    audits = pd.DataFrame(backend.recent_audits(conn, 14))
+    if audits.empty:
+        st.info("The night audit has not been run yet.")
+    else:
+        st.dataframe(audits, hide_index=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    if 'archive' in backend.features:
+        st.markdown('<div class="card">', unsafe_allow_html=True)
+        st.markdown('<h3>Archive Settled Stays</h3>', unsafe_allow_html=True)
+        active_count, archived_count = backend.archive_counts(conn)
+        col1, col2 = st.columns(2)
+        col1.metric("Active Reservations", f"{active_count:,}")
+        col2.metric("Archived Reservations", f"{archived_count:,}")
+        with st.form("archive_form"):
+            archive_days = st.number_input("Archive paid stays that checked out more than this many days ago",
+                                           min_value=1, value=archive.ARCHIVE_AFTER_DAYS)
+            archive_submitted = st.form_submit_button("Archive")
+
+        if archive_submitted:
+            try:
+                summary = backend.archive_settled(conn, int(archive_days), audit_date_str)
+                st.success(f"Archived {summary['reservations']:,} stays checked out before {summary['horizon']} "
+                           f"in {summary['seconds']:.2f}s")
+            except backend.Error as e:
+                st.error(f"Database error: {e}")
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    if 'assignment' in backend.features:
+        st.markdown('<div class="card">', unsafe_allow_html=True)
+        st.markdown('<h3>Optimize Room Assignments</h3>', unsafe_allow_html=True)
+        st.caption("Moves future stays between rooms of their booked type so that fewer gaps of "
+                   f"{assignment.SHORT_GAP_NIGHTS} nights or less are left between stays. "
+                   "Guests in house, stays booked into a chosen room and rooms under maintenance are not moved.")
+        with st.form("assignment_form"):
+            assignment_submitted = st.form_submit_button("Optimize")
+
+        if assignment_submitted:
+            try:
+                summary = backend.reassign_rooms(conn)
+                st.success(f"Moved {summary['moved']:,} of {summary['reservations']:,} future stays "
+                           f"in {summary['ms']:.0f} ms")
+                col1, col2 = st.columns(2)
+                col1.metric("Short Gaps", summary['short_gaps_after'],
+                            summary['short_gaps_after'] - summary['short_gaps_before'], delta_color="inverse")
+                col2.metric("Short-Gap Nights", summary['short_gap_nights_after'],
+                            summary['short_gap_nights_after'] - summary['short_gap_nights_before'], delta_color="inverse")
+            except OperationError as e:
+                st.error(str(e))
+            except backend.Error as e:
+                st.error(f"Database error: {e}")
+        st.markdown('</div>', unsafe_allow_html=True)
+
 elif page == "Guest Management":
     st.markdown('<h2 class="subtitle">Manage Guests</h2>', unsafe_allow_html=True)
 
-    cursor.execute("SELECT * FROM Guest ORDER BY guest_Lname, guest_Fname")
-    guests = cursor.fetchall()
+    # Keyset pagination: guest_pages holds the key each visited page starts after
+    search = st.text_input("Search guests", placeholder="Name, email, CNIC or city")
+    if st.session_state.get('guest_search') != search:
+        st.session_state['guest_search'] = search
+        st.session_state['guest_pages'] = [FIRST_PAGE]
+    guest_pages = st.session_state['guest_pages']
+
+    guests = backend.search_guests(conn, search, guest_pages[-1], GUEST_PAGE_SIZE + 1)
+    has_next_page = len(guests) > GUEST_PAGE_SIZE
+    guests = guests[:GUEST_PAGE_SIZE]
 
     if guests:
         guests_df = pd.DataFrame([dict(row) for row in guests])
-        st.dataframe(guests_df)
+        st.dataframe(guests_df, hide_index=True)
+    elif search:
+        st.info("No guests match your search.")
     else:
         st.info("No guests found in the database.")
 
+    col1, col2, col3 = st.columns([1, 1, 4])
+    if col1.button("◀ Previous", disabled=len(guest_pages) == 1):
+        guest_pages.pop()
+        st.rerun()
+    if col2.button("Next ▶", disabled=not has_next_page):
+        guest_pages.append(page_key(guests[-1]))
+        st.rerun()
+    col3.caption(f"Page {len(guest_pages)}")
+
+    guest_choices = {guest_label(guest): guest['guest_id'] for guest in guests}
+
     # Add Guest Form
     with st.expander("➕ Add New Guest"):
         with st.form("add_guest"):
@@ -778,27 +947,22 @@ elif page == "Guest Management":
                     st.error("CNIC must be 13 digits.")
                 else:
                     try:
-                        cursor.execute("""
-                            INSERT INTO Guest (guest_Fname, guest_Lname, guest_email, CNIC, age, gender, City)
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """, (fname, lname, email, cnic, age, gender, city))
+                        backend.add_guest(conn, fname, lname, email, cnic, age, gender, city)
                         st.success("Guest added successfully!")
                         st.rerun()
-                    except sqlite3.Error as e:
-                        if "UNIQUE constraint failed" in str(e):
-                            st.error("A guest with this CNIC or email already exists.")
-                        else:
-                            st.error(f"Database error: {e}")
+                    except OperationError as e:
+                        st.error(str(e))
+                    except backend.Error as e:
+                        st.error(f"Database error: {e}")
 
     # Update Guest Form - FIXED
     with st.expander("✏️ Update Guest"):
-        guest_id = st.number_input("Enter Guest ID to update", min_value=1)
-        if st.button("Find Guest"):
-            cursor.execute("SELECT * FROM Guest WHERE guest_id = ?", (guest_id,))
-            guest_row = cursor.fetchone()
+        guest_to_edit = st.selectbox("Guest to update", list(guest_choices.keys()), key='update_guest_choice')
+        if st.button("Find Guest", disabled=not guest_choices):
+            guest_id = guest_choices[guest_to_edit]
+            guest_row = backend.guest(conn, guest_id)
             if guest_row:
-                # Convert to dict for easy .get() usage
-                st.session_state['edit_guest'] = dict(guest_row)
+                st.session_state['edit_guest'] = guest_row
                 st.success(f"Found guest: {guest_row['guest_Fname']} {guest_row['guest_Lname']}")
             else:
                 st.error("Guest not found.")
@@ -823,37 +987,120 @@ elif page == "Guest Management":
                         st.error("Invalid email format.")
                     else:
                         try:
-                            cursor.execute("""
-                                UPDATE Guest
-                                SET guest_Fname=?, guest_Lname=?, guest_email=?, CNIC=?, City=?
-                                WHERE guest_id = ?
-                            """, (new_fname, new_lname, new_email, new_cnic, new_city, guest_id))
+                            backend.update_guest(conn, guest['guest_id'], new_fname, new_lname, new_email, new_cnic, new_city)
                             st.success("Guest updated successfully!")
                             st.session_state['edit_guest'] = None
                             st.rerun()
-                        except sqlite3.Error as e:
+                        except OperationError as e:
+                            st.error(str(e))
+                        except backend.Error as e:
                             st.error(f"Database error: {e}")
 
     # Delete Guest
     with st.expander("🗑️ Delete Guest"):
-        del_id = st.number_input("Enter Guest ID to delete", min_value=1)
-        if st.button("Delete Guest"):
+        guest_to_delete = st.selectbox("Guest to delete", list(guest_choices.keys()), key='delete_guest_choice')
+        if st.button("Delete Guest", disabled=not guest_choices):
+            del_id = guest_choices[guest_to_delete]
             try:
-                cursor.execute("""
-                    SELECT COUNT(*) AS active_reservations
-                    FROM Reservation
-                    WHERE guest_id = ? AND check_out >= DATE('now')
-                """, (del_id,))
-                active_res = cursor.fetchone()['active_reservations']
-
-                if active_res > 0:
-                    st.error("Cannot delete guest with active reservations.")
-                else:
-                    cursor.execute("DELETE FROM Guest WHERE guest_id = ?", (del_id,))
-                    st.success("Guest deleted successfully!")
-                    st.rerun()
-            except sqlite3.Error as e:
+                backend.delete_guest(conn, del_id)
+                st.success("Guest deleted successfully!")
+                st.rerun()
+            except OperationError as e:
+                st.error(str(e))
+            except backend.Error as e:
                 st.error(f"Database error: {e}")
 
-cursor.close()
-conn.close()
+elif page == "Bulk Import":
+    st.markdown('<h2 class="subtitle">Bulk Import</h2>', unsafe_allow_html=True)
+    st.caption("CSV, JSON or JSON Lines with the Guest, Reservation or ReservationServices column names. "
+               "Rows are checked with the same rules as the forms; rejected rows are listed below.")
+
+    kind = st.selectbox("Import", list(IMPORTS.keys()), format_func=str.title)
+    spec = IMPORTS[kind]
+    st.caption(f"Required columns: {', '.join(spec['required'])} · optional: {', '.join(spec['optional'])}")
+    upload = st.file_uploader("File", type=['csv', 'json', 'jsonl', 'ndjson'])
+
+    if upload is not None and st.button("Import"):
+        try:
+            with st.spinner("Importing..."):
+                result = backend.import_file(conn, kind, upload, detect_format(upload.name))
+        except (ValueError, backend.Error) as e:
+            st.error(f"Import failed: {e}")
+        else:
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Rows", f"{result['rows']:,}")
+            col2.metric("Imported", f"{result['imported']:,}")
+            col3.metric("Rejected", f"{len(result['rejects']):,}")
+            st.caption(f"{result['seconds']:.2f}s · {result['rows'] / max(result['seconds'], 1e-9):,.0f} rows/s")
+            if result['rejects']:
+                rejects_df = pd.DataFrame(result['rejects'])
+                st.dataframe(rejects_df.head(REPORT_PREVIEW_ROWS), hide_index=True)
+                st.download_button("Download Rejects", rejects_df.to_csv(index=False),
+                                   file_name=f"{kind}_rejects.csv", mime='text/csv')
+            else:
+                st.success("Every row was imported.")
+
+elif page == "Query Performance":
+    st.markdown('<h2 class="subtitle">Query Performance</h2>', unsafe_allow_html=True)
+    st.caption("Timings cover this server process since it started or was last reset. "
+               "Parameters are recorded by type only.")
+
+    query_log.slow_ms = st.number_input("Slow query threshold (ms)", min_value=1, value=int(query_log.slow_ms))
+
+    st.subheader("By Page")
+    page_rows = query_log.page_stats()
+    if page_rows:
+        st.dataframe(pd.DataFrame(page_rows), hide_index=True)
+    else:
+        st.info("No page reruns recorded yet.")
+
+    st.subheader("By Statement")
+    statement_rows = query_log.statement_stats()
+    if statement_rows:
+        st.dataframe(pd.DataFrame(statement_rows), hide_index=True)
+    else:
+        st.info("No statements recorded yet.")
+
+    st.subheader("Recent Slow Queries")
+    if not query_log.slow:
+        st.info(f"No statement has taken {query_log.slow_ms} ms or more.")
+    for slow in list(query_log.slow):
+        with st.expander(f"{slow['ms']:.1f} ms · {slow['page'] or '-'} · {slow['statement'][:80]}"):
+            st.code(slow['statement'], language='sql')
+            st.caption(f"{slow['at']} · parameters {slow['parameters']} · {slow['rows']} row(s)")
+            if slow['plan']:
+                st.code('\n'.join(slow['plan']))
+
+    st.subheader("Profile a Rerun")
+    col1, col2 = st.columns(2)
+    if col1.button("Profile next rerun"):
+        st.session_state['profile_next_rerun'] = True
+        st.info("The next page you open will be profiled; come back here to read the report.")
+    if col2.button("Reset statistics"):
+        query_log.reset()
+        st.rerun()
+    if 'profile_report' in st.session_state:
+        st.caption(f"Last profiled rerun: {st.session_state.get('profile_page')}")
+        st.code(st.session_state['profile_report'])
+
+pool_stats = backend.stats()
+with st.sidebar.expander("Connection Pool"):
+    col1, col2 = st.columns(2)
+    col1.metric("Hits", pool_stats['hits'])
+    col2.metric("Misses", pool_stats['misses'])
+    st.caption(f"Hit rate {pool_stats['hit_rate']:.1%} · {pool_stats['open']} open · {pool_stats['idle']} idle")
+
+cache_stats = get_cache_counter().stats()
+with st.sidebar.expander("Result Cache"):
+    col1, col2 = st.columns(2)
+    col1.metric("Hits", cache_stats['hits'])
+    col2.metric("Misses", cache_stats['misses'])
+    st.caption(f"Hit rate {cache_stats['hit_rate']:.1%}")
+
+backend.release(conn)
+
+query_log.end_rerun()
+profiler = st.session_state.pop('profiler', None)
+if profiler is not None:
+    profiler.disable()
+    st.session_state['profile_report'] = profile_report(profiler)
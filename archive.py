@@ -0,0 +1,204 @@
+import os
+import sys
+import time
+
+# -------------------------------------------------------------------
+#  Hot/cold archive – paid stays that ended more than a horizon ago move,
+#  with their bill, service lines and posted room-nights, from final.db
+#  into final_history.db, which every connection ATTACHes as 'archive'.
+#  The archive keeps its own DailyRevenue rollup of what it holds, and
+#  the Reports queries read both databases through UNION ALL, so the hot
+#  tables only carry the active slice.
+#
+#  In WAL mode a commit spanning two databases is atomic per database,
+#  not across both, and either file may be committed first. So a move is
+#  two transactions that each write one file: the stays are copied into
+#  the archive and committed, then the rows the archive now holds are
+#  deleted from final.db. A crash in between leaves the stay in both
+#  files (Reports count it twice until then); the next run deletes it
+#  from final.db without rolling it up into the archive a second time.
+# -------------------------------------------------------------------
+ARCHIVE_AFTER_DAYS = 365
+
+# table -> (primary key, indexed columns) in the archive database
+ARCHIVED_TABLES = {
+    'Reservation': ('reservation_id', ['check_in', 'guest_id']),
+    'Billing': ('reservation_id', []),
+    'ReservationServices': ('res_service_id', ['reservation_id']),
+    'RoomCharge': ('reservation_id, night', []),
+    'DailyRevenue': ('day, type_id, payment_method', []),
+}
+MOVED_TABLES = ['Reservation', 'Billing', 'ReservationServices', 'RoomCharge']
+
+
+def archive_path(path):
+    if path == ':memory:':
+        return ':memory:'
+    root, ext = os.path.splitext(path)
+    return f"{root}_history{ext or '.db'}"
+
+def attach(conn, path):
+    conn.execute("ATTACH DATABASE ? AS archive", (archive_path(path),))
+    conn.execute("PRAGMA archive.journal_mode = WAL")
+    conn.execute("PRAGMA archive.synchronous = NORMAL")
+
+def _columns(conn, schema, table):
+    return [(row[1], row[2]) for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+def ensure_schema(conn):
+    """Mirror the archived tables' columns from final.db into the archive.
+
+    Creates missing tables and adds columns that later migrations gave
+    the hot tables; run after migrate().
+    """
+    for table, (key, indexes) in ARCHIVED_TABLES.items():
+        columns = _columns(conn, 'main', table)
+        if not columns:
+            continue
+        existing = {name for name, _ in _columns(conn, 'archive', table)}
+        if not existing:
+            definitions = ', '.join(f"{name} {declared}" for name, declared in columns)
+            conn.execute(f"CREATE TABLE IF NOT EXISTS archive.{table} ({definitions}, PRIMARY KEY ({key}))")
+        for name, declared in columns:
+            if existing and name not in existing:
+                conn.execute(f"ALTER TABLE archive.{table} ADD COLUMN {name} {declared}")
+        for column in indexes:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS archive.idx_{table.lower()}_{column} ON {table}({column})")
+
+
+# Stays to move; 'fresh' is false for one an interrupted run already copied
+BATCH_SQL = """
+    INSERT INTO temp.ArchiveBatch (reservation_id, fresh)
+    SELECT r.reservation_id,
+           NOT EXISTS (SELECT 1 FROM archive.Reservation a WHERE a.reservation_id = r.reservation_id)
+    FROM main.Reservation r
+    JOIN main.Billing b ON b.reservation_id = r.reservation_id
+    WHERE r.check_out < ? AND b.payment_status = 'paid'
+"""
+
+ROLLUP_SQL = """
+    INSERT INTO archive.DailyRevenue (day, type_id, payment_method, reservations, paid, pending,
+                                      room_charges, service_charges, total)
+    SELECT r.check_in, rm.type_id, COALESCE(b.payment_method, ''),
+           COUNT(*),
+           SUM(b.payment_status = 'paid'),
+           SUM(b.payment_status = 'pending'),
+           ROUND(SUM(b.room_charges), 2),
+           ROUND(SUM(b.service_charges), 2),
+           ROUND(SUM(b.total), 2)
+    FROM temp.ArchiveBatch batch
+    JOIN archive.Reservation r ON r.reservation_id = batch.reservation_id
+    JOIN archive.Billing b ON b.reservation_id = batch.reservation_id
+    JOIN main.Room rm ON rm.room_no = r.room_no
+    WHERE batch.fresh
+    GROUP BY r.check_in, rm.type_id, COALESCE(b.payment_method, '')
+    ON CONFLICT (day, type_id, payment_method) DO UPDATE SET
+        reservations = reservations + excluded.reservations,
+        paid = paid + excluded.paid,
+        pending = pending + excluded.pending,
+        room_charges = ROUND(room_charges + excluded.room_charges, 2),
+        service_charges = ROUND(service_charges + excluded.service_charges, 2),
+        total = ROUND(total + excluded.total, 2)
+"""
+
+# Keeps only the stays the archive holds in full – the reservation, its
+# bill, every service line and posted night – and that are still settled
+ARCHIVED_BATCH_SQL = """
+    DELETE FROM temp.ArchiveBatch
+    WHERE NOT EXISTS (SELECT 1 FROM archive.Reservation a WHERE a.reservation_id = ArchiveBatch.reservation_id)
+       OR NOT EXISTS (SELECT 1 FROM archive.Billing a WHERE a.reservation_id = ArchiveBatch.reservation_id)
+       OR NOT EXISTS (SELECT 1 FROM main.Billing b
+                      WHERE b.reservation_id = ArchiveBatch.reservation_id AND b.payment_status = 'paid')
+       OR EXISTS (SELECT 1 FROM main.ReservationServices rs
+                  WHERE rs.reservation_id = ArchiveBatch.reservation_id
+                    AND NOT EXISTS (SELECT 1 FROM archive.ReservationServices a
+                                    WHERE a.res_service_id = rs.res_service_id))
+       OR EXISTS (SELECT 1 FROM main.RoomCharge c
+                  WHERE c.reservation_id = ArchiveBatch.reservation_id
+                    AND NOT EXISTS (SELECT 1 FROM archive.RoomCharge a
+                                    WHERE a.reservation_id = c.reservation_id AND a.night = c.night))
+"""
+
+def _copy(conn, horizon):
+    # First transaction: writes only the archive
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(BATCH_SQL, (horizon,))
+        copied = {}
+        for table in MOVED_TABLES:
+            columns = ', '.join(name for name, _ in _columns(conn, 'main', table))
+            copied[table] = conn.execute(f"""
+                INSERT OR IGNORE INTO archive.{table} ({columns})
+                SELECT {columns} FROM main.{table}
+                WHERE reservation_id IN (SELECT reservation_id FROM temp.ArchiveBatch)
+            """).rowcount
+        conn.execute(ROLLUP_SQL)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return copied
+
+def _remove(conn):
+    # Second transaction: writes only final.db, and only what the archive holds
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(ARCHIVED_BATCH_SQL)
+        in_batch = "reservation_id IN (SELECT reservation_id FROM temp.ArchiveBatch)"
+        # Bills first, so the service-line triggers find no bill to adjust;
+        # the Reservation delete triggers clear RoomNight and RoomCharge
+        for table in ('Billing', 'ReservationServices'):
+            conn.execute(f"DELETE FROM main.{table} WHERE {in_batch}")
+        removed = conn.execute(f"DELETE FROM main.Reservation WHERE {in_batch}").rowcount
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return removed
+
+def archive_settled(conn, days=ARCHIVE_AFTER_DAYS, today=None):
+    """Move paid stays that checked out more than days ago; returns a summary.
+
+    Safe to run again after a failure: stays already copied are only
+    deleted from final.db.
+    """
+    started = time.perf_counter()
+    horizon = conn.execute("SELECT DATE(COALESCE(?, 'now'), ?)", (today, f"-{int(days)} days")).fetchone()[0]
+    conn.execute("CREATE TEMP TABLE ArchiveBatch (reservation_id INTEGER PRIMARY KEY, fresh INTEGER NOT NULL)")
+    try:
+        copied = _copy(conn, horizon)
+        removed = _remove(conn)
+    finally:
+        conn.execute("DROP TABLE temp.ArchiveBatch")
+    return {
+        'horizon': horizon,
+        'reservations': copied['Reservation'],
+        'service_lines': copied['ReservationServices'],
+        'room_charges': copied['RoomCharge'],
+        'removed': removed,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+def counts(conn):
+    """(active, archived) reservation counts."""
+    return tuple(conn.execute(f"SELECT COUNT(*) FROM {schema}.Reservation").fetchone()[0]
+                 for schema in ('main', 'archive'))
+
+
+if __name__ == '__main__':
+    # python archive.py [database] [--days N]
+    from db import DB_PATH, open_connection
+    from migrations import migrate
+
+    args = sys.argv[1:]
+    days = int(args[args.index('--days') + 1]) if '--days' in args else ARCHIVE_AFTER_DAYS
+    paths = [a for i, a in enumerate(args) if not a.startswith('--') and (i == 0 or args[i - 1] != '--days')]
+
+    conn = open_connection(paths[0] if paths else DB_PATH)
+    migrate(conn)
+    summary = archive_settled(conn, days)
+    active, archived = counts(conn)
+    print(f"archived {summary['reservations']:,} stays paid and checked out before {summary['horizon']} "
+          f"({summary['service_lines']:,} service lines, {summary['room_charges']:,} room-nights) "
+          f"in {summary['seconds']:.2f}s; {active:,} active, {archived:,} archived")
+    conn.close()
@@ -0,0 +1,218 @@
+import sys
+import time
+
+import numpy as np
+
+import queries
+
+# -------------------------------------------------------------------
+#  Room assignment – which room of the booked type each stay gets.
+#  Gaps of one or two nights between stays in a room rarely sell, so
+#  both the single-booking pick and the batch re-optimization pack
+#  stays tightly:
+#    best_room()  books the free room whose neighbouring stays leave the
+#                 fewest short gaps (then the smallest gaps).
+#    plan()       reassigns every future stay (check-in after today, so
+#                 nobody has the key yet). Per room type it is interval
+#                 partitioning in check-in order, best fit: each stay
+#                 goes to the room it fits into most tightly. In-house
+#                 stays stay where they are and only delay their room's
+#                 first free night. A type is left as it is when the
+#                 new plan would not reduce its short-gap nights.
+#  Rooms under maintenance are never assigned and their stays never move.
+#  Neither do stays a clerk booked into a chosen room (room_locked): the
+#  other stays are fitted around them. The pickers take plain rows
+#  (pick_room, plan_stays), so the MySQL backend reuses them.
+# -------------------------------------------------------------------
+SHORT_GAP_NIGHTS = 2
+
+ROOMS_SQL = """
+    SELECT room_no, type_id, COALESCE(room_capacity, 0) AS room_capacity
+    FROM Room
+    WHERE room_status != 'maintenance'
+    ORDER BY room_no
+"""
+
+# Stays in house on ?1 hold their room until check-out
+IN_HOUSE_SQL = """
+    SELECT room_no, MAX(check_out) AS free_from
+    FROM Reservation
+    WHERE check_out > ?1 AND check_in <= ?1
+    GROUP BY room_no
+"""
+
+FUTURE_STAYS_SQL = """
+    SELECT r.reservation_id, r.room_no, rm.type_id, r.check_in, r.check_out,
+           COALESCE(r.adults, 0) + COALESCE(r.children, 0) AS guests, r.room_locked
+    FROM Reservation r
+    JOIN Room rm ON rm.room_no = r.room_no
+    WHERE r.check_in > ?1 AND rm.room_status != 'maintenance'
+"""
+
+
+def _today(conn):
+    return conn.execute("SELECT DATE('now')").fetchone()[0]
+
+def _days(values):
+    return np.asarray(values, dtype='datetime64[D]').astype(np.int64)
+
+def _short_gaps(gaps):
+    return (gaps > 0) & (gaps <= SHORT_GAP_NIGHTS)
+
+def fragmentation(room_nos, check_ins, check_outs, free_from):
+    """(short gaps, short-gap nights) left by an assignment.
+
+    Arrays hold one stay each (days as integers); free_from maps each
+    room_no to the first night it is free. The gap before a room's first
+    stay counts from there.
+    """
+    if not len(room_nos):
+        return 0, 0
+    order = np.lexsort((check_ins, room_nos))
+    rooms, starts, ends = room_nos[order], check_ins[order], check_outs[order]
+    first = np.ones(len(rooms), dtype=bool)
+    first[1:] = rooms[1:] != rooms[:-1]
+    previous_end = np.empty(len(rooms), dtype=np.int64)
+    previous_end[1:] = ends[:-1]
+    previous_end[first] = [free_from[room_no] for room_no in rooms[first]]
+    gaps = starts - previous_end
+    short = _short_gaps(gaps)
+    return int(short.sum()), int(gaps[short].sum())
+
+def _assign(room_nos, capacities, free_from, current, check_ins, check_outs, guests, locked):
+    """Best-fit interval partitioning; the room_no per stay, or None when
+    some stay finds no room (possible only with mixed capacities).
+
+    Locked stays keep their room, and a stay only fits into a room if it
+    leaves before that room's next locked stay.
+    """
+    free = free_from.copy()
+    assigned = current.copy()
+    capacity_rank = np.minimum(capacities, 63)
+    no_room = np.iinfo(np.int64).max
+    order = np.lexsort((check_outs, check_ins))
+    slot = {room_no: k for k, room_no in enumerate(room_nos.tolist())}
+    pinned = [[] for _ in range(len(room_nos))]
+    for i in order[locked[order]]:
+        pinned[slot[current[i]]].append(check_ins[i])
+    pinned = [iter(starts) for starts in pinned]
+    next_pinned = np.array([next(starts, no_room) for starts in pinned], dtype=np.int64)
+    for i in order:
+        if locked[i]:
+            k = slot[current[i]]
+            free[k] = check_outs[i]
+            next_pinned[k] = next(pinned[k], no_room)
+            continue
+        gaps = check_ins[i] - free
+        fits = (gaps >= 0) & (capacities >= guests[i]) & (next_pinned >= check_outs[i])
+        if not fits.any():
+            return None
+        # Lexicographic: no short gap, smallest gap, smallest room, stay put
+        short = _short_gaps(gaps).astype(np.int64)
+        score = (((short << 20) + gaps) * 64 + capacity_rank) * 2 + (room_nos != current[i])
+        best = np.where(fits, score, no_room).argmin()
+        assigned[i] = room_nos[best]
+        free[best] = check_outs[i]
+    return assigned
+
+def plan(conn, type_ids=None, today=None):
+    """Reassignments for the future stays; returns (moves, summary).
+
+    moves: [(reservation_id, room_no)] for stays that change room. Reads
+    only, so run it inside the writing transaction (see
+    operations.reassign_rooms) for the plan to still hold when applied.
+    """
+    started = time.perf_counter()
+    today = today or _today(conn)
+    moves, summary = plan_stays(conn.execute(ROOMS_SQL).fetchall(), conn.execute(IN_HOUSE_SQL, (today,)).fetchall(),
+                                conn.execute(FUTURE_STAYS_SQL, (today,)).fetchall(), today, type_ids)
+    summary['ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return moves, summary
+
+def plan_stays(rooms, in_house, stays, today, type_ids=None):
+    """plan() on rows of ROOMS_SQL, IN_HOUSE_SQL and FUTURE_STAYS_SQL."""
+    started = time.perf_counter()
+    today_day = int(_days(today))
+    free_from = {room['room_no']: today_day for room in rooms}
+    for room_no, check_out in in_house:
+        if room_no in free_from:
+            free_from[room_no] = int(_days(check_out))
+
+    moves = []
+    summary = {'reservations': len(stays), 'moved': 0, 'short_gaps_before': 0, 'short_gaps_after': 0,
+               'short_gap_nights_before': 0, 'short_gap_nights_after': 0, 'types_kept': []}
+    for type_id in sorted({room['type_id'] for room in rooms}):
+        if type_ids is not None and type_id not in type_ids:
+            continue
+        type_rooms = [room for room in rooms if room['type_id'] == type_id]
+        type_stays = [stay for stay in stays if stay['type_id'] == type_id]
+        if not type_stays:
+            continue
+        room_nos = np.array([room['room_no'] for room in type_rooms], dtype=np.int64)
+        capacities = np.array([room['room_capacity'] for room in type_rooms], dtype=np.int64)
+        ids = np.array([stay['reservation_id'] for stay in type_stays], dtype=np.int64)
+        current = np.array([stay['room_no'] for stay in type_stays], dtype=np.int64)
+        check_ins = _days([stay['check_in'] for stay in type_stays])
+        check_outs = _days([stay['check_out'] for stay in type_stays])
+        guests = np.array([stay['guests'] for stay in type_stays], dtype=np.int64)
+        locked = np.array([bool(stay['room_locked']) for stay in type_stays], dtype=bool)
+
+        before = fragmentation(current, check_ins, check_outs, free_from)
+        assigned = _assign(room_nos, capacities, np.array([free_from[r] for r in room_nos], dtype=np.int64),
+                           current, check_ins, check_outs, guests, locked)
+        after = fragmentation(assigned, check_ins, check_outs, free_from) if assigned is not None else None
+        if after is None or after[1] >= before[1]:
+            summary['types_kept'].append(type_id)
+            after = before
+        else:
+            changed = assigned != current
+            moves.extend(zip(ids[changed].tolist(), assigned[changed].tolist()))
+        summary['short_gaps_before'] += before[0]
+        summary['short_gap_nights_before'] += before[1]
+        summary['short_gaps_after'] += after[0]
+        summary['short_gap_nights_after'] += after[1]
+
+    summary['moved'] = len(moves)
+    summary['ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return moves, summary
+
+def best_room(conn, type_id, guests, check_in, check_out, today=None):
+    """The free room of type_id that the stay fits into most tightly, or None."""
+    return pick_room(conn.execute(queries.BEST_FIT_ROOMS, (type_id, guests, check_in, check_out)),
+                     check_in, check_out, today or _today(conn))
+
+def pick_room(rooms, check_in, check_out, today):
+    """best_room() on rows of queries.BEST_FIT_ROOMS."""
+    today_day = int(_days(today))
+    start, end = int(_days(check_in)), int(_days(check_out))
+    best, best_score = None, None
+    for room in rooms:
+        # Nights before today are past selling, so a gap starts no earlier
+        before = start - max(int(_days(room['last_night'])) + 1 if room['last_night'] else today_day, today_day)
+        after = int(_days(room['next_night'])) - end if room['next_night'] else None
+        short = int(0 < before <= SHORT_GAP_NIGHTS) + int(after is not None and 0 < after <= SHORT_GAP_NIGHTS)
+        score = (short, max(before, 0) + (after if after is not None else 0), room['room_capacity'])
+        if best_score is None or score < best_score:
+            best, best_score = room['room_no'], score
+    return best
+
+
+if __name__ == '__main__':
+    # python assignment.py [database] [--dry-run]  – re-optimize future room assignments
+    from db import DB_PATH, open_connection
+    from migrations import migrate
+    import operations
+
+    args = sys.argv[1:]
+    paths = [a for a in args if not a.startswith('--')]
+    conn = open_connection(paths[0] if paths else DB_PATH)
+    migrate(conn)
+    if '--dry-run' in args:
+        _, summary = plan(conn)
+    else:
+        summary = operations.reassign_rooms(conn)
+    print(f"{'planned' if '--dry-run' in args else 'reassigned'} {summary['moved']:,} of "
+          f"{summary['reservations']:,} future stays in {summary['ms']:.0f} ms; short gaps "
+          f"{summary['short_gaps_before']:,} -> {summary['short_gaps_after']:,} "
+          f"({summary['short_gap_nights_before']:,} -> {summary['short_gap_nights_after']:,} nights)")
+    conn.close()
@@ -0,0 +1,106 @@
+import threading
+from bisect import bisect_left
+
+from catalog import Catalog
+
+# -------------------------------------------------------------------
+#  Room availability – per-room sorted stay intervals
+#  Stays are half-open [check_in, check_out): a guest checking out on
+#  the 14th does not block a new check-in on the 14th. Dates are ISO
+#  'YYYY-MM-DD' strings, which sort the same way as the dates they hold.
+#  Each room also keeps the running maximum check-out over its sorted
+#  stays, since legacy double bookings (kept by migration 4) can overlap.
+# -------------------------------------------------------------------
+# Already in per-room order off the (room_no, check_in, check_out) index
+STAYS_SQL = "SELECT room_no, check_in, check_out, reservation_id FROM Reservation ORDER BY room_no, check_in"
+
+
+class AvailabilityIndex:
+    def __init__(self, rooms):
+        # rooms: room_no -> catalog.Room
+        self.rooms = rooms
+        self._stays = {room_no: [] for room_no in rooms}   # sorted (check_in, check_out, reservation_id)
+        self._reach = {room_no: [] for room_no in rooms}   # latest check_out of stays[:i + 1]
+        self._by_reservation = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, conn, rooms=None):
+        cursor = conn.cursor()
+        cursor.row_factory = None        # plain tuples: the index is rebuilt after every booking
+        try:
+            return cls.from_stays(rooms if rooms is not None else Catalog.load(conn).rooms,
+                                  cursor.execute(STAYS_SQL))
+        finally:
+            cursor.close()
+
+    @classmethod
+    def from_stays(cls, rooms, stays):
+        """stays: (room_no, check_in, check_out, reservation_id) in STAYS_SQL order."""
+        index = cls(rooms)
+        for room_no, check_in, check_out, reservation_id in stays:
+            stay = (check_in, check_out, reservation_id)
+            index._stays.setdefault(room_no, []).append(stay)
+            index._by_reservation[reservation_id] = (room_no, stay)
+        for room_no, room_stays in index._stays.items():
+            room_stays.sort()            # ties on check_in come in any order
+            index._update_reach(room_no, 0)
+        return index
+
+    def _update_reach(self, room_no, start):
+        stays, reach = self._stays[room_no], self._reach.setdefault(room_no, [])
+        del reach[start:]
+        latest = reach[-1] if reach else ''
+        for _, check_out, _ in stays[start:]:
+            latest = max(latest, check_out)
+            reach.append(latest)
+
+    # ---------------------------------------------------------------
+    #  Incremental maintenance – call after the database write succeeds
+    # ---------------------------------------------------------------
+    def add(self, reservation_id, room_no, check_in, check_out):
+        stay = (check_in, check_out, reservation_id)
+        with self._lock:
+            stays = self._stays.setdefault(room_no, [])
+            i = bisect_left(stays, stay)
+            stays.insert(i, stay)
+            self._update_reach(room_no, i)
+            self._by_reservation[reservation_id] = (room_no, stay)
+
+    def remove(self, reservation_id):
+        with self._lock:
+            entry = self._by_reservation.pop(reservation_id, None)
+            if entry is None:
+                return
+            room_no, stay = entry
+            stays = self._stays.get(room_no, [])
+            i = bisect_left(stays, stay)
+            if i < len(stays) and stays[i] == stay:
+                del stays[i]
+                self._update_reach(room_no, i)
+
+    # ---------------------------------------------------------------
+    #  Queries
+    # ---------------------------------------------------------------
+    def is_free(self, room_no, check_in, check_out):
+        # Of the stays starting before our check-out, the one leaving
+        # last is the only one that can reach into our range.
+        i = bisect_left(self._stays.get(room_no, []), (check_out,))
+        return i == 0 or self._reach[room_no][i - 1] <= check_in
+
+    def available_rooms(self, check_in, check_out, type_ids=None, min_capacity=0):
+        """Rooms of the given types and capacity that are free for the whole stay."""
+        with self._lock:
+            return [
+                room for room_no, room in self.rooms.items()
+                if (type_ids is None or room.type_id in type_ids)
+                and (room.room_capacity or 0) >= min_capacity
+                and self.is_free(room_no, check_in, check_out)
+            ]
+
+    def availability_by_type(self, check_in, check_out, min_capacity=0):
+        """Batch query: number of free rooms per type_name for one stay."""
+        counts = {}
+        for room in self.available_rooms(check_in, check_out, min_capacity=min_capacity):
+            counts[room.type_name] = counts.get(room.type_name, 0) + 1
+        return counts
@@ -0,0 +1,1375 @@
+import functools
+import json
+import random
+import re
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+
+import archive
+import assignment
+import availability
+import exports
+import guests
+import imports
+import migrations
+import night_audit
+import occupancy
+import operations
+import queries
+import reports
+import snapshot
+from availability import AvailabilityIndex
+from catalog import ROOM_TYPES_SQL, ROOMS_SQL, SERVICES_SQL, Catalog
+from db import DB_PATH, ConnectionPool, data_version, open_connection
+from occupancy import OccupancyCalendar
+from operations import BACKOFF_SECONDS, RETRIES, OperationError
+from querylog import InstrumentedMySQLConnection
+from rates import RATE_RANGE_SQL, RATES_SQL, RateCalendar
+
+try:
+    import mysql.connector           # optional: only needed for the MySQL backend
+except ImportError:
+    mysql = None
+
+MYSQL_AVAILABLE = mysql is not None
+
+# -------------------------------------------------------------------
+#  Storage backends – app.py takes a connection with connection(),
+#  hands it back with release(), and reads and writes only through the
+#  backend's methods, which take that connection first. SQLiteBackend
+#  is the pooled WAL database the app has always used; MySQLBackend runs
+#  the same pages against the final.sql schema (MySQL, MariaDB or TiDB)
+#  over a pool of mysql.connector connections, so several clerks'
+#  sessions can write at once.
+# -------------------------------------------------------------------
+POOL_SIZE = 8
+
+DAILY_REVENUE_COLUMNS = ('report_date', 'reservations', 'total_revenue', 'room_revenue', 'service_revenue')
+
+# Optional features; pages and sections that need one are hidden when
+# the backend does not list it
+FEATURES = ('rates', 'assignment', 'archive', 'import')
+
+
+class Backend:
+    name = None
+    Error = ()                       # the driver's exception base class
+    features = frozenset()
+    snapshot_path = None
+
+    def connection(self):
+        raise NotImplementedError
+
+    def release(self, conn):
+        raise NotImplementedError
+
+    def stats(self):
+        """Pool counters: hits, misses, hit_rate, open, idle."""
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def migrate(self):
+        """Bring the schema up to what the pages need; safe to repeat."""
+        raise NotImplementedError
+
+    def data_version(self, conn, tables):
+        """Write counters of the given tables, for cache keys (see db.data_version)."""
+        raise NotImplementedError
+
+    # Business operations – same signatures and OperationError messages
+    # as the operations module
+    def make_reservation(self, conn, guest_id, room_no, check_in, check_out, adults, children):
+        raise NotImplementedError
+
+    def book_group(self, conn, guest_id, room_mix, check_in, check_out, adults, children):
+        raise NotImplementedError
+
+    def book_best_fit(self, conn, guest_id, type_id, check_in, check_out, adults, children):
+        raise NotImplementedError
+
+    def reassign_rooms(self, conn, type_ids=None):
+        raise NotImplementedError
+
+    def check_out(self, conn, reservation_id, payment_method):
+        raise NotImplementedError
+
+    def delete_reservation(self, conn, reservation_id):
+        raise NotImplementedError
+
+    def add_service(self, conn, reservation_id, service_id, quantity, service_date):
+        raise NotImplementedError
+
+    def post_service_bulk(self, conn, service_id, quantity, service_date, type_ids=None, reservation_ids=None):
+        raise NotImplementedError
+
+    def delete_service(self, conn, res_service_id):
+        raise NotImplementedError
+
+    def add_guest(self, conn, fname, lname, email, cnic, age, gender, city):
+        raise NotImplementedError
+
+    def update_guest(self, conn, guest_id, fname, lname, email, cnic, city):
+        raise NotImplementedError
+
+    def delete_guest(self, conn, guest_id):
+        raise NotImplementedError
+
+    def set_rates(self, conn, type_id, start, end, price, weekdays=None):
+        raise NotImplementedError
+
+    def clear_rates(self, conn, type_id, start, end):
+        raise NotImplementedError
+
+    def import_file(self, conn, kind, source, fmt='csv'):
+        raise NotImplementedError
+
+    def run_night_audit(self, conn, audit_date=None, settle=(), payment_method='Cash'):
+        """Summary dict as night_audit.run returns it."""
+        raise NotImplementedError
+
+    def archive_settled(self, conn, days=archive.ARCHIVE_AFTER_DAYS, today=None):
+        raise NotImplementedError
+
+    def refresh_snapshot(self, conn):
+        """Append newly settled stays to the revenue snapshot at snapshot_path."""
+        raise NotImplementedError
+
+    # In-memory views of the database
+    def load_catalog(self, conn):
+        raise NotImplementedError
+
+    def load_availability(self, conn, rooms):
+        raise NotImplementedError
+
+    def load_rate_calendar(self, conn, base_prices):
+        raise NotImplementedError
+
+    def load_occupancy(self, conn, start, days):
+        raise NotImplementedError
+
+    # Page reads – rows as dicts, dates as ISO strings, amounts as floats
+    cached_queries = {name: tables for name, (_, tables) in queries.CACHED_QUERIES.items()}
+
+    def cached_rows(self, conn, name, params=()):
+        """Rows of one of the cached_queries, which maps name -> tables read."""
+        raise NotImplementedError
+
+    def has_guests(self, conn):
+        raise NotImplementedError
+
+    def search_guests(self, conn, text='', after=guests.FIRST_PAGE, limit=guests.PAGE_SIZE):
+        raise NotImplementedError
+
+    def guest(self, conn, guest_id):
+        raise NotImplementedError
+
+    def service_lines(self, conn, reservation_id):
+        raise NotImplementedError
+
+    def checkout_details(self, conn, reservation_id):
+        raise NotImplementedError
+
+    def in_house(self, conn, day, type_ids=None):
+        """(reservation_id, room_no) of the unpaid stays holding the night."""
+        raise NotImplementedError
+
+    def revenue_summary(self, conn, start, end):
+        raise NotImplementedError
+
+    def revenue_breakdown(self, conn, start, end):
+        raise NotImplementedError
+
+    def report_rows(self, conn, start, end, limit):
+        raise NotImplementedError
+
+    def report_chunks(self, conn, start, end, chunk_size=exports.CHUNK_ROWS):
+        """Yield (columns, rows) of the Reports query, chunk_size rows at a time."""
+        raise NotImplementedError
+
+    def export_report(self, conn, start, end, fmt='CSV'):
+        return exports.export_chunks(self.report_chunks(conn, start, end), fmt)
+
+    def daily_revenue(self, conn, day):
+        """Paid bills settled on day, as a dict of DAILY_REVENUE_COLUMNS."""
+        raise NotImplementedError
+
+    def business_date(self, conn):
+        raise NotImplementedError
+
+    def due_out(self, conn, day):
+        raise NotImplementedError
+
+    def overdue_bills(self, conn, limit):
+        raise NotImplementedError
+
+    def recent_audits(self, conn, limit):
+        raise NotImplementedError
+
+    def archive_counts(self, conn):
+        """(active, archived) reservation counts."""
+        raise NotImplementedError
+
+
+# -------------------------------------------------------------------
+#  SQLite
+# -------------------------------------------------------------------
+SQLITE_DAILY_REVENUE_SQL = """
+    SELECT ? AS report_date,
+           COUNT(*) AS reservations,
+           TOTAL(total) AS total_revenue,
+           TOTAL(room_charges) AS room_revenue,
+           TOTAL(service_charges) AS service_revenue
+    FROM Billing
+    WHERE payment_status = 'paid' AND payment_date = ?
+"""
+
+RECENT_AUDITS_SQL = "SELECT * FROM NightAudit ORDER BY audit_date DESC LIMIT ?"
+
+
+class SQLiteBackend(Backend):
+    name = 'sqlite'
+    Error = sqlite3.Error
+    features = frozenset(FEATURES)
+
+    def __init__(self, path=DB_PATH, max_idle=16, query_log=None):
+        self.path = path
+        self.pool = ConnectionPool(path, max_idle, query_log)
+        self.snapshot_path = snapshot.snapshot_path(path)
+
+    def connection(self):
+        return self.pool.connection()
+
+    def release(self, conn):
+        self.pool.release(conn)
+
+    def stats(self):
+        return self.pool.stats()
+
+    def close(self):
+        self.pool.close_all()
+
+    def migrate(self):
+        conn = open_connection(self.path)
+        try:
+            migrations.migrate(conn)
+        finally:
+            conn.close()
+
+    data_version = staticmethod(data_version)
+
+    make_reservation = staticmethod(operations.make_reservation)
+    book_group = staticmethod(operations.book_group)
+    book_best_fit = staticmethod(operations.book_best_fit)
+    reassign_rooms = staticmethod(operations.reassign_rooms)
+    check_out = staticmethod(operations.check_out)
+    delete_reservation = staticmethod(operations.delete_reservation)
+    add_service = staticmethod(operations.add_service)
+    post_service_bulk = staticmethod(operations.post_service_bulk)
+    delete_service = staticmethod(operations.delete_service)
+    add_guest = staticmethod(operations.add_guest)
+    update_guest = staticmethod(operations.update_guest)
+    delete_guest = staticmethod(operations.delete_guest)
+    set_rates = staticmethod(operations.set_rates)
+    clear_rates = staticmethod(operations.clear_rates)
+    import_file = staticmethod(imports.import_file)
+    run_night_audit = staticmethod(night_audit.run)
+    archive_settled = staticmethod(archive.archive_settled)
+
+    def refresh_snapshot(self, conn):
+        return snapshot.extract(conn, self.snapshot_path)
+
+    load_catalog = staticmethod(Catalog.load)
+    load_availability = staticmethod(AvailabilityIndex.load)
+    load_rate_calendar = staticmethod(RateCalendar.load)
+    load_occupancy = staticmethod(OccupancyCalendar.load)
+
+    def cached_rows(self, conn, name, params=()):
+        return [dict(row) for row in conn.execute(queries.CACHED_QUERIES[name][0], params)]
+
+    has_guests = staticmethod(guests.has_guests)
+    search_guests = staticmethod(guests.search_guests)
+    guest = staticmethod(guests.get_guest)
+
+    def service_lines(self, conn, reservation_id):
+        return [dict(row) for row in conn.execute(queries.RESERVATION_SERVICE_LINES, (reservation_id,))]
+
+    def checkout_details(self, conn, reservation_id):
+        row = conn.execute(queries.CHECKOUT_DETAILS, (reservation_id,)).fetchone()
+        return dict(row) if row else None
+
+    def in_house(self, conn, day, type_ids=None):
+        return [tuple(row) for row in conn.execute(
+            queries.IN_HOUSE_RESERVATIONS, (day, None if type_ids is None else json.dumps(list(type_ids))))]
+
+    revenue_summary = staticmethod(reports.revenue_summary)
+    revenue_breakdown = staticmethod(reports.revenue_breakdown)
+
+    def report_rows(self, conn, start, end, limit):
+        cursor = conn.execute(queries.REPORT_RESERVATIONS, (start, end))
+        try:
+            return [dict(row) for row in cursor.fetchmany(limit)]
+        finally:
+            cursor.close()
+
+    report_chunks = staticmethod(exports.iter_report_chunks)
+
+    def daily_revenue(self, conn, day):
+        return dict(conn.execute(SQLITE_DAILY_REVENUE_SQL, (day, day)).fetchone())
+
+    business_date = staticmethod(night_audit.business_date)
+
+    def due_out(self, conn, day):
+        return [dict(row) for row in conn.execute(night_audit.DUE_OUT_SQL, (day,))]
+
+    def overdue_bills(self, conn, limit):
+        return [dict(row) for row in conn.execute(night_audit.OVERDUE_SQL, (limit,))]
+
+    def recent_audits(self, conn, limit):
+        return [dict(row) for row in conn.execute(RECENT_AUDITS_SQL, (limit,))]
+
+    archive_counts = staticmethod(archive.counts)
+
+
+# -------------------------------------------------------------------
+#  MySQL – each operation is one InnoDB transaction that locks the Room
+#  rows it books before checking them, so two sessions booking the same
+#  room queue up instead of both passing the overlap check. Deadlocks
+#  and lock-wait timeouts are retried like a busy SQLite database. The
+#  final.sql triggers create and re-sum the bills, and sp_check_in,
+#  sp_check_out and sp_daily_revenue_report are called when the schema
+#  has them. migrate() adds the night-audit tables, the rate calendar,
+#  room locks and the DataVersion counters on top of final.sql, and
+#  gives trg_prevent_overbooking SQLite's half-open date rule; a new
+#  bill is repriced night by night from the calendar, as in SQLite.
+#  The archive (a second SQLite file) and the bulk import (SQLite trigger
+#  deferral) are SQLite-only.
+# -------------------------------------------------------------------
+ER_LOCK_WAIT_TIMEOUT = 1205
+ER_LOCK_DEADLOCK = 1213
+ER_DUP_ENTRY = 1062
+ER_SIGNAL_EXCEPTION = 1644
+RETRY_ERRORS = {ER_LOCK_WAIT_TIMEOUT, ER_LOCK_DEADLOCK}
+
+PROCEDURES_SQL = """
+    SELECT ROUTINE_NAME FROM information_schema.ROUTINES
+    WHERE ROUTINE_SCHEMA = DATABASE() AND ROUTINE_TYPE = 'PROCEDURE'
+"""
+
+# Tables, columns and indexes migrate() adds to final.sql, by name
+MYSQL_TABLES = {
+    'DataVersion': """
+        CREATE TABLE DataVersion (
+            table_name VARCHAR(64) PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        )
+    """,
+    'NightAudit': """
+        CREATE TABLE NightAudit (
+            audit_date DATE PRIMARY KEY,
+            run_at DATETIME NOT NULL,
+            settled INT NOT NULL DEFAULT 0,
+            rooms_occupied INT NOT NULL DEFAULT 0,
+            rooms_changed INT NOT NULL DEFAULT 0,
+            nights_posted INT NOT NULL DEFAULT 0,
+            room_revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+            overdue INT NOT NULL DEFAULT 0
+        )
+    """,
+    'RoomCharge': """
+        CREATE TABLE RoomCharge (
+            reservation_id INT NOT NULL,
+            night DATE NOT NULL,
+            room_no INT NOT NULL,
+            amount DECIMAL(10,2) NOT NULL,
+            PRIMARY KEY (reservation_id, night),
+            INDEX idx_roomcharge_night (night),
+            FOREIGN KEY (reservation_id) REFERENCES Reservation(reservation_id) ON DELETE CASCADE
+        )
+    """,
+    'RateCalendar': """
+        CREATE TABLE RateCalendar (
+            type_id INT NOT NULL,
+            rate_date DATE NOT NULL,
+            price DECIMAL(10,2) NOT NULL,
+            PRIMARY KEY (type_id, rate_date),
+            FOREIGN KEY (type_id) REFERENCES RoomType(type_id)
+        )
+    """,
+}
+
+MYSQL_COLUMNS = {
+    ('Billing', 'overdue_since'): "ALTER TABLE Billing ADD COLUMN overdue_since DATE",
+    ('Reservation', 'room_locked'): "ALTER TABLE Reservation ADD COLUMN room_locked TINYINT NOT NULL DEFAULT 0",
+}
+
+# Run once, right after the column is added (see migration 14)
+MYSQL_COLUMN_BACKFILL = {
+    ('Reservation', 'room_locked'): "UPDATE Reservation SET room_locked = 1 WHERE check_in > CURDATE()",
+}
+
+MYSQL_INDEXES = {
+    ('Reservation', 'idx_reservation_room_dates'): "CREATE INDEX idx_reservation_room_dates ON Reservation (room_no, check_in, check_out)",
+    ('Reservation', 'idx_reservation_check_in'): "CREATE INDEX idx_reservation_check_in ON Reservation (check_in)",
+    ('Reservation', 'idx_reservation_check_out'): "CREATE INDEX idx_reservation_check_out ON Reservation (check_out)",
+}
+
+# DataVersion counters, as in SQLite migrations 5, 9 and 10. A foreign
+# key cascade fires no triggers in MySQL, so a delete also bumps the
+# tables it cascades into. The counter rows stay locked until commit,
+# so writers of one table queue on them briefly.
+MYSQL_VERSIONED_TABLES = ['Guest', 'Room', 'RoomType', 'Services', 'Reservation', 'Billing', 'ReservationServices',
+                          'RateCalendar']
+MYSQL_CASCADES = {
+    'Guest': ['Reservation', 'Billing', 'ReservationServices'],
+    'Reservation': ['Billing', 'ReservationServices'],
+}
+MYSQL_CATALOG_TABLES = {'Room', 'RoomType', 'Services'}
+# Room edits that change the catalog; room_status churn does not
+ROOM_CATALOG_CHANGE = "NOT (NEW.room_no <=> OLD.room_no AND NEW.type_id <=> OLD.type_id " \
+                      "AND NEW.room_capacity <=> OLD.room_capacity)"
+
+def _bump(tables):
+    names = ', '.join(f"'{table}'" for table in tables)
+    return f"UPDATE DataVersion SET version = version + 1 WHERE table_name IN ({names});"
+
+def mysql_version_triggers():
+    """name -> CREATE TRIGGER statement for every DataVersion trigger."""
+    triggers = {}
+    for table in MYSQL_VERSIONED_TABLES:
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            tables = [table] + (MYSQL_CASCADES.get(table, []) if event == 'DELETE' else [])
+            body = _bump(tables)
+            if table == 'Room' and event == 'UPDATE':
+                body += f"\n    IF {ROOM_CATALOG_CHANGE} THEN {_bump(['Catalog'])} END IF;"
+            elif table in MYSQL_CATALOG_TABLES:
+                body += '\n    ' + _bump(['Catalog'])
+            name = f"trg_version_{table.lower()}_{event.lower()}"
+            triggers[name] = f"""
+                CREATE TRIGGER {name}
+                AFTER {event} ON {table}
+                FOR EACH ROW
+                BEGIN
+                    {body}
+                END
+            """
+    return triggers
+
+# final.sql's trg_prevent_overbooking compares the dates with BETWEEN, so
+# it refuses a stay arriving on the day another one leaves, which SQLite
+# (RoomNight) accepts. migrate() replaces it by this half-open check,
+# same name and message.
+MYSQL_OVERBOOKING_TRIGGER = """
+    CREATE TRIGGER trg_prevent_overbooking
+    BEFORE INSERT ON Reservation
+    FOR EACH ROW
+    BEGIN
+        IF EXISTS (SELECT 1 FROM Reservation r
+                   WHERE r.room_no = NEW.room_no AND r.check_in < NEW.check_out AND r.check_out > NEW.check_in) THEN
+            SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Room is already booked for selected dates';
+        END IF;
+    END
+"""
+
+# Same rule as night_audit.ROOM_STATUS: occupied while an unpaid stay
+# holds the night
+MYSQL_ROOM_STATUS = """
+    CASE WHEN EXISTS (
+        SELECT 1 FROM Reservation r
+        JOIN Billing b ON b.reservation_id = r.reservation_id
+        WHERE r.room_no = Room.room_no AND r.check_in <= {day} AND r.check_out > {day}
+          AND b.payment_status != 'paid'
+    ) THEN 'occupied' ELSE 'vacant' END
+"""
+
+MYSQL_ROOM_STATUS_SQL = f"""
+    UPDATE Room SET room_status = {MYSQL_ROOM_STATUS.format(day='CURDATE()')}
+    WHERE room_status != 'maintenance' AND room_no IN ({{rooms}})
+"""
+
+MYSQL_AUDIT_ROOM_STATUS_SQL = f"""
+    UPDATE Room SET room_status = {MYSQL_ROOM_STATUS.format(day='%(day)s')}
+    WHERE room_status != 'maintenance' AND room_status != {MYSQL_ROOM_STATUS.format(day='%(day)s')}
+"""
+
+# rates.STAY_PRICE_SQL for new bills: trg_create_bill charges base_price
+# for every night (plus 10% tax), so the calendar's differences are
+# added here, in the booking's transaction
+MYSQL_PRICE_BILLS_SQL = """
+    UPDATE Billing b
+    JOIN (
+        SELECT r.reservation_id,
+               ROUND(rt.base_price * DATEDIFF(r.check_out, r.check_in)
+                     + COALESCE((SELECT SUM(rc.price - rt.base_price) FROM RateCalendar rc
+                                 WHERE rc.type_id = rt.type_id AND rc.rate_date >= r.check_in
+                                   AND rc.rate_date < r.check_out), 0), 2) AS charges
+        FROM Reservation r
+        JOIN Room rm ON rm.room_no = r.room_no
+        JOIN RoomType rt ON rt.type_id = rm.type_id
+        WHERE r.reservation_id IN ({ids})
+    ) p ON p.reservation_id = b.reservation_id
+    SET b.room_charges = p.charges, b.tax_amount = ROUND(p.charges * 0.1, 2)
+"""
+
+MYSQL_SET_RATES_SQL = """
+    INSERT INTO RateCalendar (type_id, rate_date, price) VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE price = VALUES(price)
+"""
+
+# Room assignment (assignment.plan_stays): the rows of its SQLite queries,
+# locked so no booking lands in between the plan and the moves
+MYSQL_ASSIGN_ROOMS_SQL = assignment.ROOMS_SQL + "FOR UPDATE"
+
+MYSQL_ASSIGN_IN_HOUSE_SQL = """
+    SELECT room_no, MAX(check_out) AS free_from
+    FROM Reservation
+    WHERE check_out > %(today)s AND check_in <= %(today)s
+    GROUP BY room_no
+"""
+
+MYSQL_FUTURE_STAYS_SQL = """
+    SELECT r.reservation_id, r.room_no, rm.type_id, r.check_in, r.check_out,
+           COALESCE(r.adults, 0) + COALESCE(r.children, 0) AS guests, r.room_locked
+    FROM Reservation r
+    JOIN Room rm ON rm.room_no = r.room_no
+    WHERE r.check_in > %(today)s AND rm.room_status != 'maintenance'
+    FOR UPDATE
+"""
+
+# queries.BEST_FIT_ROOMS without RoomNight
+MYSQL_BEST_FIT_ROOMS_SQL = """
+    SELECT rm.room_no, COALESCE(rm.room_capacity, 0) AS room_capacity,
+           (SELECT DATE_SUB(MAX(r.check_out), INTERVAL 1 DAY) FROM Reservation r
+            WHERE r.room_no = rm.room_no AND r.check_out <= %(check_in)s) AS last_night,
+           (SELECT MIN(r.check_in) FROM Reservation r
+            WHERE r.room_no = rm.room_no AND r.check_in >= %(check_out)s) AS next_night
+    FROM Room rm
+    WHERE rm.type_id = %(type_id)s AND COALESCE(rm.room_capacity, 0) >= %(guests)s
+      AND rm.room_status != 'maintenance'
+      AND NOT EXISTS (
+          SELECT 1 FROM Reservation r
+          WHERE r.room_no = rm.room_no AND r.check_in < %(check_out)s AND r.check_out > %(check_in)s
+      )
+    ORDER BY rm.room_no
+    FOR UPDATE
+"""
+
+MYSQL_DAILY_REVENUE_SQL = """
+    SELECT %s AS report_date,
+           COUNT(r.reservation_id) AS reservations,
+           SUM(b.total) AS total_revenue,
+           SUM(b.room_charges) AS room_revenue,
+           SUM(b.service_charges) AS service_revenue
+    FROM Billing b
+    JOIN Reservation r ON b.reservation_id = r.reservation_id
+    WHERE DATE(b.payment_date) = %s AND b.payment_status = 'paid'
+"""
+
+# Unpaid stays holding a night, as queries.IN_HOUSE_RESERVATIONS
+MYSQL_IN_HOUSE_SQL = """
+    SELECT r.reservation_id, r.room_no
+    FROM Reservation r
+    JOIN Billing b ON b.reservation_id = r.reservation_id
+    JOIN Room rm ON rm.room_no = r.room_no
+    WHERE r.check_in <= %s AND r.check_out > %s AND b.payment_status = 'pending' {type_filter}
+    ORDER BY r.reservation_id
+"""
+
+MYSQL_CACHED_QUERIES = {
+    'CURRENT_RESERVATIONS': """
+        SELECT r.reservation_id, g.guest_Fname, g.guest_Lname,
+               r.room_no, r.check_in, r.check_out, b.payment_status
+        FROM Reservation r
+        JOIN Guest g ON r.guest_id = g.guest_id
+        JOIN Billing b ON r.reservation_id = b.reservation_id
+        WHERE r.check_out >= CURDATE()
+        ORDER BY r.check_in
+    """,
+    'ACTIVE_RESERVATIONS': """
+        SELECT r.reservation_id, g.guest_Fname, g.guest_Lname, r.room_no
+        FROM Reservation r
+        JOIN Guest g ON r.guest_id = g.guest_id
+        WHERE r.check_out >= CURDATE()
+    """,
+    'ACTIVE_RESERVATIONS_WITH_SERVICES': """
+        SELECT r.reservation_id, g.guest_Fname, g.guest_Lname, r.room_no
+        FROM Reservation r
+        JOIN Guest g ON r.guest_id = g.guest_id
+        WHERE r.check_out >= CURDATE()
+        AND EXISTS (SELECT 1 FROM ReservationServices rs WHERE rs.reservation_id = r.reservation_id)
+    """,
+    'CHECKOUT_RESERVATIONS': """
+        SELECT r.reservation_id, r.room_no, g.guest_Fname, g.guest_Lname,
+               b.total AS estimated_total, b.payment_status
+        FROM Reservation r
+        JOIN Guest g ON r.guest_id = g.guest_id
+        JOIN Billing b ON r.reservation_id = b.reservation_id
+        WHERE r.check_out <= CURDATE()
+        AND b.payment_status = 'pending'
+    """,
+    'DELETABLE_RESERVATIONS': """
+        SELECT r.reservation_id, g.guest_Fname, g.guest_Lname,
+               r.room_no, r.check_in, r.check_out, b.payment_status
+        FROM Reservation r
+        JOIN Guest g ON r.guest_id = g.guest_id
+        JOIN Billing b ON r.reservation_id = b.reservation_id
+        WHERE r.check_out >= CURDATE() AND b.payment_status = 'pending'
+        ORDER BY r.check_in
+    """,
+}
+
+# No full-text index here: every word of the search must begin one of
+# the searched columns
+MYSQL_GUEST_PAGE_SQL = """
+    SELECT * FROM Guest
+    WHERE (guest_Lname, guest_Fname, guest_id) > (%s, %s, %s) {match}
+    ORDER BY guest_Lname, guest_Fname, guest_id
+    LIMIT %s
+"""
+GUEST_SEARCH_COLUMNS = migrations.GUEST_SEARCH_COLUMNS.split(', ')
+
+# Reports read the bills directly; there is no DailyRevenue rollup here
+MYSQL_SUMMARY_SQL = """
+    SELECT COALESCE(SUM(b.total), 0) AS total_revenue,
+           COALESCE(SUM(b.room_charges), 0) AS room_revenue,
+           COALESCE(SUM(b.service_charges), 0) AS service_revenue,
+           COUNT(*) AS reservations,
+           CAST(COALESCE(SUM(b.payment_status = 'paid'), 0) AS SIGNED) AS paid_count,
+           CAST(COALESCE(SUM(b.payment_status = 'pending'), 0) AS SIGNED) AS pending_count
+    FROM Reservation r
+    JOIN Billing b ON b.reservation_id = r.reservation_id
+    WHERE r.check_in BETWEEN %s AND %s
+"""
+
+MYSQL_BREAKDOWN_SQL = """
+    SELECT rt.type_name AS room_type,
+           COALESCE(NULLIF(b.payment_method, ''), 'Unpaid') AS payment_method,
+           COUNT(*) AS reservations,
+           ROUND(SUM(b.room_charges), 2) AS room_revenue,
+           ROUND(SUM(b.service_charges), 2) AS service_revenue,
+           ROUND(SUM(b.total), 2) AS total_revenue
+    FROM Reservation r
+    JOIN Billing b ON b.reservation_id = r.reservation_id
+    JOIN Room rm ON rm.room_no = r.room_no
+    JOIN RoomType rt ON rt.type_id = rm.type_id
+    WHERE r.check_in BETWEEN %s AND %s
+    GROUP BY rt.type_name, COALESCE(NULLIF(b.payment_method, ''), 'Unpaid')
+    ORDER BY room_type, payment_method
+"""
+
+MYSQL_REPORT_SQL = """
+    SELECT r.reservation_id, g.guest_Fname, g.guest_Lname, rm.room_no, rt.type_name,
+           b.room_charges, b.service_charges, b.total, b.payment_status, b.payment_method,
+           r.check_in, r.check_out
+    FROM Reservation r
+    JOIN Guest g ON r.guest_id = g.guest_id
+    JOIN Room rm ON r.room_no = rm.room_no
+    JOIN RoomType rt ON rm.type_id = rt.type_id
+    JOIN Billing b ON r.reservation_id = b.reservation_id
+    WHERE r.check_in BETWEEN %s AND %s
+    ORDER BY r.check_in
+"""
+
+# Night audit, as night_audit.py; the nights to post are a derived table
+# of dates, since there is no RoomNight ledger here
+MYSQL_SETTLE_SQL = """
+    UPDATE Billing
+    SET payment_status = 'paid', payment_method = %s, payment_date = %s, overdue_since = NULL
+    WHERE payment_status = 'pending' AND reservation_id IN ({ids})
+"""
+
+MYSQL_POST_CHARGES_SQL = """
+    INSERT IGNORE INTO RoomCharge (reservation_id, night, room_no, amount)
+    SELECT r.reservation_id, n.night, r.room_no,
+           ROUND(b.room_charges / DATEDIFF(r.check_out, r.check_in), 2)
+    FROM ({nights}) n
+    JOIN Reservation r ON r.check_in <= n.night AND r.check_out > n.night
+    JOIN Billing b ON b.reservation_id = r.reservation_id
+"""
+
+MYSQL_FLAG_OVERDUE_SQL = """
+    UPDATE Billing b
+    JOIN Reservation r ON r.reservation_id = b.reservation_id
+    SET b.overdue_since = %s
+    WHERE b.payment_status = 'pending' AND b.overdue_since IS NULL AND r.check_out < %s
+"""
+
+MYSQL_LOG_AUDIT_SQL = """
+    REPLACE INTO NightAudit (audit_date, run_at, settled, rooms_occupied, rooms_changed,
+                             nights_posted, room_revenue, overdue)
+    VALUES (%(audit_date)s, NOW(), %(settled)s, %(rooms_occupied)s, %(rooms_changed)s,
+            %(nights_posted)s, %(room_revenue)s, %(overdue)s)
+"""
+
+# Revenue snapshot facts, as snapshot.FACTS_SQL
+MYSQL_PAID_IDS_SQL = "SELECT reservation_id FROM Billing WHERE payment_status = 'paid'"
+
+MYSQL_FACTS_SQL = """
+    SELECT r.reservation_id, r.check_in, DATEDIFF(r.check_out, r.check_in),
+           rt.type_name, COALESCE(b.payment_method, ''),
+           b.room_charges, b.service_charges, b.total
+    FROM Reservation r
+    JOIN Billing b ON b.reservation_id = r.reservation_id
+    JOIN Room rm ON rm.room_no = r.room_no
+    JOIN RoomType rt ON rt.type_id = rm.type_id
+    WHERE r.reservation_id IN ({ids})
+"""
+
+
+def _mysql(sql):
+    # Page SQL that both databases accept, with mysql.connector's placeholders
+    return sql.replace('?', '%s')
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+def _plain(value):
+    # DATE and DECIMAL columns arrive as date and Decimal; the pages and
+    # the in-memory indexes take ISO strings and floats, as from SQLite
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+def _rows(conn, sql, params=(), dictionary=True):
+    cursor = conn.cursor(dictionary=dictionary, buffered=True)
+    try:
+        cursor.execute(sql, params)
+        if dictionary:
+            return [{key: _plain(value) for key, value in row.items()} for row in cursor.fetchall()]
+        return [tuple(_plain(value) for value in row) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+def _instrumented(connect, query_log):
+    return InstrumentedMySQLConnection(connect(), query_log)
+
+def _drain(cursor):
+    # A CALL leaves its result sets on the connection until they are read
+    return [result.fetchall() for result in cursor.stored_results()]
+
+def _refresh_rooms(cursor, room_nos):
+    if room_nos:
+        cursor.execute(MYSQL_ROOM_STATUS_SQL.format(rooms=_placeholders(room_nos)), tuple(room_nos))
+
+def _price_bills(cursor, reservation_ids):
+    cursor.execute(MYSQL_PRICE_BILLS_SQL.format(ids=_placeholders(reservation_ids)), tuple(reservation_ids))
+
+def read_mysql_facts(conn, known):
+    """snapshot.extract reader for a MySQL connection."""
+    paid = np.array([row[0] for row in _rows(conn, MYSQL_PAID_IDS_SQL, dictionary=False)], dtype=np.int64)
+    new = np.setdiff1d(paid, known).tolist()
+    facts = []
+    for chunk in range(0, len(new), snapshot.FETCH_CHUNK):
+        ids = new[chunk:chunk + snapshot.FETCH_CHUNK]
+        facts.extend(_rows(conn, MYSQL_FACTS_SQL.format(ids=_placeholders(ids)), ids, dictionary=False))
+    return facts
+
+def run_script(conn, text):
+    """Run a mysql client script such as final.sql, DELIMITER blocks included."""
+    cursor = conn.cursor()
+    delimiter, statement = ';', []
+    try:
+        for line in text.splitlines():
+            stripped = line.strip()
+            if stripped.upper().startswith('DELIMITER '):
+                delimiter = stripped.split()[1]
+                continue
+            if stripped.startswith('--') or not (statement or stripped):
+                continue
+            # a '-- comment' may follow the delimiter that ends a statement
+            line = re.sub(r'\s+--\s.*$', '', line).rstrip()
+            statement.append(line)
+            if line.endswith(delimiter):
+                cursor.execute('\n'.join(statement)[:-len(delimiter)])
+                if cursor.with_rows:
+                    cursor.fetchall()
+                statement = []
+    finally:
+        cursor.close()
+
+def mysql_transactional(operation):
+    @functools.wraps(operation)
+    def run(self, conn, *args, **kwargs):
+        for attempt in range(RETRIES + 1):
+            try:
+                conn.start_transaction()
+                try:
+                    cursor = conn.cursor(dictionary=True, buffered=True)
+                    result = operation(self, cursor, *args, **kwargs)
+                    conn.commit()
+                    return result
+                except BaseException:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    raise
+            except mysql.connector.Error as e:
+                if e.errno == ER_SIGNAL_EXCEPTION:
+                    # A final.sql trigger or procedure refused the write
+                    raise OperationError(e.msg) from e
+                if e.errno not in RETRY_ERRORS or attempt == RETRIES:
+                    raise
+                time.sleep(BACKOFF_SECONDS * 2 ** attempt * random.uniform(0.5, 1.5))
+    return run
+
+
+class MySQLBackend(Backend):
+    name = 'mysql'
+    Error = mysql.connector.Error if MYSQL_AVAILABLE else ()
+    features = frozenset(['rates', 'assignment'])
+
+    def __init__(self, pool_size=POOL_SIZE, snapshot_path=None, query_log=None, **config):
+        if not MYSQL_AVAILABLE:
+            raise RuntimeError("The MySQL backend needs mysql-connector-python")
+        connect = functools.partial(mysql.connector.connect, autocommit=True, **config)
+        if query_log is not None:
+            connect = functools.partial(_instrumented, connect, query_log)
+        self.pool = ConnectionPool(max_idle=pool_size, connect=connect)
+        self.snapshot_path = snapshot_path or snapshot.snapshot_path(config.get('database', 'mysql'))
+        conn = self.connection()
+        try:
+            self.procedures = {row[0] for row in _rows(conn, PROCEDURES_SQL, dictionary=False)}
+        finally:
+            self.release(conn)
+
+    def connection(self):
+        conn = self.pool.connection()
+        conn.ping(reconnect=True)    # an idle connection may have timed out server-side
+        return conn
+
+    def release(self, conn):
+        self.pool.release(conn)
+
+    def stats(self):
+        return self.pool.stats()
+
+    def close(self):
+        self.pool.close_all()
+
+    def migrate(self):
+        conn = self.connection()
+        cursor = conn.cursor()
+        try:
+            def names(sql):
+                cursor.execute(sql)
+                return {tuple(value.lower() for value in row) for row in cursor.fetchall()}
+
+            tables = names("SELECT TABLE_NAME FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE()")
+            for table, sql in MYSQL_TABLES.items():
+                if (table.lower(),) not in tables:
+                    cursor.execute(sql)
+            columns = names("SELECT TABLE_NAME, COLUMN_NAME FROM information_schema.COLUMNS "
+                            "WHERE TABLE_SCHEMA = DATABASE()")
+            for (table, column), sql in MYSQL_COLUMNS.items():
+                if (table.lower(), column.lower()) not in columns:
+                    cursor.execute(sql)
+                    if (table, column) in MYSQL_COLUMN_BACKFILL:
+                        cursor.execute(MYSQL_COLUMN_BACKFILL[table, column])
+            indexes = names("SELECT TABLE_NAME, INDEX_NAME FROM information_schema.STATISTICS "
+                            "WHERE TABLE_SCHEMA = DATABASE()")
+            for (table, index), sql in MYSQL_INDEXES.items():
+                if (table.lower(), index.lower()) not in indexes:
+                    cursor.execute(sql)
+            cursor.executemany("INSERT IGNORE INTO DataVersion (table_name, version) VALUES (%s, 0)",
+                               [(table,) for table in MYSQL_VERSIONED_TABLES + ['Catalog']])
+            triggers = names("SELECT TRIGGER_NAME FROM information_schema.TRIGGERS WHERE TRIGGER_SCHEMA = DATABASE()")
+            for trigger, sql in mysql_version_triggers().items():
+                if (trigger.lower(),) not in triggers:
+                    cursor.execute(sql)
+            cursor.execute("SELECT ACTION_STATEMENT FROM information_schema.TRIGGERS "
+                           "WHERE TRIGGER_SCHEMA = DATABASE() AND TRIGGER_NAME = 'trg_prevent_overbooking'")
+            if any('BETWEEN' in row[0].upper() for row in cursor.fetchall()):
+                cursor.execute("DROP TRIGGER trg_prevent_overbooking")
+                cursor.execute(MYSQL_OVERBOOKING_TRIGGER)
+        finally:
+            cursor.close()
+            self.release(conn)
+
+    def data_version(self, conn, tables):
+        rows = dict(_rows(conn, f"SELECT table_name, version FROM DataVersion WHERE table_name IN "
+                                f"({_placeholders(tables)})", tuple(tables), dictionary=False))
+        return tuple(rows.get(table, 0) for table in tables)
+
+    # ---------------------------------------------------------------
+    #  Reservations
+    # ---------------------------------------------------------------
+    @mysql_transactional
+    def make_reservation(self, cursor, guest_id, room_no, check_in, check_out, adults, children):
+        if check_out <= check_in:
+            raise OperationError("Check-out date must be after check-in date.")
+        cursor.execute("SELECT room_no FROM Room WHERE room_no = %s FOR UPDATE", (room_no,))
+        if cursor.fetchone() is None:
+            raise OperationError(f"Room {room_no} no longer exists.")
+        # The clerk chose the room, so reassign_rooms never moves the stay
+        return self._book(cursor, guest_id, room_no, check_in, check_out, adults, children, room_locked=1)
+
+    @mysql_transactional
+    def book_best_fit(self, cursor, guest_id, type_id, check_in, check_out, adults, children):
+        if check_out <= check_in:
+            raise OperationError("Check-out date must be after check-in date.")
+        cursor.execute(MYSQL_BEST_FIT_ROOMS_SQL, {'type_id': type_id, 'guests': adults + children,
+                                                  'check_in': check_in, 'check_out': check_out})
+        room_no = assignment.pick_room(cursor.fetchall(), check_in, check_out, date.today().isoformat())
+        if room_no is None:
+            raise OperationError("No room of this type is free for the selected dates.")
+        return self._book(cursor, guest_id, room_no, check_in, check_out, adults, children), room_no
+
+    def _book(self, cursor, guest_id, room_no, check_in, check_out, adults, children, room_locked=0):
+        cursor.execute("""
+            SELECT 1 FROM Reservation
+            WHERE room_no = %s AND check_in < %s AND check_out > %s
+            LIMIT 1 FOR UPDATE
+        """, (room_no, check_out, check_in))
+        if cursor.fetchall():
+            raise OperationError("Room is already booked for the selected dates.")
+
+        # sp_check_in refuses a room that is not vacant – e.g. on the day
+        # its previous guest leaves – which the plain INSERT accepts
+        cursor.execute("SELECT room_status FROM Room WHERE room_no = %s", (room_no,))
+        vacant = cursor.fetchone()['room_status'] == 'vacant'
+        if 'sp_check_in' in self.procedures and check_in == date.today().isoformat() and vacant:
+            cursor.callproc('sp_check_in', (guest_id, room_no, check_in, check_out, adults, children))
+            _drain(cursor)
+        else:
+            cursor.execute("""
+                INSERT INTO Reservation (reservation_date, guest_id, room_no, check_in, check_out, adults, children)
+                VALUES (CURDATE(), %s, %s, %s, %s, %s, %s)
+            """, (guest_id, room_no, check_in, check_out, adults, children))
+        cursor.execute("SELECT LAST_INSERT_ID() AS reservation_id")
+        reservation_id = cursor.fetchone()['reservation_id']
+        if room_locked:
+            cursor.execute("UPDATE Reservation SET room_locked = 1 WHERE reservation_id = %s", (reservation_id,))
+        _price_bills(cursor, [reservation_id])
+        _refresh_rooms(cursor, [room_no])
+        return reservation_id
+
+    @mysql_transactional
+    def reassign_rooms(self, cursor, type_ids=None):
+        started = time.perf_counter()
+        today = date.today().isoformat()
+        cursor.execute(MYSQL_ASSIGN_ROOMS_SQL)
+        rooms = cursor.fetchall()
+        cursor.execute(MYSQL_ASSIGN_IN_HOUSE_SQL, {'today': today})
+        in_house = [(row['room_no'], row['free_from']) for row in cursor.fetchall()]
+        cursor.execute(MYSQL_FUTURE_STAYS_SQL, {'today': today})
+        moves, summary = assignment.plan_stays(rooms, in_house, cursor.fetchall(), today, type_ids)
+        # No RoomNight here: stays can swap rooms one update at a time
+        if moves:
+            cursor.executemany("UPDATE Reservation SET room_no = %s WHERE reservation_id = %s",
+                               [(room_no, reservation_id) for reservation_id, room_no in moves])
+        summary['ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return summary
+
+    @mysql_transactional
+    def book_group(self, cursor, guest_id, room_mix, check_in, check_out, adults, children):
+        room_mix = {type_id: count for type_id, count in room_mix.items() if count > 0}
+        if not room_mix:
+            raise OperationError("Choose at least one room.")
+        if check_out <= check_in:
+            raise OperationError("Check-out date must be after check-in date.")
+
+        type_ids = list(room_mix)
+        cursor.execute(f"""
+            SELECT room_no, type_id FROM Room
+            WHERE type_id IN ({_placeholders(type_ids)}) AND room_capacity >= %s
+            ORDER BY type_id, room_no FOR UPDATE
+        """, (*type_ids, adults + children))
+        candidates = cursor.fetchall()
+        busy = set()
+        if candidates:
+            room_nos = [row['room_no'] for row in candidates]
+            cursor.execute(f"""
+                SELECT DISTINCT room_no FROM Reservation
+                WHERE room_no IN ({_placeholders(room_nos)}) AND check_in < %s AND check_out > %s
+                FOR UPDATE
+            """, (*room_nos, check_out, check_in))
+            busy = {row['room_no'] for row in cursor.fetchall()}
+        free = {}
+        for row in candidates:
+            if row['room_no'] not in busy:
+                free.setdefault(row['type_id'], []).append(row['room_no'])
+        short = {type_id: count - len(free.get(type_id, [])) for type_id, count in room_mix.items()
+                 if len(free.get(type_id, [])) < count}
+        if short:
+            cursor.execute("SELECT type_id, type_name FROM RoomType")
+            names = {row['type_id']: row['type_name'] for row in cursor.fetchall()}
+            raise OperationError("Not enough rooms free for the selected dates: " + ', '.join(
+                f"{missing} more {names.get(type_id, type_id)}" for type_id, missing in short.items()))
+        room_nos = [room_no for type_id, count in room_mix.items() for room_no in free[type_id][:count]]
+
+        # mysql.connector sends an executemany INSERT as one multi-row statement
+        cursor.executemany("""
+            INSERT INTO Reservation (reservation_date, guest_id, room_no, check_in, check_out, adults, children)
+            VALUES (CURDATE(), %s, %s, %s, %s, %s, %s)
+        """, [(guest_id, room_no, check_in, check_out, adults, children) for room_no in room_nos])
+        # The rooms are locked and were free, so these stays are ours
+        cursor.execute(f"""
+            SELECT reservation_id, room_no FROM Reservation
+            WHERE room_no IN ({_placeholders(room_nos)}) AND check_in = %s AND check_out = %s
+            ORDER BY reservation_id
+        """, (*room_nos, check_in, check_out))
+        booked = [(row['reservation_id'], row['room_no']) for row in cursor.fetchall()]
+        _price_bills(cursor, [reservation_id for reservation_id, _ in booked])
+        _refresh_rooms(cursor, room_nos)
+        return booked
+
+    @mysql_transactional
+    def check_out(self, cursor, reservation_id, payment_method):
+        cursor.execute("""
+            SELECT r.room_no, b.payment_status
+            FROM Reservation r
+            JOIN Billing b ON b.reservation_id = r.reservation_id
+            WHERE r.reservation_id = %s
+            FOR UPDATE
+        """, (reservation_id,))
+        row = cursor.fetchone()
+        if row is None:
+            raise OperationError(f"Reservation #{reservation_id} no longer exists.")
+        if row['payment_status'] != 'pending':
+            raise OperationError(f"Reservation #{reservation_id} has already been checked out.")
+        if 'sp_check_out' in self.procedures:
+            cursor.callproc('sp_check_out', (reservation_id, payment_method))
+            _drain(cursor)
+        else:
+            cursor.execute("""
+                UPDATE Billing
+                SET payment_status = 'paid', payment_method = %s, payment_date = NOW()
+                WHERE reservation_id = %s
+            """, (payment_method, reservation_id))
+        _refresh_rooms(cursor, [row['room_no']])
+        return row['room_no']
+
+    @mysql_transactional
+    def delete_reservation(self, cursor, reservation_id):
+        cursor.execute("""
+            SELECT r.room_no, b.payment_status,
+                   (SELECT COUNT(*) FROM ReservationServices rs WHERE rs.reservation_id = r.reservation_id) AS services
+            FROM Reservation r
+            LEFT JOIN Billing b ON b.reservation_id = r.reservation_id
+            WHERE r.reservation_id = %s
+            FOR UPDATE
+        """, (reservation_id,))
+        row = cursor.fetchone()
+        if row is None:
+            raise OperationError(f"Reservation #{reservation_id} no longer exists.")
+        if row['services'] > 0:
+            raise OperationError("Cannot delete reservation with associated services. "
+                                 "Use the 'Delete Services' page to remove services first.")
+        if row['payment_status'] == 'paid':
+            raise OperationError(f"Reservation #{reservation_id} has been paid and cannot be deleted.")
+        # Billing goes with it (ON DELETE CASCADE in final.sql)
+        cursor.execute("DELETE FROM Reservation WHERE reservation_id = %s", (reservation_id,))
+        _refresh_rooms(cursor, [row['room_no']])
+
+    # ---------------------------------------------------------------
+    #  Service postings – final.sql's triggers re-sum the bill
+    # ---------------------------------------------------------------
+    @mysql_transactional
+    def add_service(self, cursor, reservation_id, service_id, quantity, service_date):
+        cursor.execute("SELECT 1 FROM Reservation WHERE reservation_id = %s", (reservation_id,))
+        if not cursor.fetchall():
+            raise OperationError(f"Reservation #{reservation_id} no longer exists.")
+        cursor.execute("""
+            INSERT INTO ReservationServices (reservation_id, service_id, quantity, service_date)
+            VALUES (%s, %s, %s, %s)
+        """, (reservation_id, service_id, quantity, service_date))
+        return cursor.lastrowid
+
+    @mysql_transactional
+    def post_service_bulk(self, cursor, service_id, quantity, service_date, type_ids=None, reservation_ids=None):
+        cursor.execute("SELECT 1 FROM Services WHERE service_id = %s", (service_id,))
+        if not cursor.fetchall():
+            raise OperationError("This service no longer exists.")
+        if reservation_ids is not None:
+            reservation_ids = list(reservation_ids) or [None]
+            cursor.execute(f"""
+                SELECT reservation_id FROM Billing
+                WHERE payment_status = 'pending' AND reservation_id IN ({_placeholders(reservation_ids)})
+                ORDER BY reservation_id
+            """, tuple(reservation_ids))
+        else:
+            type_filter, params = self._type_filter(type_ids)
+            cursor.execute(MYSQL_IN_HOUSE_SQL.format(type_filter=type_filter),
+                           (service_date, service_date, *params))
+        targets = [row['reservation_id'] for row in cursor.fetchall()]
+        if not targets:
+            raise OperationError("No unpaid reservations match the selection.")
+        cursor.executemany("""
+            INSERT INTO ReservationServices (reservation_id, service_id, quantity, service_date)
+            VALUES (%s, %s, %s, %s)
+        """, [(reservation_id, service_id, quantity, service_date) for reservation_id in targets])
+        return targets
+
+    @mysql_transactional
+    def delete_service(self, cursor, res_service_id):
+        cursor.execute("DELETE FROM ReservationServices WHERE res_service_id = %s", (res_service_id,))
+        if not cursor.rowcount:
+            raise OperationError(f"Service line {res_service_id} has already been removed.")
+
+    @staticmethod
+    def _type_filter(type_ids):
+        if type_ids is None:
+            return '', []
+        type_ids = list(type_ids) or [None]
+        return f"AND rm.type_id IN ({_placeholders(type_ids)})", type_ids
+
+    # ---------------------------------------------------------------
+    #  Rate calendar – same rules and messages as operations.set_rates
+    # ---------------------------------------------------------------
+    @mysql_transactional
+    def set_rates(self, cursor, type_id, start, end, price, weekdays=None):
+        if end < start:
+            raise OperationError("End date must be on or after start date.")
+        if price < 0:
+            raise OperationError("Price cannot be negative.")
+        if weekdays is not None and not weekdays:
+            raise OperationError("Choose at least one weekday.")
+        cursor.execute("SELECT 1 FROM RoomType WHERE type_id = %s", (type_id,))
+        if not cursor.fetchall():
+            raise OperationError("This room type no longer exists.")
+        first = date.fromisoformat(start)
+        nights = [first + timedelta(days=i) for i in range((date.fromisoformat(end) - first).days + 1)]
+        # strftime('%w') numbering: 0 = Sunday
+        nights = [night for night in nights if weekdays is None or (night.weekday() + 1) % 7 in weekdays]
+        if nights:
+            cursor.executemany(MYSQL_SET_RATES_SQL, [(type_id, night, price) for night in nights])
+        return len(nights)
+
+    @mysql_transactional
+    def clear_rates(self, cursor, type_id, start, end):
+        cursor.execute("DELETE FROM RateCalendar WHERE type_id = %s AND rate_date BETWEEN %s AND %s",
+                       (type_id, start, end))
+        return cursor.rowcount
+
+    # ---------------------------------------------------------------
+    #  Guests
+    # ---------------------------------------------------------------
+    @mysql_transactional
+    def add_guest(self, cursor, fname, lname, email, cnic, age, gender, city):
+        try:
+            cursor.execute("""
+                INSERT INTO Guest (guest_Fname, guest_Lname, guest_email, CNIC, age, gender, City)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, (fname, lname, email, cnic, age, gender, city))
+        except mysql.connector.IntegrityError as e:
+            if e.errno == ER_DUP_ENTRY:
+                raise OperationError("A guest with this CNIC or email already exists.") from e
+            raise
+        return cursor.lastrowid
+
+    @mysql_transactional
+    def update_guest(self, cursor, guest_id, fname, lname, email, cnic, city):
+        cursor.execute("SELECT 1 FROM Guest WHERE guest_id = %s FOR UPDATE", (guest_id,))
+        if not cursor.fetchall():
+            raise OperationError("Guest not found.")
+        try:
+            cursor.execute("""
+                UPDATE Guest
+                SET guest_Fname=%s, guest_Lname=%s, guest_email=%s, CNIC=%s, City=%s
+                WHERE guest_id = %s
+            """, (fname, lname, email, cnic, city, guest_id))
+        except mysql.connector.IntegrityError as e:
+            if e.errno == ER_DUP_ENTRY:
+                raise OperationError("A guest with this CNIC or email already exists.") from e
+            raise
+
+    @mysql_transactional
+    def delete_guest(self, cursor, guest_id):
+        cursor.execute("""
+            SELECT COUNT(*) AS reservations, COALESCE(SUM(check_out >= CURDATE()), 0) AS active
+            FROM Reservation WHERE guest_id = %s
+        """, (guest_id,))
+        row = cursor.fetchone()
+        if row['active'] > 0:
+            raise OperationError("Cannot delete guest with active reservations.")
+        # final.sql cascades guest deletes into Reservation; keep the history
+        if row['reservations'] > 0:
+            raise OperationError("Cannot delete a guest who still has reservations on record.")
+        cursor.execute("DELETE FROM Guest WHERE guest_id = %s", (guest_id,))
+
+    def has_guests(self, conn):
+        return bool(_rows(conn, guests.HAS_GUESTS_SQL, dictionary=False)[0][0])
+
+    def search_guests(self, conn, text='', after=guests.FIRST_PAGE, limit=guests.PAGE_SIZE):
+        words = re.findall(r'\w+', text or '')
+        match = ''.join(
+            " AND (" + ' OR '.join(f"{column} LIKE %s" for column in GUEST_SEARCH_COLUMNS) + ")" for _ in words)
+        prefixes = [word.replace('_', r'\_') + '%' for word in words for _ in GUEST_SEARCH_COLUMNS]
+        return _rows(conn, MYSQL_GUEST_PAGE_SQL.format(match=match),
+                     (*tuple(after or guests.FIRST_PAGE), *prefixes, limit))
+
+    def guest(self, conn, guest_id):
+        rows = _rows(conn, _mysql(guests.GUEST_SQL), (guest_id,))
+        return rows[0] if rows else None
+
+    # ---------------------------------------------------------------
+    #  In-memory views
+    # ---------------------------------------------------------------
+    def load_catalog(self, conn):
+        return Catalog.from_rows(*(_rows(conn, sql, dictionary=False)
+                                   for sql in (ROOM_TYPES_SQL, ROOMS_SQL, SERVICES_SQL)))
+
+    def load_availability(self, conn, rooms):
+        return AvailabilityIndex.from_stays(rooms, _rows(conn, availability.STAYS_SQL, dictionary=False))
+
+    def load_rate_calendar(self, conn, base_prices):
+        first, last = _rows(conn, RATE_RANGE_SQL, dictionary=False)[0]
+        return RateCalendar.from_rates(base_prices, _rows(conn, RATES_SQL, dictionary=False), first, last)
+
+    def load_occupancy(self, conn, start, days):
+        start = start or date.today()
+        room_nos = [row[0] for row in _rows(conn, occupancy.ROOMS_SQL, dictionary=False)]
+        stays = _rows(conn, _mysql(occupancy.STAYS_SQL),
+                      (start.isoformat(), (start + timedelta(days=days)).isoformat()), dictionary=False)
+        return OccupancyCalendar.from_stays(room_nos, stays, start, days)
+
+    # ---------------------------------------------------------------
+    #  Page reads
+    # ---------------------------------------------------------------
+    def cached_rows(self, conn, name, params=()):
+        return _rows(conn, MYSQL_CACHED_QUERIES[name], params)
+
+    def service_lines(self, conn, reservation_id):
+        return _rows(conn, _mysql(queries.RESERVATION_SERVICE_LINES), (reservation_id,))
+
+    def checkout_details(self, conn, reservation_id):
+        rows = _rows(conn, _mysql(queries.CHECKOUT_DETAILS), (reservation_id,))
+        return rows[0] if rows else None
+
+    def in_house(self, conn, day, type_ids=None):
+        type_filter, params = self._type_filter(type_ids)
+        return _rows(conn, MYSQL_IN_HOUSE_SQL.format(type_filter=type_filter), (day, day, *params),
+                     dictionary=False)
+
+    # ---------------------------------------------------------------
+    #  Reports
+    # ---------------------------------------------------------------
+    def revenue_summary(self, conn, start, end):
+        return _rows(conn, MYSQL_SUMMARY_SQL, (start, end))[0]
+
+    def revenue_breakdown(self, conn, start, end):
+        return _rows(conn, MYSQL_BREAKDOWN_SQL, (start, end))
+
+    def report_rows(self, conn, start, end, limit):
+        return _rows(conn, MYSQL_REPORT_SQL + "    LIMIT %s", (start, end, limit))
+
+    def report_chunks(self, conn, start, end, chunk_size=exports.CHUNK_ROWS):
+        # Unbuffered: rows stream from the server as they are fetched
+        cursor = conn.cursor()
+        try:
+            cursor.execute(MYSQL_REPORT_SQL, (start, end))
+            columns = list(cursor.column_names)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield columns, [tuple(_plain(value) for value in row) for row in rows]
+        finally:
+            if cursor.with_rows:
+                cursor.fetchall()        # an abandoned export must not leave rows unread
+            cursor.close()
+
+    def daily_revenue(self, conn, day):
+        cursor = conn.cursor(dictionary=True, buffered=True)
+        try:
+            if 'sp_daily_revenue_report' in self.procedures:
+                cursor.callproc('sp_daily_revenue_report', (day,))
+                row = _drain(cursor)[0][0]
+                # Result sets of a dictionary cursor are dicts on recent connectors
+                if not isinstance(row, dict):
+                    row = dict(zip(DAILY_REVENUE_COLUMNS, row))
+            else:
+                cursor.execute(MYSQL_DAILY_REVENUE_SQL, (day, day))
+                row = cursor.fetchone()
+        finally:
+            cursor.close()
+        totals = {key: float(row[key] or 0) for key in DAILY_REVENUE_COLUMNS[2:]}
+        return {'report_date': str(row['report_date']), 'reservations': int(row['reservations'] or 0), **totals}
+
+    def refresh_snapshot(self, conn):
+        return snapshot.extract(conn, self.snapshot_path, read_mysql_facts)
+
+    # ---------------------------------------------------------------
+    #  Night audit
+    # ---------------------------------------------------------------
+    def business_date(self, conn):
+        return _rows(conn, "SELECT CURDATE()", dictionary=False)[0][0]
+
+    def due_out(self, conn, day):
+        return _rows(conn, _mysql(night_audit.DUE_OUT_SQL), (day,))
+
+    def overdue_bills(self, conn, limit):
+        return _rows(conn, _mysql(night_audit.OVERDUE_SQL), (limit,))
+
+    def recent_audits(self, conn, limit):
+        return _rows(conn, _mysql(RECENT_AUDITS_SQL), (limit,))
+
+    @mysql_transactional
+    def run_night_audit(self, cursor, audit_date=None, settle=(), payment_method='Cash'):
+        started = time.perf_counter()
+        if audit_date is None:
+            cursor.execute("SELECT CURDATE() AS today")
+            audit_date = cursor.fetchone()['today'].isoformat()
+        settle = list(settle)
+        settled = 0
+        if settle:
+            cursor.execute(MYSQL_SETTLE_SQL.format(ids=_placeholders(settle)), (payment_method, audit_date, *settle))
+            settled = cursor.rowcount
+        cursor.execute(MYSQL_AUDIT_ROOM_STATUS_SQL, {'day': audit_date})
+        rooms_changed = cursor.rowcount
+
+        cursor.execute("SELECT MAX(audit_date) AS previous FROM NightAudit WHERE audit_date < %s", (audit_date,))
+        previous = cursor.fetchone()['previous']
+        end = date.fromisoformat(audit_date)
+        post_from = previous or end - timedelta(days=1)
+        nights = [(post_from + timedelta(days=i + 1)).isoformat() for i in range((end - post_from).days)]
+        cursor.execute(MYSQL_POST_CHARGES_SQL.format(nights=' UNION ALL '.join(['SELECT CAST(%s AS DATE) AS night'] * len(nights))),
+                       nights)
+        nights_posted = cursor.rowcount
+        cursor.execute("SELECT COALESCE(SUM(amount), 0) AS revenue FROM RoomCharge WHERE night > %s AND night <= %s",
+                       (post_from, audit_date))
+        room_revenue = round(float(cursor.fetchone()['revenue']), 2)
+
+        cursor.execute(MYSQL_FLAG_OVERDUE_SQL, (audit_date, audit_date))
+        cursor.execute("SELECT COUNT(*) AS overdue FROM Billing WHERE payment_status = 'pending' "
+                       "AND overdue_since IS NOT NULL")
+        overdue = cursor.fetchone()['overdue']
+        cursor.execute("SELECT COUNT(*) AS occupied FROM Room WHERE room_status = 'occupied'")
+        rooms_occupied = cursor.fetchone()['occupied']
+
+        summary = {
+            'audit_date': audit_date,
+            'settled': settled,
+            'rooms_occupied': rooms_occupied,
+            'rooms_changed': rooms_changed,
+            'nights_posted': nights_posted,
+            'room_revenue': room_revenue,
+            'overdue': overdue,
+        }
+        cursor.execute(MYSQL_LOG_AUDIT_SQL, summary)
+        summary['ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return summary
+
+
+def open_backend(settings=None, query_log=None):
+    """Backend from a settings mapping, e.g. a secrets.toml [storage] table:
+
+        backend = "sqlite"            path = "final.db"
+        backend = "mysql"             pool_size = 8, plus the mysql.connector
+                                      options (host, port, user, password, database)
+    """
+    settings = dict(settings or {})
+    kind = settings.pop('backend', 'sqlite')
+    if kind == 'sqlite':
+        return SQLiteBackend(settings.get('path', DB_PATH), query_log=query_log)
+    if kind == 'mysql':
+        return MySQLBackend(query_log=query_log, **settings)
+    raise ValueError(f"Unknown storage backend {kind!r}")
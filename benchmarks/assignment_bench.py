@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+# -------------------------------------------------------------------
+#  Room assignment re-optimization on a fragmented calendar
+#  python -m benchmarks.assignment_bench --reservations 50000 --rooms 200
+#  The generator leaves gaps of up to two nights between stays, and about
+#  a fifth of the stays lie ahead. operations.reassign_rooms re-plans all
+#  of them in one transaction; every seventh future stay is locked to its
+#  room first, as a clerk's pick would be. Afterwards no room may be
+#  double booked, no stay may change room type or outgrow its room, no
+#  in-house or locked stay may move, bills and the revenue rollup must be unchanged, and the
+#  short-gap nights (counted again in SQL) must not grow. Any failure,
+#  or a run slower than --budget seconds, exits 1.
+# -------------------------------------------------------------------
+SNAPSHOT_SQL = {
+    'stays': """
+        SELECT r.reservation_id, r.room_no, rm.type_id,
+               COALESCE(r.adults, 0) + COALESCE(r.children, 0) <= rm.room_capacity AS fits
+        FROM Reservation r JOIN Room rm ON rm.room_no = r.room_no
+    """,
+    'bills': "SELECT reservation_id, room_charges, service_charges, total FROM Billing",
+    'revenue': "SELECT * FROM DailyRevenue",
+}
+
+# Gaps of 1..SHORT_GAP_NIGHTS free nights after today, before a future stay
+SHORT_GAP_NIGHTS_SQL = """
+    WITH stays AS (
+        SELECT room_no, check_in,
+               MAX(COALESCE(LAG(check_out) OVER (PARTITION BY room_no ORDER BY check_in), ?1), ?1) AS free_from
+        FROM Reservation
+        WHERE check_out > ?1
+    )
+    SELECT COUNT(*), COALESCE(SUM(JULIANDAY(check_in) - JULIANDAY(free_from)), 0)
+    FROM stays
+    WHERE check_in > ?1 AND JULIANDAY(check_in) - JULIANDAY(free_from) BETWEEN 1 AND ?2
+"""
+
+
+def _snapshot(conn):
+    return {name: sorted(tuple(row) for row in conn.execute(sql)) for name, sql in SNAPSHOT_SQL.items()}
+
+def _short_gaps(conn, today):
+    import assignment
+    return tuple(int(value) for value in conn.execute(SHORT_GAP_NIGHTS_SQL, (today, assignment.SHORT_GAP_NIGHTS)).fetchone())
+
+
+def run(path, rooms, reservations, seed):
+    import assignment
+    import operations
+    from benchmarks.booking_stress import INTEGRITY_CHECKS
+    from benchmarks.generate import generate
+    from db import open_connection
+
+    generate(path, rooms, max(rooms, 100), reservations, 0, seed)
+    conn = open_connection(path)
+    today = conn.execute("SELECT DATE('now')").fetchone()[0]
+    in_house = {row[0]: row[1] for row in conn.execute(
+        "SELECT reservation_id, room_no FROM Reservation WHERE check_in <= ?1 AND check_out > ?1", (today,))}
+    conn.execute("UPDATE Reservation SET room_locked = 1 WHERE check_in > ? AND reservation_id % 7 = 0", (today,))
+    locked = {row[0]: row[1] for row in conn.execute("SELECT reservation_id, room_no FROM Reservation WHERE room_locked")}
+    before = _snapshot(conn)
+    gaps_before = _short_gaps(conn, today)
+
+    started = time.perf_counter()
+    summary = operations.reassign_rooms(conn)
+    seconds = time.perf_counter() - started
+
+    after = _snapshot(conn)
+    gaps_after = _short_gaps(conn, today)
+    types_before = {stay[0]: stay[2] for stay in before['stays']}
+    problems = {name: len(conn.execute(sql).fetchall()) for name, sql in INTEGRITY_CHECKS.items()}
+    problems['room_type_changed'] = sum(types_before[stay[0]] != stay[2] for stay in after['stays'])
+    problems['over_capacity'] = sum(not stay[3] for stay in after['stays']) - sum(not stay[3] for stay in before['stays'])
+    problems['in_house_moved'] = sum(in_house.get(stay[0], stay[1]) != stay[1] for stay in after['stays'])
+    problems['locked_moved'] = sum(locked.get(stay[0], stay[1]) != stay[1] for stay in after['stays'])
+    problems['bills_changed'] = int(before['bills'] != after['bills'])
+    problems['revenue_changed'] = int(before['revenue'] != after['revenue'])
+    problems['short_gap_nights_grew'] = int(gaps_after[1] > gaps_before[1])
+    problems['summary_mismatch'] = int((summary['short_gaps_after'], summary['short_gap_nights_after']) != gaps_after)
+    _, replan = assignment.plan(conn)
+    conn.close()
+    return summary, seconds, gaps_before, gaps_after, replan['moved'], problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Room assignment re-optimization on a fragmented calendar")
+    parser.add_argument('--rooms', type=int, default=200)
+    parser.add_argument('--reservations', type=int, default=50000, help="all stays; about a fifth lie ahead")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget', type=float, default=5.0, help="seconds allowed for the reassignment")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        summary, seconds, gaps_before, gaps_after, replanned, problems = run(
+            os.path.join(tmp, 'assignment.db'), args.rooms, args.reservations, args.seed)
+
+    print(f"{summary['moved']:,} of {summary['reservations']:,} future stays moved in {seconds:.2f}s "
+          f"(planning {summary['ms']:.0f} ms)")
+    print(f"  short gaps {gaps_before[0]:,} -> {gaps_after[0]:,}, nights {gaps_before[1]:,} -> {gaps_after[1]:,}; "
+          f"{len(summary['types_kept'])} room types kept, {replanned:,} moves on a second run")
+    for name, count in problems.items():
+        print(f"  {name:<32} {count}")
+    ok = not any(problems.values()) and seconds <= args.budget
+    if seconds > args.budget:
+        print(f"  over budget: {seconds:.2f}s > {args.budget:.2f}s")
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump({'rooms': args.rooms, 'reservations': args.reservations, 'seconds': round(seconds, 3),
+                       'summary': summary, 'short_gaps_before': gaps_before, 'short_gaps_after': gaps_after,
+                       'second_run_moves': replanned, 'problems': problems}, fh, indent=2)
+    return ok
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.exit(0 if main() else 1)
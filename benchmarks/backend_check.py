@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+# -------------------------------------------------------------------
+#  Storage backend conformance run
+#  python -m benchmarks.backend_check                       (SQLite)
+#  python -m benchmarks.backend_check --backend mysql --host 127.0.0.1 \
+#      --user root --database streamlit_db8                 (MySQL/MariaDB)
+#  The MySQL run expects final.sql to be loaded, e.g. into a throwaway
+#  container:
+#      docker run -d -p 3306:3306 -e MARIADB_ROOT_PASSWORD=... mariadb:11
+#      mysql -h 127.0.0.1 -u root -p < final.sql
+#  or --load-schema, which (re)creates --database from final.sql first.
+#  The backend's migrate() runs before the checks. The password is read
+#  from $MYSQL_PASSWORD. The same business
+#  operations run against either backend. Each check is reported, and
+#  any failure exits 1. Stays are booked far in the future and the
+#  guests are new, so the run does not touch existing bookings. The
+#  closing check sends concurrent bookings for one room from separate
+#  pooled connections, and exactly one of them may succeed.
+# -------------------------------------------------------------------
+STAY = ('2099-01-10', '2099-01-12')
+GROUP_STAY = ('2099-02-01', '2099-02-03')
+RACE_STAY = ('2099-03-01', '2099-03-05')
+
+
+def _rows(backend, conn, sql, params=()):
+    if backend.name == 'mysql':
+        cursor = conn.cursor(dictionary=True, buffered=True)
+        cursor.execute(sql.replace('?', '%s'), params)
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+    return [dict(row) for row in conn.execute(sql, params)]
+
+def _refused(operation, *args):
+    from operations import OperationError
+
+    try:
+        operation(*args)
+    except OperationError:
+        return True
+    return False
+
+
+def scenario(backend, threads):
+    conn = backend.connection()
+    checks = []
+
+    def check(name, passed, detail=''):
+        checks.append({'check': name, 'passed': bool(passed), 'detail': str(detail)})
+
+    stamp = str(time.time_ns())[-9:]
+    guest_id = backend.add_guest(conn, 'Check', 'Guest', f"check{stamp}@example.com", f"9{stamp:0>12}", 30, 'M', 'Lahore')
+    check("add_guest", guest_id)
+    check("duplicate guest refused", _refused(backend.add_guest, conn, 'Check', 'Guest', f"check{stamp}@example.com",
+                                              f"9{stamp:0>12}", 30, 'M', 'Lahore'))
+    backend.update_guest(conn, guest_id, 'Checked', 'Guest', f"check{stamp}@example.com", f"9{stamp:0>12}", 'Karachi')
+    check("update_guest", _rows(backend, conn, "SELECT City FROM Guest WHERE guest_id = ?", (guest_id,))[0]['City'] == 'Karachi')
+
+    rooms = _rows(backend, conn, "SELECT room_no, type_id FROM Room ORDER BY room_no")
+    room_no = rooms[0]['room_no']
+    reservation_id = backend.make_reservation(conn, guest_id, room_no, *STAY, 1, 0)
+    bill = _rows(backend, conn, "SELECT room_charges, payment_status FROM Billing WHERE reservation_id = ?", (reservation_id,))
+    check("make_reservation creates the bill", bill and bill[0]['payment_status'] == 'pending', bill)
+    check("overlapping booking refused", _refused(backend.make_reservation, conn, guest_id, room_no,
+                                                  '2099-01-11', '2099-01-13', 1, 0))
+
+    service_id = _rows(backend, conn, "SELECT MIN(service_id) AS service_id FROM Services")[0]['service_id']
+    line_id = backend.add_service(conn, reservation_id, service_id, 2, STAY[0])
+    charges = _rows(backend, conn, "SELECT service_charges FROM Billing WHERE reservation_id = ?", (reservation_id,))
+    check("add_service updates the bill", float(charges[0]['service_charges']) > 0, charges)
+    check("delete with services refused", _refused(backend.delete_reservation, conn, reservation_id))
+    backend.delete_service(conn, line_id)
+    backend.delete_reservation(conn, reservation_id)
+    check("delete_reservation removes reservation and bill",
+          not _rows(backend, conn, "SELECT 1 FROM Billing WHERE reservation_id = ?", (reservation_id,)))
+
+    type_id = rooms[0]['type_id']
+    same_type = sum(room['type_id'] == type_id for room in rooms)
+    booked = backend.book_group(conn, guest_id, {type_id: min(2, same_type)}, *GROUP_STAY, 1, 0)
+    check("book_group", len(booked) == min(2, same_type), booked)
+    check("oversized group refused", _refused(backend.book_group, conn, guest_id, {type_id: same_type + 1},
+                                              *GROUP_STAY, 1, 0))
+    posted = backend.post_service_bulk(conn, service_id, 1, GROUP_STAY[0], None, [rid for rid, _ in booked])
+    check("post_service_bulk", len(posted) == len(booked), posted)
+    backend.check_out(conn, booked[0][0], 'Cash')
+    check("double checkout refused", _refused(backend.check_out, conn, booked[0][0], 'Cash'))
+    revenue = backend.daily_revenue(conn, date.today().isoformat())
+    check("daily_revenue", revenue['reservations'] >= 1, revenue)
+    check("guest with history kept", _refused(backend.delete_guest, conn, guest_id))
+    backend.release(conn)
+
+    # Concurrent bookings for one room: exactly one may win
+    race_room = rooms[-1]['room_no']
+    outcomes = []
+    barrier = threading.Barrier(threads)
+
+    def book():
+        from operations import OperationError
+
+        worker_conn = backend.connection()
+        try:
+            barrier.wait()
+            backend.make_reservation(worker_conn, guest_id, race_room, *RACE_STAY, 1, 0)
+            outcomes.append('booked')
+        except OperationError:
+            outcomes.append('refused')
+        except Exception as e:
+            outcomes.append(f"error: {e}")
+        finally:
+            backend.release(worker_conn)
+
+    workers = [threading.Thread(target=book) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    check("concurrent bookings: one winner", outcomes.count('booked') == 1 and outcomes.count('refused') == threads - 1,
+          outcomes)
+    return checks
+
+
+def main(argv=None):
+    from backends import MySQLBackend, SQLiteBackend, run_script
+    from db import open_connection
+    from migrations import migrate
+
+    parser = argparse.ArgumentParser(description="Run the business operations against a storage backend")
+    parser.add_argument('--backend', choices=['sqlite', 'mysql'], default='sqlite')
+    parser.add_argument('--path', help="SQLite database (default: a fresh temporary one)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--database', default='streamlit_db8')
+    parser.add_argument('--load-schema', action='store_true',
+                        help="drop --database and load final.sql into it first (MySQL)")
+    parser.add_argument('--pool-size', type=int, default=8)
+    parser.add_argument('--threads', type=int, default=4, help="concurrent bookings in the race check")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.backend == 'mysql':
+            config = {'host': args.host, 'port': args.port, 'user': args.user,
+                      'password': os.environ.get('MYSQL_PASSWORD', '')}
+            if args.load_schema:
+                import mysql.connector
+
+                admin = mysql.connector.connect(autocommit=True, **config)
+                admin.cursor().execute(f"DROP DATABASE IF EXISTS {args.database}")
+                schema = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'final.sql')
+                with open(schema) as fh:
+                    run_script(admin, fh.read().replace('streamlit_db8', args.database))
+                admin.close()
+            backend = MySQLBackend(pool_size=args.pool_size, database=args.database, **config)
+            backend.migrate()
+        else:
+            path = args.path or os.path.join(tmp, 'check.db')
+            conn = open_connection(path)
+            migrate(conn)
+            conn.close()
+            backend = SQLiteBackend(path)
+        try:
+            checks = scenario(backend, min(args.threads, args.pool_size))
+        finally:
+            backend.close()
+
+    for result in checks:
+        print(f"  {'ok  ' if result['passed'] else 'FAIL'} {result['check']}"
+              + ('' if result['passed'] else f"  ({result['detail']})"))
+    failed = [result for result in checks if not result['passed']]
+    print(f"{backend.name}: {len(checks) - len(failed)}/{len(checks)} checks passed")
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump({'backend': backend.name, 'checks': checks}, fh, indent=2)
+    return not failed
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.exit(0 if main() else 1)
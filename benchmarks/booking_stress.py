@@ -0,0 +1,179 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# -------------------------------------------------------------------
+#  Concurrent booking stress run
+#  python -m benchmarks.booking_stress --workers 8 --operations 2000
+#  Every worker process books random short stays on a handful of rooms
+#  inside a narrow window, so most attempts collide, and mixes in service
+#  postings, checkouts and deletions. Afterwards the database must hold
+#  no overlapping stays and no orphaned Billing, RoomNight or service
+#  rows, and every bill must match its ledger; otherwise it exits 1.
+# -------------------------------------------------------------------
+ROOMS = 8
+WINDOW_DAYS = 120
+START = date(2030, 1, 1)
+
+INTEGRITY_CHECKS = {
+    'double_bookings': """
+        SELECT a.reservation_id, b.reservation_id
+        FROM Reservation a
+        JOIN Reservation b ON a.room_no = b.room_no AND a.reservation_id < b.reservation_id
+        WHERE a.check_in < b.check_out AND b.check_in < a.check_out
+    """,
+    'reservations_without_billing': """
+        SELECT r.reservation_id FROM Reservation r
+        WHERE NOT EXISTS (SELECT 1 FROM Billing b WHERE b.reservation_id = r.reservation_id)
+    """,
+    'billing_without_reservation': """
+        SELECT b.reservation_id FROM Billing b
+        WHERE NOT EXISTS (SELECT 1 FROM Reservation r WHERE r.reservation_id = b.reservation_id)
+    """,
+    'room_nights_without_reservation': """
+        SELECT n.reservation_id FROM RoomNight n
+        WHERE NOT EXISTS (SELECT 1 FROM Reservation r WHERE r.reservation_id = n.reservation_id)
+    """,
+    'room_nights_mismatched': """
+        SELECT r.reservation_id FROM Reservation r
+        WHERE (SELECT COUNT(*) FROM RoomNight n WHERE n.reservation_id = r.reservation_id)
+              != julianday(r.check_out) - julianday(r.check_in)
+    """,
+    'services_without_reservation': """
+        SELECT rs.res_service_id FROM ReservationServices rs
+        WHERE NOT EXISTS (SELECT 1 FROM Reservation r WHERE r.reservation_id = rs.reservation_id)
+    """,
+}
+
+
+def fill(path, rooms):
+    from db import open_connection
+    from migrations import migrate
+
+    conn = open_connection(path)
+    migrate(conn)
+    conn.execute("BEGIN")
+    conn.executemany("INSERT INTO Room (room_no, type_id, room_status) VALUES (?, 1, 'vacant')",
+                     [(1000 + i,) for i in range(rooms)])
+    conn.executemany(
+        "INSERT INTO Guest (guest_Fname, guest_Lname, guest_email, CNIC, age, gender, City) VALUES (?, ?, ?, ?, 30, 'M', 'Lahore')",
+        [(f"First{i}", f"Last{i}", f"stress{i}@example.com", f"{i:013d}") for i in range(rooms)],
+    )
+    conn.execute("COMMIT")
+    conn.close()
+
+
+def _worker(path, seed, operations, rooms, queue):
+    import operations as ops
+    from db import open_connection
+    from operations import OperationError
+
+    rng = random.Random(seed)
+    conn = open_connection(path)
+    guest_ids = [row[0] for row in conn.execute("SELECT guest_id FROM Guest")]
+    service_ids = [row[0] for row in conn.execute("SELECT service_id FROM Services")]
+    counts = {'booked': 0, 'conflicts': 0, 'refused': 0, 'busy': 0, 'services': 0, 'checkouts': 0, 'deletions': 0}
+    mine = []
+    for _ in range(operations):
+        action = rng.random()
+        try:
+            if action < 0.7 or not mine:
+                check_in = START + timedelta(days=rng.randrange(WINDOW_DAYS))
+                check_out = check_in + timedelta(days=rng.randint(1, 4))
+                try:
+                    mine.append(ops.make_reservation(conn, rng.choice(guest_ids), 1000 + rng.randrange(rooms),
+                                                     str(check_in), str(check_out), 1, 0))
+                    counts['booked'] += 1
+                except OperationError:
+                    counts['conflicts'] += 1
+            elif action < 0.8:
+                ops.add_service(conn, rng.choice(mine), rng.choice(service_ids), rng.randint(1, 3), str(START))
+                counts['services'] += 1
+            elif action < 0.9:
+                ops.check_out(conn, rng.choice(mine), 'Cash')
+                counts['checkouts'] += 1
+            else:
+                reservation_id = mine.pop(rng.randrange(len(mine)))
+                ops.delete_reservation(conn, reservation_id)
+                counts['deletions'] += 1
+        except OperationError:
+            counts['refused'] += 1
+        except sqlite3.OperationalError as e:
+            if not ops._is_busy(e):
+                raise
+            counts['busy'] += 1
+    conn.close()
+    queue.put(counts)
+
+
+def run(path, workers, operations, rooms, seed):
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(path, seed + i, operations, rooms, queue)) for i in range(workers)]
+    started = time.perf_counter()
+    for proc in procs:
+        proc.start()
+    results = [queue.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    seconds = time.perf_counter() - started
+    if any(proc.exitcode != 0 for proc in procs):
+        raise RuntimeError("a stress worker failed")
+    totals = {key: sum(result[key] for result in results) for key in results[0]}
+    return totals, seconds
+
+
+def verify(path):
+    import billing
+    from db import open_connection
+
+    conn = open_connection(path)
+    problems = {name: len(conn.execute(sql).fetchall()) for name, sql in INTEGRITY_CHECKS.items()}
+    mismatches, missing = billing.check(conn)
+    problems['bill_mismatches'] = len(mismatches) + len(missing)
+    reservations = conn.execute("SELECT COUNT(*) FROM Reservation").fetchone()[0]
+    conn.close()
+    return reservations, problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent booking stress run with integrity checks")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--operations', type=int, default=1000, help="operations per worker")
+    parser.add_argument('--rooms', type=int, default=ROOMS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'stress.db')
+        fill(path, args.rooms)
+        totals, seconds = run(path, args.workers, args.operations, args.rooms, args.seed)
+        reservations, problems = verify(path)
+
+    attempts = args.workers * args.operations
+    print(f"{attempts:,} operations from {args.workers} processes in {seconds:.1f}s "
+          f"({attempts / seconds:,.0f}/s)")
+    print('  ' + ', '.join(f"{key} {value:,}" for key, value in totals.items()))
+    print(f"  {reservations:,} reservations left")
+    for name, count in problems.items():
+        print(f"  {name:<32} {count}")
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump({'workers': args.workers, 'operations': args.operations, 'rooms': args.rooms,
+                       'seconds': round(seconds, 2), 'reservations': reservations,
+                       **totals, 'problems': problems}, fh, indent=2)
+    return not any(problems.values())
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,106 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sqlite3
+import sys
+import tempfile
+from datetime import date, timedelta
+
+# -------------------------------------------------------------------
+#  Peak RSS of the Reports export against row count
+#  python -m benchmarks.export_rss --rows 10000 100000 500000
+#  Each measurement runs in a fresh process, so ru_maxrss is the peak of
+#  that one export; the figure reported is the growth over the baseline
+#  taken after imports.
+# -------------------------------------------------------------------
+ROOMS = 1000
+START = date(2020, 1, 1)
+
+
+def fill(path, n_rows):
+    from db import open_connection
+    from migrations import migrate
+
+    conn = open_connection(path)
+    migrate(conn)
+    conn.execute("BEGIN")
+    conn.executemany("INSERT OR IGNORE INTO Room (room_no, type_id, room_status) VALUES (?, 1, 'vacant')",
+                     [(1000 + i,) for i in range(ROOMS)])
+    conn.executemany(
+        "INSERT INTO Guest (guest_Fname, guest_Lname, guest_email, CNIC, age, gender, City) VALUES (?, ?, ?, ?, 30, 'M', 'Lahore')",
+        [(f"First{i}", f"Last{i}", f"guest{i}@example.com", f"{i:013d}") for i in range(ROOMS)],
+    )
+    # Back-to-back two-night stays, ROOMS reservations per stay slot
+    conn.executemany(
+        "INSERT INTO Reservation (reservation_date, guest_id, room_no, check_in, check_out, adults, children) VALUES (?, ?, ?, ?, ?, 1, 0)",
+        ((str(START), i % ROOMS + 1, 1000 + i % ROOMS,
+          str(START + timedelta(days=2 * (i // ROOMS))),
+          str(START + timedelta(days=2 * (i // ROOMS) + 2))) for i in range(n_rows)),
+    )
+    conn.execute("COMMIT")
+    conn.close()
+
+
+def _measure(path, method, queue):
+    import archive
+    import exports
+    import pandas as pd
+    import queries
+
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    archive.attach(conn, path)
+    end = '9999-12-31'
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if method == 'stream':
+        export_file = exports.export_report(conn, '0000-01-01', end)
+        size = os.fstat(export_file.fileno()).st_size
+        export_file.close()
+    else:
+        # The pre-streaming path: rows, then a DataFrame, then the CSV bytes
+        rows = conn.execute(queries.REPORT_RESERVATIONS, ('0000-01-01', end)).fetchall()
+        report_df = pd.DataFrame([dict(row) for row in rows])
+        size = len(report_df.to_csv(index=False).encode('utf-8'))
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put({'bytes': size, 'peak_rss_growth_kb': peak - baseline})
+
+
+def measure(path, method):
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_measure, args=(path, method, queue))
+    proc.start()
+    proc.join()
+    if proc.exitcode != 0:
+        raise RuntimeError(f"{method} export failed in the benchmark process")
+    return queue.get()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Peak RSS of the Reports export against row count")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 50000, 200000])
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.rows:
+            path = os.path.join(tmp, f"export_{n_rows}.db")
+            fill(path, n_rows)
+            for method in ('dataframe', 'stream'):
+                result = {'rows': n_rows, 'method': method, **measure(path, method)}
+                results.append(result)
+                print(f"{n_rows:>9,} rows  {method:<9}  {result['bytes'] / 1e6:8.1f} MB csv  "
+                      f"peak RSS +{result['peak_rss_growth_kb'] / 1024:8.1f} MB")
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(results, fh, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
@@ -0,0 +1,129 @@
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+# -------------------------------------------------------------------
+#  Deterministic synthetic hotel data
+#  python -m benchmarks.generate bench.db --rooms 200 --guests 20000 \
+#      --reservations 100000 --services 200000
+#  The same seed and anchor date always produce the same database. Stays
+#  are laid back to back per room so none overlap, and about a fifth of
+#  each room's stays lie after the anchor, so the "active" page queries
+#  have work to do. Rows go in through the normal triggers, so Billing,
+#  RoomNight and the rollups are filled as the app would fill them.
+# -------------------------------------------------------------------
+FIRST_NAMES = ['Ali', 'Ahmed', 'Sara', 'Ayesha', 'Omar', 'Bilal', 'Hina', 'Zain', 'Usman', 'Fatima',
+               'Hamza', 'Maryam', 'Imran', 'Sana', 'Kamran', 'Nadia', 'Faisal', 'Rabia', 'Tariq', 'Zara']
+LAST_NAMES = ['Khan', 'Ahmed', 'Raza', 'Malik', 'Hussain', 'Sheikh', 'Qureshi', 'Butt', 'Chaudhry', 'Siddiqui',
+              'Iqbal', 'Javed', 'Mirza', 'Abbasi', 'Baig', 'Rana', 'Akhtar', 'Zafar', 'Anwar', 'Haider']
+CITIES = ['Lahore', 'Karachi', 'Islamabad', 'Rawalpindi', 'Faisalabad', 'Multan', 'Peshawar', 'Quetta']
+FUTURE_SHARE = 0.2
+FIRST_ROOM = 1000
+
+SIZES = {
+    'small': {'rooms': 50, 'guests': 1000, 'reservations': 5000, 'services': 10000},
+    'medium': {'rooms': 200, 'guests': 20000, 'reservations': 100000, 'services': 200000},
+    'large': {'rooms': 1000, 'guests': 200000, 'reservations': 1000000, 'services': 2000000},
+}
+
+
+def _bulk_insert(conn, table, columns, rows):
+    # Stage first: one INSERT ... SELECT fires the row triggers far more
+    # cheaply than a per-row executemany into the table itself
+    column_list = ', '.join(columns)
+    conn.execute(f"CREATE TEMP TABLE GenerateStage ({column_list})")
+    conn.executemany(f"INSERT INTO GenerateStage VALUES ({', '.join('?' * len(columns))})", rows)
+    conn.execute(f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM GenerateStage ORDER BY rowid")
+    conn.execute("DROP TABLE GenerateStage")
+
+def _stays(rng, rooms, reservations, anchor):
+    """Back-to-back stays per room, (room_no, check_in, check_out) in room order."""
+    per_room, extra = divmod(reservations, rooms)
+    for index in range(rooms):
+        room_no = FIRST_ROOM + index
+        count = per_room + (index < extra)
+        lengths = [rng.randint(1, 5) for _ in range(count)]
+        gaps = [rng.randint(0, 2) for _ in range(count)]
+        span = sum(lengths) + sum(gaps)
+        day = anchor - timedelta(days=int(span * (1 - FUTURE_SHARE)))
+        for length, gap in zip(lengths, gaps):
+            day += timedelta(days=gap)
+            yield room_no, day, day + timedelta(days=length)
+            day += timedelta(days=length)
+
+def generate(path, rooms, guests, reservations, services, seed=0, anchor=None):
+    """Create (or extend) the database at path with the given row counts."""
+    from db import open_connection
+    from migrations import migrate
+
+    rng = random.Random(seed)
+    anchor = anchor or date.today()
+    conn = open_connection(path)
+    migrate(conn)
+    type_ids = [row[0] for row in conn.execute("SELECT type_id FROM RoomType ORDER BY type_id")]
+    service_ids = [row[0] for row in conn.execute("SELECT service_id FROM Services ORDER BY service_id")]
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(
+            "INSERT INTO Room (room_no, type_id, room_status) VALUES (?, ?, 'vacant')",
+            [(FIRST_ROOM + i, rng.choice(type_ids)) for i in range(rooms)],
+        )
+        _bulk_insert(conn, 'Guest', ['guest_Fname', 'guest_Lname', 'guest_email', 'CNIC', 'age', 'gender', 'City'], [
+            (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), f"guest{i}@example.com", f"{i:013d}",
+             rng.randint(18, 80), rng.choice('MFO'), rng.choice(CITIES))
+            for i in range(1, guests + 1)
+        ])
+        first_guest = conn.execute("SELECT MAX(guest_id) FROM Guest").fetchone()[0] - guests + 1
+
+        _bulk_insert(conn, 'Reservation',
+                     ['reservation_date', 'guest_id', 'room_no', 'check_in', 'check_out', 'adults', 'children'], [
+            (str(check_in - timedelta(days=rng.randint(0, 60))), first_guest + rng.randrange(guests), room_no,
+             str(check_in), str(check_out), 1, 0)
+            for room_no, check_in, check_out in _stays(rng, rooms, reservations, anchor)
+        ])
+        first_reservation = conn.execute("SELECT MAX(reservation_id) FROM Reservation").fetchone()[0] - reservations + 1
+
+        stays = {row[0]: row[1] for row in conn.execute(
+            "SELECT reservation_id, check_in FROM Reservation WHERE reservation_id >= ?", (first_reservation,))}
+        lines = []
+        for _ in range(services):
+            reservation_id = first_reservation + rng.randrange(reservations)
+            lines.append((reservation_id, rng.choice(service_ids), rng.randint(1, 3), stays[reservation_id]))
+        _bulk_insert(conn, 'ReservationServices', ['reservation_id', 'service_id', 'quantity', 'service_date'], lines)
+
+        # Settle most past stays so the Reports split is realistic
+        conn.execute("""
+            UPDATE Billing SET payment_status = 'paid',
+                               payment_method = CASE reservation_id % 3 WHEN 0 THEN 'Cash' WHEN 1 THEN 'Card' ELSE 'Online' END,
+                               payment_date = (SELECT check_out FROM Reservation r WHERE r.reservation_id = Billing.reservation_id)
+            WHERE reservation_id >= ? AND reservation_id % 10 != 0
+              AND reservation_id IN (SELECT reservation_id FROM Reservation WHERE check_out < ?)
+        """, (first_reservation, str(anchor)))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fill a database with deterministic synthetic hotel data")
+    parser.add_argument('path')
+    parser.add_argument('--size', choices=SIZES, default='small', help="preset row counts (overridden by the options below)")
+    for table in ('rooms', 'guests', 'reservations', 'services'):
+        parser.add_argument(f'--{table}', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--anchor', type=date.fromisoformat, help="date the stays are laid out around (default today)")
+    args = parser.parse_args(argv)
+
+    counts = {table: getattr(args, table) or count for table, count in SIZES[args.size].items()}
+    generate(args.path, seed=args.seed, anchor=args.anchor, **counts)
+    print(f"{args.path}: " + ', '.join(f"{count:,} {table}" for table, count in counts.items()))
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
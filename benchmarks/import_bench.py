@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import date, timedelta
+
+# -------------------------------------------------------------------
+#  Bulk import throughput, rows per second by kind
+#  python -m benchmarks.import_bench --rows 200000 --target 50000
+#  Writes a guests, a reservations and a services CSV of --rows each and
+#  imports them in that order into a fresh database of --rooms rooms
+#  through imports.import_file, as the Bulk Import page would. The
+#  stays are back to back per room, so none is rejected. Afterwards
+#  every row must be in, billing.check and the RoomNight/revenue checks
+#  must be clean, and each kind must reach --target rows/s or exit 1.
+# -------------------------------------------------------------------
+KINDS = ['guests', 'reservations', 'services']
+FIRST_ROOM = 1000
+
+CONSISTENCY_CHECKS = {
+    # every imported night is held in RoomNight, once
+    'room_nights': """
+        SELECT (SELECT COALESCE(SUM(JULIANDAY(check_out) - JULIANDAY(check_in)), 0) FROM Reservation)
+             - (SELECT COUNT(*) FROM RoomNight)
+    """,
+    # the rollup adds up to the bills
+    'daily_revenue': """
+        SELECT ROUND((SELECT COALESCE(SUM(total), 0) FROM Billing)
+                   - (SELECT COALESCE(SUM(total), 0) FROM DailyRevenue), 2)
+    """,
+    # the guest search index holds every guest
+    'guest_search': "SELECT (SELECT COUNT(*) FROM Guest) - (SELECT COUNT(*) FROM GuestSearch)",
+}
+
+
+def write_files(folder, rows, rooms, seed=0):
+    rng = random.Random(seed)
+    paths = {kind: os.path.join(folder, f'{kind}.csv') for kind in KINDS}
+    with open(paths['guests'], 'w') as fh:
+        fh.write("guest_Fname,guest_Lname,guest_email,CNIC,age,gender,City\n")
+        for i in range(rows):
+            fh.write(f"Guest{i},Import,guest{i}@example.com,{3520200000000 + i},"
+                     f"{rng.randint(18, 90)},{rng.choice('MFO')},Lahore\n")
+
+    with open(paths['reservations'], 'w') as fh:
+        fh.write("guest_id,room_no,check_in,check_out,adults,children\n")
+        per_room = -(-rows // rooms)
+        start = date(2020, 1, 1)
+        for i in range(rows):
+            room, slot = divmod(i, per_room)
+            day = start + timedelta(days=slot * 3)
+            fh.write(f"{rng.randint(1, rows)},{FIRST_ROOM + room},{day},{day + timedelta(days=rng.randint(1, 3))},1,0\n")
+
+    with open(paths['services'], 'w') as fh:
+        fh.write("reservation_id,service_id,quantity,service_date\n")
+        for _ in range(rows):
+            fh.write(f"{rng.randint(1, rows)},{rng.randint(1, 5)},{rng.randint(1, 3)},2020-01-01\n")
+    return paths
+
+
+def run(folder, rows, rooms, seed):
+    import billing
+    import imports
+    from db import open_connection
+    from migrations import migrate
+
+    paths = write_files(folder, rows, rooms, seed)
+    conn = open_connection(os.path.join(folder, 'import.db'))
+    migrate(conn)
+    # Large rooms of one type, so capacity never rejects a row
+    type_id = conn.execute("SELECT MIN(type_id) FROM RoomType").fetchone()[0]
+    conn.executemany("INSERT INTO Room (room_no, type_id, room_capacity) VALUES (?, ?, 4)",
+                     [(FIRST_ROOM + i, type_id) for i in range(rooms)])
+    conn.commit()
+
+    results = {}
+    for kind in KINDS:
+        result = imports.import_file(conn, kind, paths[kind])
+        results[kind] = {'rows': result['rows'], 'imported': result['imported'],
+                         'rejected': len(result['rejects']), 'seconds': round(result['seconds'], 3),
+                         'rows_per_second': round(result['rows'] / result['seconds'])}
+
+    mismatches, missing = billing.check(conn)
+    problems = {'bill_mismatches': len(mismatches), 'missing_bills': len(missing)}
+    problems.update({name: abs(conn.execute(sql).fetchone()[0]) for name, sql in CONSISTENCY_CHECKS.items()})
+    problems.update({f'{kind}_rejected': results[kind]['rejected'] for kind in KINDS})
+    conn.close()
+    return results, problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import throughput, rows per second by kind")
+    parser.add_argument('--rows', type=int, default=200000, help="rows in each of the three files")
+    parser.add_argument('--rooms', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--target', type=float, default=50000, help="rows per second each kind must reach")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results, problems = run(tmp, args.rows, args.rooms, args.seed)
+
+    ok = not any(problems.values())
+    for kind, result in results.items():
+        slow = result['rows_per_second'] < args.target
+        ok = ok and not slow
+        print(f"{kind:<14} {result['imported']:>9,} of {result['rows']:,} in {result['seconds']:.2f}s "
+              f"= {result['rows_per_second']:>7,} rows/s{'  (below target)' if slow else ''}")
+    for name, count in problems.items():
+        print(f"  {name:<32} {count}")
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump({'rows': args.rows, 'rooms': args.rooms, 'target': args.target,
+                       'results': results, 'problems': problems}, fh, indent=2)
+    return ok
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.exit(0 if main() else 1)
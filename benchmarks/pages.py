@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+# -------------------------------------------------------------------
+#  Page query and full-rerun timings against generated data
+#  python -m benchmarks.pages --sizes small medium --output results.json
+#  For each size a fresh database is generated, then every page query
+#  (queries.PLAN_CHECKS plus the Python-side page work) is timed on a
+#  direct connection, and every page is rerun through Streamlit's
+#  AppTest: once cold (caches cleared) and --repeat times warm. The JSON
+#  output carries the git revision so runs can be compared over time.
+# -------------------------------------------------------------------
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+PAGES = ["Dashboard", "Make Reservation", "Group Booking", "Room Rates", "Add Services", "Delete Services", "Check Out",
+         "Delete Reservation", "Reports", "Night Audit", "Guest Management"]
+
+
+def _timed(fn, repeat):
+    result, times = None, []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return result, times
+
+def _summary(times):
+    return {'runs': len(times), 'median_ms': round(statistics.median(times), 3), 'min_ms': round(min(times), 3)}
+
+def page_workload(conn):
+    """(page, name, callable) for every page query, with parameters taken
+    from the generated data so the lookups hit real rows."""
+    import queries
+    from availability import AvailabilityIndex
+    from guests import page_key, search_guests
+    from occupancy import OccupancyCalendar
+
+    today = date.today()
+    reservation_id = conn.execute(
+        "SELECT reservation_id FROM Reservation WHERE check_out >= DATE('now') ORDER BY reservation_id LIMIT 1"
+    ).fetchone()
+    reservation_id = reservation_id[0] if reservation_id else 1
+    guest_id = conn.execute("SELECT guest_id FROM Reservation WHERE reservation_id = ?", (reservation_id,)).fetchone()
+    guests = search_guests(conn, limit=1000)
+    middle_key = page_key(guests[len(guests) // 2]) if guests else ('', '', 0)
+    month = (str(today - timedelta(days=30)), str(today))
+
+    params = {
+        'RESERVATION_SERVICE_LINES': (reservation_id,),
+        'CHECKOUT_DETAILS': (reservation_id,),
+        'RESERVATION_SERVICE_COUNT': (reservation_id,),
+        'REPORT_RESERVATIONS': month,
+        'reports.SUMMARY_SQL': month,
+        'reports.BREAKDOWN_SQL': month,
+        'guests.DIRECTORY_PAGE_SQL': (*middle_key, 26),
+        'guests.SEARCH_PAGE_SQL': ('"al"*', *middle_key, 26),
+        'GUEST_ACTIVE_RESERVATIONS': (guest_id[0] if guest_id else 1,),
+    }
+    workload = [
+        (page, name, lambda sql=sql, args=params.get(name, args): conn.execute(sql, args).fetchall())
+        for page, name, sql, args in queries.PLAN_CHECKS
+    ]
+    workload += [
+        ("Dashboard", "OccupancyCalendar.load", lambda: OccupancyCalendar.load(conn, today).daily()),
+        ("Make Reservation", "AvailabilityIndex.load", lambda: AvailabilityIndex.load(conn).rooms),
+        ("Make Reservation", "guests.search_guests", lambda: search_guests(conn, 'al', limit=20)),
+    ]
+    return workload
+
+def time_queries(path, repeat):
+    from db import open_connection
+
+    conn = open_connection(path)
+    results = []
+    for page, name, fn in page_workload(conn):
+        rows, times = _timed(fn, repeat)
+        results.append({'kind': 'query', 'page': page, 'name': name,
+                        'rows': len(rows) if hasattr(rows, '__len__') else None, **_summary(times)})
+    conn.close()
+    return results
+
+def time_reruns(directory, repeat):
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    # app.py opens 'final.db' relative to the working directory
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        results = []
+        for page in PAGES:
+            at = AppTest.from_file(APP_PATH, default_timeout=600)
+            at.run()
+            at.sidebar.radio[0].set_value(page)
+            st.cache_resource.clear()
+            st.cache_data.clear()
+            _, cold = _timed(at.run, 1)
+            _, warm = _timed(at.run, repeat)
+            if at.exception:
+                raise RuntimeError(f"{page} raised: {at.exception[0].value}")
+            results.append({'kind': 'rerun', 'page': page, 'name': 'AppTest.run',
+                            'cold_ms': round(cold[0], 3), **_summary(warm)})
+        return results
+    finally:
+        st.cache_resource.clear()
+        st.cache_data.clear()
+        os.chdir(cwd)
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=os.path.dirname(APP_PATH),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    from benchmarks.generate import SIZES, generate
+
+    parser = argparse.ArgumentParser(description="Time every page query and page rerun at several data sizes")
+    parser.add_argument('--sizes', nargs='+', choices=SIZES, default=['small', 'medium'])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-reruns', action='store_true', help="time the queries only, not AppTest")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'seed': args.seed,
+        'results': [],
+    }
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'final.db')
+            started = time.perf_counter()
+            generate(path, seed=args.seed, **SIZES[size])
+            print(f"{size}: generated {', '.join(f'{n:,} {t}' for t, n in SIZES[size].items())} "
+                  f"in {time.perf_counter() - started:.1f}s")
+            results = time_queries(path, args.repeat)
+            if not args.skip_reruns:
+                results += time_reruns(tmp, args.repeat)
+        for result in results:
+            result.update(size=size, **SIZES[size])
+            cold = f"  cold {result['cold_ms']:9.1f} ms" if 'cold_ms' in result else ''
+            print(f"  {result['page']:<20} {result['name']:<36} {result['median_ms']:9.2f} ms{cold}")
+        report['results'] += results
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+# -------------------------------------------------------------------
+#  Revenue snapshot aggregation against row count
+#  python -m benchmarks.snapshot_bench --rows 1000000 5000000
+#  Synthetic settled stays are appended in batches through
+#  snapshot.append, as extract() would add them, then memory-mapped
+#  afresh. Every period x grouping is aggregated. Each result is
+#  checked against a pandas groupby of the same rows. A mismatch, or
+#  any aggregation slower than --budget seconds, exits 1.
+# -------------------------------------------------------------------
+BATCHES = 4
+ROOM_TYPES = ['Single', 'Double', 'Suite', 'Deluxe']
+PAYMENT_METHODS = ['Cash', 'Card', 'Online', 'Bank Transfer']
+MEASURES = ['reservations', 'nights', 'room_revenue', 'service_revenue', 'total_revenue']
+
+
+def fill(path, n_rows, seed=0):
+    import numpy as np
+    import snapshot
+
+    rng = np.random.default_rng(seed)
+    dictionaries = {'room_type': ROOM_TYPES, 'payment_method': PAYMENT_METHODS}
+    per_batch = -(-n_rows // BATCHES)
+    for first in range(0, n_rows, per_batch):
+        n = min(per_batch, n_rows - first)
+        nights = rng.integers(1, 15, n)
+        room_charges = nights * rng.choice([100.0, 150.0, 250.0, 400.0], n)
+        service_charges = rng.integers(0, 40, n) * 5.0
+        snapshot.append(path, {
+            'reservation_id': np.arange(first + 1, first + n + 1),
+            'check_in': np.datetime64('2016-01-01') + rng.integers(0, 10 * 365, n),
+            'nights': nights,
+            'room_type': rng.integers(0, len(ROOM_TYPES), n),
+            'payment_method': rng.integers(0, len(PAYMENT_METHODS), n),
+            'room_charges': room_charges,
+            'service_charges': service_charges,
+            'total': room_charges + service_charges,
+        }, dictionaries)
+
+
+def _expected(frame, by, group):
+    import pandas as pd
+
+    period = {'day': frame['check_in'].dt.normalize(),
+              'week': frame['check_in'].dt.to_period('W-SUN').dt.start_time,
+              'month': frame['check_in'].dt.to_period('M').dt.start_time}[by].rename('period')
+    keys = [period] + ([frame[group]] if group else [])
+    expected = frame.groupby(keys).agg(
+        reservations=('reservation_id', 'size'),
+        nights=('nights', 'sum'),
+        room_revenue=('room_charges', 'sum'),
+        service_revenue=('service_charges', 'sum'),
+        total_revenue=('total', 'sum'),
+    ).reset_index()
+    return expected.round({name: 2 for name in MEASURES})
+
+
+def main(argv=None):
+    import numpy as np
+    import pandas as pd
+    from snapshot import PERIODS, RevenueSnapshot
+
+    parser = argparse.ArgumentParser(description="Revenue snapshot aggregation against row count")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000000, 5000000])
+    parser.add_argument('--budget', type=float, default=1.0, help="seconds allowed per aggregation")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    failed = False
+    for n_rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            fill(tmp, n_rows)
+            snap = RevenueSnapshot.load(tmp)
+            frame = pd.DataFrame({name: np.asarray(values) for name, values in snap.columns.items()})
+            for name in ('room_type', 'payment_method'):
+                frame[name] = np.array(snap.dictionaries[name], dtype=object)[frame[name]]
+            frame['check_in'] = frame['check_in'].astype('datetime64[ns]')
+
+            for by in PERIODS:
+                for group in (None, 'room_type', 'payment_method'):
+                    snap = RevenueSnapshot.load(tmp)
+                    started = time.perf_counter()
+                    got = snap.aggregate(by, group=group)
+                    seconds = time.perf_counter() - started
+                    expected = _expected(frame, by, group)
+                    sort = ['period'] + ([group] if group else [])
+                    got = got.sort_values(sort).reset_index(drop=True)
+                    matches = (len(got) == len(expected)
+                               and all(np.allclose(got[m], expected[m]) for m in MEASURES)
+                               and (got['period'].values == expected['period'].values).all())
+                    ok = matches and seconds <= args.budget
+                    failed |= not ok
+                    results.append({'rows': n_rows, 'by': by, 'group': group, 'groups': len(got),
+                                    'seconds': round(seconds, 4), 'matches': bool(matches)})
+                    print(f"{n_rows:>10,} rows  {by:<5} x {group or '-':<14} {len(got):>7,} groups  "
+                          f"{seconds * 1000:7.1f} ms  {'ok' if ok else 'FAIL'}")
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(results, fh, indent=2)
+    return not failed
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,80 @@
+import sys
+
+# -------------------------------------------------------------------
+#  Billing consistency – Billing.service_charges and total are kept up
+#  to date by triggers (migration 6); this recomputes them from the
+#  ReservationServices ledger and reports or repairs any drift.
+# -------------------------------------------------------------------
+TOLERANCE = 0.005
+
+LEDGER_SQL = """
+    SELECT b.reservation_id,
+           b.service_charges,
+           ROUND(COALESCE(l.ledger_charges, 0), 2) AS ledger_charges,
+           b.total,
+           ROUND(b.room_charges + COALESCE(l.ledger_charges, 0) + b.tax_amount, 2) AS ledger_total
+    FROM Billing b
+    LEFT JOIN (
+        SELECT rs.reservation_id, SUM(rs.quantity * rs.unit_price) AS ledger_charges
+        FROM ReservationServices rs
+        GROUP BY rs.reservation_id
+    ) l ON l.reservation_id = b.reservation_id
+"""
+
+MISMATCH_SQL = f"""
+    SELECT * FROM ({LEDGER_SQL})
+    WHERE ABS(service_charges - ledger_charges) > {TOLERANCE}
+       OR ABS(total - ledger_total) > {TOLERANCE}
+    ORDER BY reservation_id
+"""
+
+MISSING_BILLS_SQL = """
+    SELECT r.reservation_id
+    FROM Reservation r
+    LEFT JOIN Billing b ON b.reservation_id = r.reservation_id
+    WHERE b.reservation_id IS NULL
+    ORDER BY r.reservation_id
+"""
+
+def check(conn):
+    """Return (mismatched bills, reservation ids without a Billing row)."""
+    mismatches = [dict(row) for row in conn.execute(MISMATCH_SQL)]
+    missing = [row[0] for row in conn.execute(MISSING_BILLS_SQL)]
+    return mismatches, missing
+
+def repair(conn):
+    """Reset every drifted bill to its ledger values in one transaction."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        mismatches = [dict(row) for row in conn.execute(MISMATCH_SQL)]
+        conn.executemany(
+            "UPDATE Billing SET service_charges = ?, total = ? WHERE reservation_id = ?",
+            [(m['ledger_charges'], m['ledger_total'], m['reservation_id']) for m in mismatches],
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return mismatches
+
+
+if __name__ == '__main__':
+    # python billing.py [database] [--repair]
+    from db import DB_PATH, open_connection
+    from migrations import migrate
+
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    conn = open_connection(args[0] if args else DB_PATH)
+    migrate(conn)
+    mismatches, missing = check(conn)
+    for m in mismatches:
+        print(f"reservation #{m['reservation_id']}: service_charges {m['service_charges']:.2f} "
+              f"(ledger {m['ledger_charges']:.2f}), total {m['total']:.2f} (ledger {m['ledger_total']:.2f})")
+    for reservation_id in missing:
+        print(f"reservation #{reservation_id}: no Billing row")
+    if mismatches and '--repair' in sys.argv:
+        print(f"repaired {len(repair(conn))} bill(s)")
+    elif not mismatches and not missing:
+        print("Billing matches the service ledger")
+    conn.close()
+    sys.exit(1 if (mismatches and '--repair' not in sys.argv) or missing else 0)
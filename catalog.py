@@ -0,0 +1,55 @@
+from collections import namedtuple
+from types import MappingProxyType
+
+# -------------------------------------------------------------------
+#  Reference-data catalog – RoomType, Room and Services as one immutable
+#  snapshot, so pages look up type names, prices and capacities in
+#  memory instead of joining them into every query. Migration 10 keeps
+#  a 'Catalog' DataVersion counter that only edits to these tables bump
+#  (not room_status changes), so the snapshot is reloaded only then.
+# -------------------------------------------------------------------
+RoomType = namedtuple('RoomType', 'type_id type_name base_price')
+Room = namedtuple('Room', 'room_no type_id type_name room_capacity base_price')
+Service = namedtuple('Service', 'service_id service_name service_price')
+
+CATALOG_VERSION = ['Catalog']
+
+ROOM_TYPES_SQL = "SELECT type_id, type_name, base_price FROM RoomType ORDER BY type_id"
+ROOMS_SQL = "SELECT room_no, type_id, room_capacity FROM Room ORDER BY room_no"
+SERVICES_SQL = "SELECT service_id, service_name, service_price FROM Services ORDER BY service_id"
+
+
+class Catalog:
+    __slots__ = ('room_types', 'rooms', 'services')
+
+    def __init__(self, room_types, rooms, services):
+        # read-only views: the snapshot is shared by every session
+        object.__setattr__(self, 'room_types', MappingProxyType(room_types))
+        object.__setattr__(self, 'rooms', MappingProxyType(rooms))
+        object.__setattr__(self, 'services', MappingProxyType(services))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Catalog snapshots are immutable")
+
+    @classmethod
+    def load(cls, conn):
+        return cls.from_rows(conn.execute(ROOM_TYPES_SQL), conn.execute(ROOMS_SQL),
+                             conn.execute(SERVICES_SQL))
+
+    @classmethod
+    def from_rows(cls, room_types, rooms, services):
+        """Rows of ROOM_TYPES_SQL, ROOMS_SQL and SERVICES_SQL, from any backend."""
+        room_types = {row[0]: RoomType(*row) for row in room_types}
+        by_room = {}
+        for room_no, type_id, room_capacity in rooms:
+            room_type = room_types[type_id]
+            by_room[room_no] = Room(room_no, type_id, room_type.type_name, room_capacity, room_type.base_price)
+        services = {row[0]: Service(*row) for row in services}
+        return cls(room_types, by_room, services)
+
+    def type_name(self, room_no):
+        room = self.rooms.get(room_no)
+        return room.type_name if room else 'Unknown'
+
+    def type_names(self):
+        return sorted({room_type.type_name for room_type in self.room_types.values()})
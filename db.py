@@ -0,0 +1,156 @@
+import sqlite3
+import threading
+from collections import deque
+
+import archive
+from querylog import InstrumentedConnection
+
+# -------------------------------------------------------------------
+#  Connection settings applied to every pooled connection
+# -------------------------------------------------------------------
+DB_PATH = 'final.db'
+
+PRAGMAS = [
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA journal_mode = WAL",          # readers no longer block the writer
+    "PRAGMA synchronous = NORMAL",        # safe with WAL, one fsync per checkpoint
+    "PRAGMA mmap_size = 268435456",       # 256 MB memory-mapped reads
+    "PRAGMA cache_size = -65536",         # 64 MB page cache per connection
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",         # wait up to 5 s for another writer's lock
+]
+
+# sqlite3 keeps an LRU of compiled statements per connection, so pooled
+# connections reuse the prepared statements of earlier reruns.
+STATEMENT_CACHE_SIZE = 256
+
+
+def open_connection(path=DB_PATH, query_log=None):
+    conn = sqlite3.connect(
+        path,
+        isolation_level=None,             # autocommit, as before
+        check_same_thread=False,          # connections move between script threads
+        cached_statements=STATEMENT_CACHE_SIZE,
+        factory=InstrumentedConnection if query_log is not None else sqlite3.Connection,
+    )
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    archive.attach(conn, path)            # settled history, see archive.py
+    if query_log is not None:
+        conn.query_log = query_log
+    return conn
+
+
+def data_version(conn, tables):
+    """Write counters of the given tables (see the DataVersion migration).
+
+    The tuple changes whenever any row of those tables is written, from
+    any connection or process, so it makes a cheap cache key.
+    """
+    placeholders = ', '.join('?' * len(tables))
+    rows = dict(conn.execute(
+        f"SELECT table_name, version FROM DataVersion WHERE table_name IN ({placeholders})",
+        tuple(tables),
+    ).fetchall())
+    return tuple(rows.get(table, 0) for table in tables)
+
+
+class CacheCounter:
+    """Request/miss counts for a cache keyed on data_version()."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.misses = 0
+
+    def request(self):
+        with self._lock:
+            self.requests += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def stats(self):
+        with self._lock:
+            hits = max(self.requests - self.misses, 0)
+            return {
+                'hits': hits,
+                'misses': self.misses,
+                'hit_rate': hits / self.requests if self.requests else 0.0,
+            }
+
+
+# -------------------------------------------------------------------
+#  Connection pool – one checked-out connection per thread. connect()
+#  opens a new one (open_connection on path by default; the MySQL
+#  backend passes mysql.connector.connect).
+# -------------------------------------------------------------------
+class ConnectionPool:
+    def __init__(self, path=DB_PATH, max_idle=16, query_log=None, connect=None):
+        self.path = path
+        self.max_idle = max_idle
+        self.query_log = query_log
+        self.connect = connect or (lambda: open_connection(self.path, self.query_log))
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.opened = 0
+
+    def connection(self):
+        # A thread that already holds a connection (e.g. after st.rerun()
+        # skipped the release at the bottom of the script) gets it back.
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            with self._lock:
+                self.hits += 1
+            return conn
+
+        with self._lock:
+            if self._idle:
+                conn = self._idle.pop()
+                self.hits += 1
+            else:
+                self.misses += 1
+                self.opened += 1
+        if conn is None:
+            try:
+                conn = self.connect()
+            except Exception:
+                with self._lock:
+                    self.opened -= 1
+                raise
+        self._local.conn = conn
+        return conn
+
+    def release(self, conn):
+        if getattr(self._local, 'conn', None) is conn:
+            self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+            self.opened -= 1
+        conn.close()
+
+    def stats(self):
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'open': self.opened,
+                'idle': len(self._idle),
+            }
+
+    def close_all(self):
+        with self._lock:
+            while self._idle:
+                self._idle.pop().close()
+                self.opened -= 1
@@ -0,0 +1,97 @@
+import csv
+import io
+import tempfile
+
+import queries
+
+# -------------------------------------------------------------------
+#  Streaming report export – rows leave the cursor in fixed-size chunks
+#  and are written straight to the output, so memory stays bounded by
+#  the chunk size instead of growing with the date range.
+# -------------------------------------------------------------------
+CHUNK_ROWS = 5000
+
+try:
+    import openpyxl                  # optional: only needed for Excel export
+except ImportError:
+    openpyxl = None
+
+EXCEL_AVAILABLE = openpyxl is not None
+
+
+def iter_report_chunks(conn, start, end, chunk_size=CHUNK_ROWS):
+    """Yield (columns, rows) for the Reports query, chunk_size rows at a time."""
+    cursor = conn.execute(queries.REPORT_RESERVATIONS, (start, end))
+    columns = [d[0] for d in cursor.description]
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield columns, rows
+    finally:
+        cursor.close()
+
+def iter_csv(chunks):
+    """Yield (columns, rows) chunks as UTF-8 CSV bytes, header first."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header_written = False
+    for columns, rows in chunks:
+        if not header_written:
+            writer.writerow(columns)
+            header_written = True
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if not header_written:
+        yield b''
+
+def write_csv(out, chunks):
+    for chunk in iter_csv(chunks):
+        out.write(chunk)
+
+def write_xlsx(out, chunks):
+    if openpyxl is None:
+        raise RuntimeError("Excel export needs openpyxl (pip install openpyxl)")
+    # write_only workbooks stream rows to a temp file as they are appended
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Reservations")
+    header_written = False
+    for columns, rows in chunks:
+        if not header_written:
+            sheet.append(columns)
+            header_written = True
+        for row in rows:
+            sheet.append(tuple(row))
+    workbook.save(out)
+
+EXPORT_FORMATS = {
+    'CSV': (write_csv, 'csv', 'text/csv'),
+    'Excel': (write_xlsx, 'xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+def export_report(conn, start, end, fmt='CSV', chunk_size=CHUNK_ROWS):
+    """Write the report into an anonymous temporary file and return it rewound."""
+    return export_chunks(iter_report_chunks(conn, start, end, chunk_size), fmt)
+
+def export_chunks(chunks, fmt='CSV'):
+    """Write (columns, rows) chunks, e.g. a backend's report_chunks(), as for
+    export_report.
+
+    The raw (unbuffered) file object is returned because st.download_button
+    accepts io.RawIOBase; writes still go through a buffer while exporting.
+    """
+    writer = EXPORT_FORMATS[fmt][0]
+    raw = tempfile.TemporaryFile(buffering=0)
+    out = io.BufferedRandom(raw)
+    try:
+        writer(out, chunks)
+        out.flush()
+    except Exception:
+        out.close()
+        raise
+    out.detach()
+    raw.seek(0)
+    return raw
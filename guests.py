@@ -0,0 +1,55 @@
+import re
+
+# -------------------------------------------------------------------
+#  Guest directory – FTS5 search (migration 8) with keyset pagination
+#  on (guest_Lname, guest_Fname, guest_id): each page seeks past the
+#  last row of the previous one, so only one page is ever read.
+# -------------------------------------------------------------------
+PAGE_SIZE = 25
+
+DIRECTORY_PAGE_SQL = """
+    SELECT * FROM Guest
+    WHERE (guest_Lname, guest_Fname, guest_id) > (?, ?, ?)
+    ORDER BY guest_Lname, guest_Fname, guest_id
+    LIMIT ?
+"""
+
+SEARCH_PAGE_SQL = """
+    SELECT g.* FROM Guest g
+    WHERE g.guest_id IN (SELECT rowid FROM GuestSearch WHERE GuestSearch MATCH ?)
+    AND (g.guest_Lname, g.guest_Fname, g.guest_id) > (?, ?, ?)
+    ORDER BY g.guest_Lname, g.guest_Fname, g.guest_id
+    LIMIT ?
+"""
+
+GUEST_SQL = "SELECT * FROM Guest WHERE guest_id = ?"
+HAS_GUESTS_SQL = "SELECT EXISTS (SELECT 1 FROM Guest)"
+
+# Sorts before every real (guest_Lname, guest_Fname, guest_id)
+FIRST_PAGE = ('', '', 0)
+
+def match_expression(text):
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    words = re.findall(r'\w+', text or '')
+    return ' '.join(f'"{word}"*' for word in words)
+
+def page_key(guest):
+    return (guest['guest_Lname'], guest['guest_Fname'], guest['guest_id'])
+
+def search_guests(conn, text='', after=FIRST_PAGE, limit=PAGE_SIZE):
+    """One page of guests after the keyset `after`, optionally filtered by text."""
+    after = tuple(after or FIRST_PAGE)
+    match = match_expression(text)
+    if match:
+        return conn.execute(SEARCH_PAGE_SQL, (match, *after, limit)).fetchall()
+    return conn.execute(DIRECTORY_PAGE_SQL, (*after, limit)).fetchall()
+
+def get_guest(conn, guest_id):
+    row = conn.execute(GUEST_SQL, (guest_id,)).fetchone()
+    return dict(row) if row else None
+
+def has_guests(conn):
+    return bool(conn.execute(HAS_GUESTS_SQL).fetchone()[0])
+
+def guest_label(guest):
+    return f"{guest['guest_Lname']}, {guest['guest_Fname']} ({guest['guest_email']}) #{guest['guest_id']}"
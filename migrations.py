@@ -0,0 +1,763 @@
+import logging
+import sqlite3
+
+import archive
+import rates
+import reports
+import room_nights
+
+# -------------------------------------------------------------------
+#  Schema migrations – the applied version lives in PRAGMA user_version
+# -------------------------------------------------------------------
+MIGRATIONS = []
+
+log = logging.getLogger(__name__)
+
+def migration(version, description):
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+def current_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def latest_version():
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+def migrate(conn):
+    """Apply every pending migration, each one in its own transaction.
+
+    Returns the list of versions applied; empty when the database is current.
+    The attached archive database is then brought in line with the schema.
+    """
+    applied = []
+    for version, description, fn in MIGRATIONS:
+        if current_version(conn) >= latest_version():
+            break
+        # BEGIN IMMEDIATE takes the write lock up front, so two processes
+        # starting together cannot both apply the same migration.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if current_version(conn) >= version:
+                conn.execute("COMMIT")
+                continue
+            fn(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        applied.append(version)
+    archive.ensure_schema(conn)
+    return applied
+
+
+# -------------------------------------------------------------------
+#  1 – base schema and default data (formerly init_db)
+# -------------------------------------------------------------------
+@migration(1, "base schema")
+def _base_schema(c):
+    # RoomType table
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS RoomType (
+            type_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            type_name TEXT NOT NULL,
+            base_price REAL NOT NULL
+        )
+    ''')
+
+    # Room table
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS Room (
+            room_no INTEGER PRIMARY KEY,
+            type_id INTEGER NOT NULL,
+            room_status TEXT NOT NULL DEFAULT 'vacant',
+            FOREIGN KEY (type_id) REFERENCES RoomType(type_id)
+        )
+    ''')
+
+    # Guest table
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS Guest (
+            guest_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guest_Fname TEXT NOT NULL,
+            guest_Lname TEXT NOT NULL,
+            guest_email TEXT NOT NULL UNIQUE,
+            CNIC TEXT NOT NULL UNIQUE,
+            age INTEGER NOT NULL,
+            gender TEXT NOT NULL,
+            City TEXT
+        )
+    ''')
+
+    # Reservation table
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS Reservation (
+            reservation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            reservation_date TEXT NOT NULL,
+            guest_id INTEGER NOT NULL,
+            room_no INTEGER NOT NULL,
+            check_in TEXT NOT NULL,
+            check_out TEXT NOT NULL,
+            adults INTEGER NOT NULL,
+            children INTEGER NOT NULL,
+            FOREIGN KEY (guest_id) REFERENCES Guest(guest_id),
+            FOREIGN KEY (room_no) REFERENCES Room(room_no)
+        )
+    ''')
+
+    # Billing table
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS Billing (
+            reservation_id INTEGER PRIMARY KEY,
+            room_charges REAL NOT NULL DEFAULT 0,
+            service_charges REAL NOT NULL DEFAULT 0,
+            total REAL NOT NULL DEFAULT 0,
+            payment_status TEXT NOT NULL DEFAULT 'pending',
+            payment_method TEXT,
+            payment_date TEXT,
+            FOREIGN KEY (reservation_id) REFERENCES Reservation(reservation_id)
+        )
+    ''')
+
+    # Services table
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS Services (
+            service_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            service_name TEXT NOT NULL,
+            service_price REAL NOT NULL
+        )
+    ''')
+
+    # ReservationServices table (junction)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS ReservationServices (
+            res_service_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            reservation_id INTEGER NOT NULL,
+            service_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 1,
+            service_date TEXT NOT NULL,
+            FOREIGN KEY (reservation_id) REFERENCES Reservation(reservation_id),
+            FOREIGN KEY (service_id) REFERENCES Services(service_id)
+        )
+    ''')
+
+    # Insert default room types if they don't exist
+    c.execute("SELECT COUNT(*) FROM RoomType")
+    if c.fetchone()[0] == 0:
+        c.executemany(
+            "INSERT INTO RoomType (type_name, base_price) VALUES (?, ?)",
+            [('Single', 100), ('Double', 150), ('Suite', 250)]
+        )
+
+    # Insert default services if they don't exist
+    c.execute("SELECT COUNT(*) FROM Services")
+    if c.fetchone()[0] == 0:
+        c.executemany(
+            "INSERT INTO Services (service_name, service_price) VALUES (?, ?)",
+            [('Breakfast', 15), ('Lunch', 25), ('Dinner', 35), ('Spa', 50), ('Parking', 10)]
+        )
+
+    # Insert a few sample rooms if none exist
+    c.execute("SELECT COUNT(*) FROM Room")
+    if c.fetchone()[0] == 0:
+        # Get type ids
+        c.execute("SELECT type_id FROM RoomType WHERE type_name = 'Single'")
+        single_id = c.fetchone()[0]
+        c.execute("SELECT type_id FROM RoomType WHERE type_name = 'Double'")
+        double_id = c.fetchone()[0]
+        c.execute("SELECT type_id FROM RoomType WHERE type_name = 'Suite'")
+        suite_id = c.fetchone()[0]
+
+        rooms_data = [
+            (101, single_id, 'vacant'),
+            (102, single_id, 'vacant'),
+            (201, double_id, 'vacant'),
+            (202, double_id, 'vacant'),
+            (301, suite_id, 'vacant'),
+        ]
+        c.executemany(
+            "INSERT INTO Room (room_no, type_id, room_status) VALUES (?, ?, ?)",
+            rooms_data
+        )
+
+
+# -------------------------------------------------------------------
+#  2 – columns from final.sql: room capacity, tax, room last_updated
+# -------------------------------------------------------------------
+@migration(2, "room_capacity, tax_amount, last_updated")
+def _final_sql_columns(c):
+    c.execute("ALTER TABLE Room ADD COLUMN room_capacity INTEGER NOT NULL DEFAULT 2 CHECK (room_capacity > 0)")
+    c.execute('''
+        UPDATE Room SET room_capacity = CASE
+            (SELECT type_name FROM RoomType rt WHERE rt.type_id = Room.type_id)
+            WHEN 'Single' THEN 1
+            WHEN 'Suite' THEN 4
+            ELSE 2
+        END
+    ''')
+
+    # SQLite cannot ADD COLUMN with a CURRENT_TIMESTAMP default, so backfill
+    # and keep it current with a trigger (MySQL's ON UPDATE CURRENT_TIMESTAMP).
+    c.execute("ALTER TABLE Room ADD COLUMN last_updated TEXT")
+    c.execute("UPDATE Room SET last_updated = DATETIME('now')")
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_room_last_updated
+        AFTER UPDATE OF room_status, type_id, room_capacity ON Room
+        FOR EACH ROW
+        BEGIN
+            UPDATE Room SET last_updated = DATETIME('now') WHERE room_no = NEW.room_no;
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_room_created
+        AFTER INSERT ON Room
+        FOR EACH ROW WHEN NEW.last_updated IS NULL
+        BEGIN
+            UPDATE Room SET last_updated = DATETIME('now') WHERE room_no = NEW.room_no;
+        END
+    ''')
+
+    c.execute("ALTER TABLE Billing ADD COLUMN tax_amount REAL NOT NULL DEFAULT 0")
+
+
+
+# -------------------------------------------------------------------
+#  3 – secondary indexes for the reservation hot paths
+#  (checked by `python queries.py`)
+# -------------------------------------------------------------------
+@migration(3, "reservation hot-path indexes")
+def _hot_path_indexes(c):
+    # Make Reservation overlap check: room equality, then a covered date range
+    c.execute("CREATE INDEX IF NOT EXISTS idx_reservation_room_dates ON Reservation(room_no, check_in, check_out)")
+    # check_out >= DATE('now') filters on Dashboard, services and delete pages
+    c.execute("CREATE INDEX IF NOT EXISTS idx_reservation_check_out ON Reservation(check_out)")
+    # Reports: check_in BETWEEN ? AND ?
+    c.execute("CREATE INDEX IF NOT EXISTS idx_reservation_check_in ON Reservation(check_in)")
+    # Guest lookups and the delete-guest active reservation count
+    c.execute("CREATE INDEX IF NOT EXISTS idx_reservation_guest ON Reservation(guest_id, check_out)")
+    # Covers the per-reservation service charge sum
+    c.execute("CREATE INDEX IF NOT EXISTS idx_resservices_reservation ON ReservationServices(reservation_id, service_id, quantity)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_billing_payment_status ON Billing(payment_status)")
+    # Guest Management directory order
+    c.execute("CREATE INDEX IF NOT EXISTS idx_guest_name ON Guest(guest_Lname, guest_Fname)")
+
+
+
+# -------------------------------------------------------------------
+#  4 – RoomNight ledger: a UNIQUE (room_no, night) row per booked night
+#  makes double-booking a constraint violation inside the database
+# -------------------------------------------------------------------
+NIGHTS_OF_NEW = """
+    WITH RECURSIVE nights(night) AS (
+        SELECT NEW.check_in
+        UNION ALL
+        SELECT DATE(night, '+1 day') FROM nights WHERE DATE(night, '+1 day') < NEW.check_out
+    )
+    SELECT NEW.room_no, night, NEW.reservation_id FROM nights WHERE night < NEW.check_out
+"""
+
+@migration(4, "RoomNight ledger")
+def _room_night_ledger(c):
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS RoomNight (
+            room_no INTEGER NOT NULL,
+            night TEXT NOT NULL,
+            reservation_id INTEGER NOT NULL,
+            PRIMARY KEY (room_no, night),
+            FOREIGN KEY (room_no) REFERENCES Room(room_no),
+            FOREIGN KEY (reservation_id) REFERENCES Reservation(reservation_id)
+        ) WITHOUT ROWID
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_roomnight_reservation ON RoomNight(reservation_id)")
+
+    conflicts = room_nights.backfill(c)
+    if conflicts:
+        # Existing double-bookings are kept as they are; the ledger holds
+        # the earliest reservation. `python room_nights.py` lists them.
+        log.warning("RoomNight backfill: %d reservation(s) overlap an earlier booking: #%s",
+                    len(conflicts), ', #'.join(str(conflict[0]) for conflict in conflicts))
+
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_room_nights_insert
+        AFTER INSERT ON Reservation
+        FOR EACH ROW
+        BEGIN
+            INSERT INTO RoomNight (room_no, night, reservation_id) {NIGHTS_OF_NEW};
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_room_nights_amend
+        AFTER UPDATE OF room_no, check_in, check_out ON Reservation
+        FOR EACH ROW
+        BEGIN
+            DELETE FROM RoomNight WHERE reservation_id = OLD.reservation_id;
+            INSERT INTO RoomNight (room_no, night, reservation_id) {NIGHTS_OF_NEW};
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_room_nights_delete
+        BEFORE DELETE ON Reservation
+        FOR EACH ROW
+        BEGIN
+            DELETE FROM RoomNight WHERE reservation_id = OLD.reservation_id;
+        END
+    ''')
+
+
+
+# -------------------------------------------------------------------
+#  5 – DataVersion: per-table write counters bumped by triggers, so
+#  cached views can tell when the rows behind them have changed
+# -------------------------------------------------------------------
+VERSIONED_TABLES = ['Reservation', 'Billing', 'Room']
+
+def _version_triggers(c, tables):
+    for table in tables:
+        c.execute("INSERT OR IGNORE INTO DataVersion (table_name, version) VALUES (?, 0)", (table,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            c.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_version_{table.lower()}_{event.lower()}
+                AFTER {event} ON {table}
+                FOR EACH ROW
+                BEGIN
+                    UPDATE DataVersion SET version = version + 1 WHERE table_name = '{table}';
+                END
+            ''')
+
+@migration(5, "DataVersion write counters")
+def _data_version(c):
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS DataVersion (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    _version_triggers(c, VERSIONED_TABLES)
+
+
+
+# -------------------------------------------------------------------
+#  6 – billing triggers: SQLite versions of final.sql's trg_create_bill
+#  and trg_update_service_charges(_after_delete). Each applies an O(1)
+#  delta to Billing inside the statement that wrote the service line.
+# -------------------------------------------------------------------
+SERVICE_LINE_AMOUNT = "{row}.quantity * (SELECT service_price FROM Services WHERE service_id = {row}.service_id)"
+
+def _service_delta_sql(row, sign):
+    amount = SERVICE_LINE_AMOUNT.format(row=row)
+    return f"""
+        UPDATE Billing
+        SET service_charges = ROUND(service_charges {sign} {amount}, 2),
+            total = ROUND(total {sign} {amount}, 2)
+        WHERE reservation_id = {row}.reservation_id;
+    """
+
+@migration(6, "billing triggers")
+def _billing_triggers(c):
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_create_bill
+        AFTER INSERT ON Reservation
+        FOR EACH ROW
+        BEGIN
+            INSERT INTO Billing (reservation_id, room_charges, service_charges, total)
+            SELECT NEW.reservation_id, charges, 0, charges
+            FROM (
+                SELECT ROUND(rt.base_price * (JULIANDAY(NEW.check_out) - JULIANDAY(NEW.check_in)), 2) AS charges
+                FROM Room r
+                JOIN RoomType rt ON r.type_id = rt.type_id
+                WHERE r.room_no = NEW.room_no
+            );
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_update_service_charges
+        AFTER INSERT ON ReservationServices
+        FOR EACH ROW
+        BEGIN
+            {_service_delta_sql('NEW', '+')}
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_update_service_charges_after_delete
+        AFTER DELETE ON ReservationServices
+        FOR EACH ROW
+        BEGIN
+            {_service_delta_sql('OLD', '-')}
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_update_service_charges_after_update
+        AFTER UPDATE OF reservation_id, service_id, quantity ON ReservationServices
+        FOR EACH ROW
+        BEGIN
+            {_service_delta_sql('OLD', '-')}
+            {_service_delta_sql('NEW', '+')}
+        END
+    ''')
+    # Re-priced stays (amendments, rate changes) carry through to the total
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_billing_room_charges
+        AFTER UPDATE OF room_charges, tax_amount ON Billing
+        FOR EACH ROW
+        BEGIN
+            UPDATE Billing
+            SET total = ROUND(total + (NEW.room_charges - OLD.room_charges) + (NEW.tax_amount - OLD.tax_amount), 2)
+            WHERE reservation_id = NEW.reservation_id;
+        END
+    ''')
+
+
+
+# -------------------------------------------------------------------
+#  7 – DailyRevenue rollup for the Reports page, keyed by check-in day,
+#  room type and payment method ('' while unpaid). Each Billing write is
+#  applied as an upsert of its old row negated and its new row added.
+# -------------------------------------------------------------------
+def _rollup_upsert(bill, sign, source):
+    return f"""
+        INSERT INTO DailyRevenue (day, type_id, payment_method, reservations, paid, pending,
+                                  room_charges, service_charges, total)
+        SELECT day, type_id, COALESCE({bill}.payment_method, ''),
+               {sign}1,
+               {sign}({bill}.payment_status = 'paid'),
+               {sign}({bill}.payment_status = 'pending'),
+               {sign}{bill}.room_charges,
+               {sign}{bill}.service_charges,
+               {sign}{bill}.total
+        {source}
+        ON CONFLICT (day, type_id, payment_method) DO UPDATE SET
+            reservations = reservations + excluded.reservations,
+            paid = paid + excluded.paid,
+            pending = pending + excluded.pending,
+            room_charges = ROUND(room_charges + excluded.room_charges, 2),
+            service_charges = ROUND(service_charges + excluded.service_charges, 2),
+            total = ROUND(total + excluded.total, 2);
+    """
+
+def _bill_key(bill):
+    # Day and room type of the reservation a Billing row belongs to
+    return f"""
+        FROM (SELECT r.check_in AS day, rm.type_id
+              FROM Reservation r JOIN Room rm ON rm.room_no = r.room_no
+              WHERE r.reservation_id = {bill}.reservation_id)
+        WHERE true
+    """
+
+def _moved_key(stay):
+    # Day and room type a reservation had before/after an amendment
+    return f"""
+        FROM Billing b, (SELECT {stay}.check_in AS day, type_id FROM Room WHERE room_no = {stay}.room_no)
+        WHERE b.reservation_id = {stay}.reservation_id
+    """
+
+@migration(7, "DailyRevenue rollup")
+def _daily_revenue(c):
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS DailyRevenue (
+            day TEXT NOT NULL,
+            type_id INTEGER NOT NULL,
+            payment_method TEXT NOT NULL DEFAULT '',
+            reservations INTEGER NOT NULL DEFAULT 0,
+            paid INTEGER NOT NULL DEFAULT 0,
+            pending INTEGER NOT NULL DEFAULT 0,
+            room_charges REAL NOT NULL DEFAULT 0,
+            service_charges REAL NOT NULL DEFAULT 0,
+            total REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, type_id, payment_method)
+        ) WITHOUT ROWID
+    ''')
+    reports.rebuild(c)
+
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_daily_revenue_insert
+        AFTER INSERT ON Billing
+        FOR EACH ROW
+        BEGIN
+            {_rollup_upsert('NEW', '', _bill_key('NEW'))}
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_daily_revenue_update
+        AFTER UPDATE OF room_charges, service_charges, total, payment_status, payment_method ON Billing
+        FOR EACH ROW
+        BEGIN
+            {_rollup_upsert('OLD', '-', _bill_key('OLD'))}
+            {_rollup_upsert('NEW', '', _bill_key('NEW'))}
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_daily_revenue_delete
+        AFTER DELETE ON Billing
+        FOR EACH ROW
+        BEGIN
+            {_rollup_upsert('OLD', '-', _bill_key('OLD'))}
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_daily_revenue_amend
+        AFTER UPDATE OF check_in, room_no ON Reservation
+        FOR EACH ROW
+        BEGIN
+            {_rollup_upsert('b', '-', _moved_key('OLD'))}
+            {_rollup_upsert('b', '', _moved_key('NEW'))}
+        END
+    ''')
+
+
+
+# -------------------------------------------------------------------
+#  8 – GuestSearch: FTS5 index over name, email, CNIC and city, kept in
+#  step with Guest by triggers (external-content table, no copy of rows)
+# -------------------------------------------------------------------
+GUEST_SEARCH_COLUMNS = "guest_Fname, guest_Lname, guest_email, CNIC, City"
+
+@migration(8, "GuestSearch full-text index")
+def _guest_search(c):
+    c.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS GuestSearch USING fts5(
+            {GUEST_SEARCH_COLUMNS},
+            content='Guest', content_rowid='guest_id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+    ''')
+    c.execute("INSERT INTO GuestSearch (GuestSearch) VALUES ('rebuild')")
+
+    new_row = f"new.guest_id, new.{GUEST_SEARCH_COLUMNS.replace(', ', ', new.')}"
+    old_row = f"old.guest_id, old.{GUEST_SEARCH_COLUMNS.replace(', ', ', old.')}"
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_guest_search_insert
+        AFTER INSERT ON Guest
+        BEGIN
+            INSERT INTO GuestSearch (rowid, {GUEST_SEARCH_COLUMNS}) VALUES ({new_row});
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_guest_search_delete
+        AFTER DELETE ON Guest
+        BEGIN
+            INSERT INTO GuestSearch (GuestSearch, rowid, {GUEST_SEARCH_COLUMNS}) VALUES ('delete', {old_row});
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_guest_search_update
+        AFTER UPDATE OF {GUEST_SEARCH_COLUMNS} ON Guest
+        BEGIN
+            INSERT INTO GuestSearch (GuestSearch, rowid, {GUEST_SEARCH_COLUMNS}) VALUES ('delete', {old_row});
+            INSERT INTO GuestSearch (rowid, {GUEST_SEARCH_COLUMNS}) VALUES ({new_row});
+        END
+    ''')
+
+
+
+# -------------------------------------------------------------------
+#  9 – DataVersion counters for the remaining tables the page queries
+#  read, so every cached result has a complete version key
+# -------------------------------------------------------------------
+@migration(9, "DataVersion for Guest, ReservationServices, Services, RoomType")
+def _cache_versions(c):
+    _version_triggers(c, ['Guest', 'ReservationServices', 'Services', 'RoomType'])
+
+
+# -------------------------------------------------------------------
+#  10 – 'Catalog' DataVersion counter for the reference-data snapshot
+#  (catalog.py): bumped by edits to RoomType, Services and Room, except
+#  the room_status/last_updated churn of day-to-day operation
+# -------------------------------------------------------------------
+CATALOG_EVENTS = [
+    ('roomtype', 'INSERT ON RoomType'),
+    ('roomtype', 'UPDATE ON RoomType'),
+    ('roomtype', 'DELETE ON RoomType'),
+    ('services', 'INSERT ON Services'),
+    ('services', 'UPDATE ON Services'),
+    ('services', 'DELETE ON Services'),
+    ('room', 'INSERT ON Room'),
+    ('room', 'UPDATE OF room_no, type_id, room_capacity ON Room'),
+    ('room', 'DELETE ON Room'),
+]
+
+@migration(10, "Catalog version counter")
+def _catalog_version(c):
+    c.execute("INSERT OR IGNORE INTO DataVersion (table_name, version) VALUES ('Catalog', 0)")
+    for table, event in CATALOG_EVENTS:
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_catalog_version_{table}_{event.split()[0].lower()}
+            AFTER {event}
+            FOR EACH ROW
+            BEGIN
+                UPDATE DataVersion SET version = version + 1 WHERE table_name = 'Catalog';
+            END
+        ''')
+
+
+# -------------------------------------------------------------------
+#  11 – night audit (night_audit.py): a run log, the RoomCharge folio of
+#  posted room-nights and an overdue flag on unpaid bills
+# -------------------------------------------------------------------
+@migration(11, "night audit")
+def _night_audit(c):
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS NightAudit (
+            audit_date TEXT PRIMARY KEY,
+            run_at TEXT NOT NULL,
+            settled INTEGER NOT NULL DEFAULT 0,
+            rooms_occupied INTEGER NOT NULL DEFAULT 0,
+            rooms_changed INTEGER NOT NULL DEFAULT 0,
+            nights_posted INTEGER NOT NULL DEFAULT 0,
+            room_revenue REAL NOT NULL DEFAULT 0,
+            overdue INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS RoomCharge (
+            reservation_id INTEGER NOT NULL,
+            night TEXT NOT NULL,
+            room_no INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            PRIMARY KEY (reservation_id, night)
+        ) WITHOUT ROWID
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_roomcharge_night ON RoomCharge(night)")
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_room_charges_delete
+        BEFORE DELETE ON Reservation
+        FOR EACH ROW
+        BEGIN
+            DELETE FROM RoomCharge WHERE reservation_id = OLD.reservation_id;
+        END
+    ''')
+    c.execute("ALTER TABLE Billing ADD COLUMN overdue_since TEXT")
+
+
+# -------------------------------------------------------------------
+#  12 – RateCalendar: per-date prices by room type (rates.py). New bills
+#  are priced night by night, at base_price where no rate is set; bills
+#  already written keep their price. 'RateCalendar' gets its own
+#  DataVersion counter so quotes are rebuilt without the Catalog.
+# -------------------------------------------------------------------
+@migration(12, "rate calendar")
+def _rate_calendar(c):
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS RateCalendar (
+            type_id INTEGER NOT NULL,
+            rate_date TEXT NOT NULL,
+            price REAL NOT NULL CHECK (price >= 0),
+            PRIMARY KEY (type_id, rate_date),
+            FOREIGN KEY (type_id) REFERENCES RoomType(type_id)
+        ) WITHOUT ROWID
+    ''')
+    _version_triggers(c, ['RateCalendar'])
+    c.execute("DROP TRIGGER IF EXISTS trg_create_bill")
+    c.execute(f'''
+        CREATE TRIGGER trg_create_bill
+        AFTER INSERT ON Reservation
+        FOR EACH ROW
+        BEGIN
+            INSERT INTO Billing (reservation_id, room_charges, service_charges, total)
+            SELECT NEW.reservation_id, charges, 0, charges
+            FROM (
+                SELECT {rates.STAY_PRICE_SQL.format(check_in='NEW.check_in', check_out='NEW.check_out')} AS charges
+                FROM Room r
+                JOIN RoomType rt ON r.type_id = rt.type_id
+                WHERE r.room_no = NEW.room_no
+            );
+        END
+    ''')
+
+# -------------------------------------------------------------------
+#  13 – service lines keep the price they were posted at: unit_price is
+#  stamped from Services on insert (writers may also pass it), and the
+#  migration 6 triggers are rebuilt to bill and un-bill at that stored
+#  price, so a later price change no longer drifts existing bills.
+# -------------------------------------------------------------------
+LINE_PRICE_SQL = """
+    UPDATE {schema}.ReservationServices
+    SET unit_price = (SELECT service_price FROM main.Services s WHERE s.service_id = ReservationServices.service_id)
+"""
+STORED_LINE_AMOUNT = "{row}.quantity * COALESCE({row}.unit_price, (SELECT service_price FROM Services WHERE service_id = {row}.service_id))"
+
+def _stored_delta_sql(row, sign):
+    amount = STORED_LINE_AMOUNT.format(row=row)
+    return f"""
+        UPDATE Billing
+        SET service_charges = ROUND(service_charges {sign} {amount}, 2),
+            total = ROUND(total {sign} {amount}, 2)
+        WHERE reservation_id = {row}.reservation_id;
+    """
+
+@migration(13, "service line unit prices")
+def _service_line_prices(c):
+    c.execute("ALTER TABLE ReservationServices ADD COLUMN unit_price REAL")
+    c.execute(LINE_PRICE_SQL.format(schema='main'))
+    # Lines already archived are priced the same way (the history file may
+    # already have the column when final.db was restored from a backup)
+    archived = [row[1] for row in c.execute("PRAGMA archive.table_info(ReservationServices)")]
+    if archived:
+        if 'unit_price' not in archived:
+            c.execute("ALTER TABLE archive.ReservationServices ADD COLUMN unit_price REAL")
+        c.execute(LINE_PRICE_SQL.format(schema='archive') + " WHERE unit_price IS NULL")
+    for suffix in ('', '_after_delete', '_after_update'):
+        c.execute(f"DROP TRIGGER IF EXISTS trg_update_service_charges{suffix}")
+    c.execute('''
+        CREATE TRIGGER trg_service_line_price
+        AFTER INSERT ON ReservationServices
+        FOR EACH ROW WHEN NEW.unit_price IS NULL
+        BEGIN
+            UPDATE ReservationServices
+            SET unit_price = (SELECT service_price FROM Services WHERE service_id = NEW.service_id)
+            WHERE res_service_id = NEW.res_service_id;
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER trg_update_service_charges
+        AFTER INSERT ON ReservationServices
+        FOR EACH ROW
+        BEGIN
+            {_stored_delta_sql('NEW', '+')}
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER trg_update_service_charges_after_delete
+        AFTER DELETE ON ReservationServices
+        FOR EACH ROW
+        BEGIN
+            {_stored_delta_sql('OLD', '-')}
+        END
+    ''')
+    # The insert-time stamp (OLD.unit_price IS NULL) is already billed
+    c.execute(f'''
+        CREATE TRIGGER trg_update_service_charges_after_update
+        AFTER UPDATE OF reservation_id, service_id, quantity, unit_price ON ReservationServices
+        FOR EACH ROW WHEN OLD.unit_price IS NOT NULL
+        BEGIN
+            {_stored_delta_sql('OLD', '-')}
+            {_stored_delta_sql('NEW', '+')}
+        END
+    ''')
+
+
+# -------------------------------------------------------------------
+#  14 – room_locked: a stay booked into a room the clerk chose keeps it;
+#  assignment.plan only moves the unlocked ones (best-fit and group
+#  bookings). Future stays already booked were picked by hand, so they
+#  start locked.
+# -------------------------------------------------------------------
+@migration(14, "room locks")
+def _room_locks(c):
+    c.execute("ALTER TABLE Reservation ADD COLUMN room_locked INTEGER NOT NULL DEFAULT 0")
+    c.execute("UPDATE Reservation SET room_locked = 1 WHERE check_in > DATE('now')")
+
+
+if __name__ == '__main__':
+    from db import DB_PATH, open_connection
+
+    logging.basicConfig(format='%(message)s')
+    conn = open_connection(DB_PATH)
+    before = current_version(conn)
+    applied = migrate(conn)
+    print(f"schema version {before} -> {current_version(conn)}"
+          + (f" (applied {', '.join(map(str, applied))})" if applied else " (up to date)"))
+    conn.close()
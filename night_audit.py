@@ -0,0 +1,159 @@
+import json
+import sys
+import time
+
+# -------------------------------------------------------------------
+#  Night audit – closes a business day for the whole hotel in a handful
+#  of set-based statements inside one transaction:
+#    1. settle the selected checkouts
+#    2. recompute Room.room_status from the stays holding that night
+#    3. post each stay's room-nights to the RoomCharge folio
+#    4. flag unpaid bills whose stay has ended as overdue
+#  and logs the run in NightAudit. Every step is safe to repeat.
+# -------------------------------------------------------------------
+
+# A room is occupied when an unpaid stay holds the night; rooms under
+# maintenance are left alone. Only rooms whose status changes are
+# written, so an audit of a settled hotel touches nothing.
+ROOM_STATUS = """
+    CASE WHEN EXISTS (
+        SELECT 1 FROM RoomNight n
+        JOIN Billing b ON b.reservation_id = n.reservation_id
+        WHERE n.room_no = Room.room_no AND n.night = ?1 AND b.payment_status != 'paid'
+    ) THEN 'occupied' ELSE 'vacant' END
+"""
+
+ROOM_STATUS_SQL = f"""
+    UPDATE Room SET room_status = {ROOM_STATUS}
+    WHERE room_status != 'maintenance' AND room_status != {ROOM_STATUS}
+"""
+
+SETTLE_SQL = """
+    UPDATE Billing
+    SET payment_status = 'paid', payment_method = ?, payment_date = ?, overdue_since = NULL
+    WHERE payment_status = 'pending' AND reservation_id IN (SELECT value FROM json_each(?))
+"""
+
+# One PRIMARY KEY range per room; each night is charged at its share of
+# the stay's room charges, and a night already posted is skipped.
+POST_CHARGES_SQL = """
+    INSERT OR IGNORE INTO RoomCharge (reservation_id, night, room_no, amount)
+    SELECT n.reservation_id, n.night, n.room_no,
+           ROUND(b.room_charges / (JULIANDAY(r.check_out) - JULIANDAY(r.check_in)), 2)
+    FROM Room rm
+    JOIN RoomNight n ON n.room_no = rm.room_no AND n.night > ? AND n.night <= ?
+    JOIN Reservation r ON r.reservation_id = n.reservation_id
+    JOIN Billing b ON b.reservation_id = n.reservation_id
+"""
+
+# Driven by the payment_status index, so only unpaid bills are visited
+FLAG_OVERDUE_SQL = """
+    UPDATE Billing SET overdue_since = ?1
+    WHERE payment_status = 'pending' AND overdue_since IS NULL
+      AND (SELECT check_out FROM Reservation r WHERE r.reservation_id = Billing.reservation_id) < ?1
+"""
+
+DUE_OUT_SQL = """
+    SELECT r.reservation_id, g.guest_Fname, g.guest_Lname, r.room_no, r.check_in, r.check_out, b.total
+    FROM Reservation r
+    JOIN Guest g ON g.guest_id = r.guest_id
+    JOIN Billing b ON b.reservation_id = r.reservation_id
+    WHERE r.check_out = ? AND b.payment_status = 'pending'
+    ORDER BY r.room_no
+"""
+
+OVERDUE_SQL = """
+    SELECT r.reservation_id, g.guest_Fname, g.guest_Lname, r.room_no, r.check_out, b.total, b.overdue_since
+    FROM Billing b
+    JOIN Reservation r ON r.reservation_id = b.reservation_id
+    JOIN Guest g ON g.guest_id = r.guest_id
+    WHERE b.payment_status = 'pending' AND b.overdue_since IS NOT NULL
+    ORDER BY r.check_out
+    LIMIT ?
+"""
+
+
+def business_date(conn):
+    return conn.execute("SELECT DATE('now')").fetchone()[0]
+
+def refresh_room_status(conn, room_nos=None, day=None):
+    """Recompute room_status for the given rooms (all when None).
+
+    Runs inside the caller's transaction; returns the rows changed.
+    """
+    day = day or business_date(conn)
+    if room_nos is None:
+        return conn.execute(ROOM_STATUS_SQL, (day,)).rowcount
+    return conn.execute(ROOM_STATUS_SQL + " AND room_no IN (SELECT value FROM json_each(?2))",
+                        (day, json.dumps(list(room_nos)))).rowcount
+
+def run(conn, audit_date=None, settle=(), payment_method='Cash'):
+    """Audit one business day (default today) and return its summary.
+
+    settle: reservation ids whose pending bills are paid first, with
+    payment_method. Room-nights are posted from the day after the
+    previous audit, or for audit_date alone on the first run.
+    """
+    started = time.perf_counter()
+    audit_date = audit_date or business_date(conn)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        settled = conn.execute(SETTLE_SQL, (payment_method, audit_date, json.dumps(list(settle)))).rowcount
+        rooms_changed = refresh_room_status(conn, day=audit_date)
+
+        previous = conn.execute("SELECT MAX(audit_date) FROM NightAudit WHERE audit_date < ?",
+                                (audit_date,)).fetchone()[0]
+        post_from = previous or conn.execute("SELECT DATE(?, '-1 day')", (audit_date,)).fetchone()[0]
+        nights_posted = conn.execute(POST_CHARGES_SQL, (post_from, audit_date)).rowcount
+        room_revenue = conn.execute("SELECT ROUND(TOTAL(amount), 2) FROM RoomCharge WHERE night > ? AND night <= ?",
+                                    (post_from, audit_date)).fetchone()[0]
+
+        conn.execute(FLAG_OVERDUE_SQL, (audit_date,))
+        overdue = conn.execute("SELECT COUNT(*) FROM Billing WHERE payment_status = 'pending' "
+                               "AND overdue_since IS NOT NULL").fetchone()[0]
+        rooms_occupied = conn.execute("SELECT COUNT(*) FROM Room WHERE room_status = 'occupied'").fetchone()[0]
+
+        summary = {
+            'audit_date': audit_date,
+            'settled': settled,
+            'rooms_occupied': rooms_occupied,
+            'rooms_changed': rooms_changed,
+            'nights_posted': nights_posted,
+            'room_revenue': room_revenue,
+            'overdue': overdue,
+        }
+        conn.execute("""
+            INSERT OR REPLACE INTO NightAudit (audit_date, run_at, settled, rooms_occupied, rooms_changed,
+                                               nights_posted, room_revenue, overdue)
+            VALUES (:audit_date, DATETIME('now'), :settled, :rooms_occupied, :rooms_changed,
+                    :nights_posted, :room_revenue, :overdue)
+        """, summary)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    summary['ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return summary
+
+
+if __name__ == '__main__':
+    # python night_audit.py [database] [--date YYYY-MM-DD] [--settle-due] [--method METHOD]
+    # --settle-due pays every pending bill checking out on the audit date.
+    from db import DB_PATH, open_connection
+    from migrations import migrate
+
+    args = sys.argv[1:]
+    audit_date = args[args.index('--date') + 1] if '--date' in args else None
+    method = args[args.index('--method') + 1] if '--method' in args else 'Cash'
+    paths = [a for i, a in enumerate(args) if not a.startswith('--') and args[i - 1] not in ('--date', '--method')]
+
+    conn = open_connection(paths[0] if paths else DB_PATH)
+    migrate(conn)
+    audit_date = audit_date or business_date(conn)
+    settle = [row[0] for row in conn.execute(DUE_OUT_SQL, (audit_date,))] if '--settle-due' in args else []
+    summary = run(conn, audit_date, settle, method)
+    print(f"night audit {summary['audit_date']} in {summary['ms']:.0f} ms: "
+          f"{summary['settled']} settled, {summary['rooms_occupied']} rooms occupied "
+          f"({summary['rooms_changed']} changed), {summary['nights_posted']} room-nights posted "
+          f"(${summary['room_revenue']:,.2f}), {summary['overdue']} overdue bills")
+    conn.close()
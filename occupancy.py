@@ -0,0 +1,99 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------------------------
+#  Occupancy calendar – rooms x days matrices filled with vectorized
+#  difference arrays: +1 on the check-in column, -1 on the check-out
+#  column, then a cumulative sum along the day axis.
+# -------------------------------------------------------------------
+ROOMS_SQL = "SELECT room_no FROM Room ORDER BY room_no"
+
+STAYS_SQL = """
+    SELECT r.room_no, r.check_in, r.check_out, COALESCE(b.room_charges, 0) AS room_charges
+    FROM Reservation r
+    LEFT JOIN Billing b ON r.reservation_id = b.reservation_id
+    WHERE r.check_out > ? AND r.check_in < ?
+"""
+
+
+class OccupancyCalendar:
+    def __init__(self, room_nos, dates, occupied, revenue):
+        self.room_nos = room_nos      # (rooms,) int
+        self.dates = dates            # (days,) datetime64[D]
+        self.occupied = occupied      # (rooms, days) int8, 1 = room sold that night
+        self.revenue = revenue        # (rooms, days) float, room revenue earned that night
+
+    @classmethod
+    def build(cls, room_nos, stay_rooms, check_ins, check_outs, room_charges, start, days):
+        room_nos = np.asarray(room_nos, dtype=np.int64)
+        start = np.datetime64(start, 'D')
+        dates = start + np.arange(days)
+        n_rooms = len(room_nos)
+
+        if len(stay_rooms) == 0 or n_rooms == 0:
+            return cls(room_nos, dates, np.zeros((n_rooms, days), np.int8), np.zeros((n_rooms, days)))
+
+        check_ins = np.asarray(check_ins, dtype='datetime64[D]')
+        check_outs = np.asarray(check_outs, dtype='datetime64[D]')
+        nights = (check_outs - check_ins).astype(np.int64)
+        nightly = np.divide(np.asarray(room_charges, dtype=float), nights,
+                            out=np.zeros(len(nights)), where=nights > 0)
+
+        stay_rooms = np.asarray(stay_rooms, dtype=np.int64)
+        rows = np.searchsorted(room_nos, stay_rooms)
+        known = (rows < n_rooms) & (room_nos[np.minimum(rows, n_rooms - 1)] == stay_rooms) & (nights > 0)
+        rows, nightly = rows[known], nightly[known]
+        first = np.clip((check_ins[known] - start).astype(np.int64), 0, days)
+        last = np.clip((check_outs[known] - start).astype(np.int64), 0, days)
+
+        # One flat bincount per matrix instead of a Python loop over stays
+        width = days + 1
+        size = n_rooms * width
+        opens, closes = rows * width + first, rows * width + last
+        occupied = (np.bincount(opens, minlength=size) - np.bincount(closes, minlength=size))
+        revenue = (np.bincount(opens, weights=nightly, minlength=size)
+                   - np.bincount(closes, weights=nightly, minlength=size))
+        occupied = np.cumsum(occupied.reshape(n_rooms, width), axis=1)[:, :days]
+        revenue = np.cumsum(revenue.reshape(n_rooms, width), axis=1)[:, :days]
+        return cls(room_nos, dates, np.minimum(occupied, 1).astype(np.int8), revenue)
+
+    @classmethod
+    def load(cls, conn, start=None, days=90):
+        start = start or date.today()
+        end = start + timedelta(days=days)
+        room_nos = [row[0] for row in conn.execute(ROOMS_SQL)]
+        stays = conn.execute(STAYS_SQL, (start.isoformat(), end.isoformat())).fetchall()
+        return cls.from_stays(room_nos, stays, start, days)
+
+    @classmethod
+    def from_stays(cls, room_nos, stays, start, days):
+        """stays: rows of STAYS_SQL for the window, from any backend."""
+        columns = list(zip(*stays)) if stays else ([], [], [], [])
+        return cls.build(room_nos, *columns, start, days)
+
+    # ---------------------------------------------------------------
+    #  Daily series
+    # ---------------------------------------------------------------
+    def daily(self):
+        """Per-day rooms sold, occupancy rate, room revenue, ADR and RevPAR."""
+        n_rooms = max(len(self.room_nos), 1)
+        sold = self.occupied.sum(axis=0).astype(float)
+        revenue = self.revenue.sum(axis=0)
+        adr = np.divide(revenue, sold, out=np.zeros_like(revenue), where=sold > 0)
+        return pd.DataFrame({
+            'rooms_sold': sold.astype(int),
+            'occupancy_rate': sold / n_rooms * 100,
+            'room_revenue': revenue,
+            'adr': adr,
+            'revpar': revenue / n_rooms,
+        }, index=pd.DatetimeIndex(self.dates, name='date'))
+
+    def heatmap_frame(self):
+        """Long-format (room, date, occupied) rows for a calendar heat map."""
+        return pd.DataFrame({
+            'room': np.repeat(self.room_nos, len(self.dates)).astype(str),
+            'date': np.tile(self.dates, len(self.room_nos)),
+            'occupied': self.occupied.ravel(),
+        })
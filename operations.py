@@ -0,0 +1,300 @@
+import functools
+import json
+import random
+import sqlite3
+import time
+
+import assignment
+import night_audit
+import queries
+import rates
+
+# -------------------------------------------------------------------
+#  Business operations – each one runs as a single BEGIN IMMEDIATE
+#  transaction, so its checks and writes see and leave a consistent
+#  database even with other sessions or processes writing at the same
+#  time. BEGIN IMMEDIATE takes the write lock up front; busy_timeout
+#  (db.PRAGMAS) waits for it, and a still-busy database is retried with
+#  jittered exponential backoff before the error reaches the caller.
+# -------------------------------------------------------------------
+RETRIES = 5
+BACKOFF_SECONDS = 0.05
+
+
+class OperationError(Exception):
+    """A business rule refused the operation; the message is user-facing."""
+
+
+def _is_busy(error):
+    message = str(error)
+    return 'database is locked' in message or 'database is busy' in message
+
+def transactional(operation):
+    @functools.wraps(operation)
+    def run(conn, *args, **kwargs):
+        for attempt in range(RETRIES + 1):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    result = operation(conn, *args, **kwargs)
+                    conn.execute("COMMIT")
+                    return result
+                except BaseException:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    raise
+            except sqlite3.OperationalError as e:
+                if not _is_busy(e) or attempt == RETRIES:
+                    raise
+                time.sleep(BACKOFF_SECONDS * 2 ** attempt * random.uniform(0.5, 1.5))
+    return run
+
+
+# -------------------------------------------------------------------
+#  Reservations
+# -------------------------------------------------------------------
+@transactional
+def make_reservation(conn, guest_id, room_no, check_in, check_out, adults, children):
+    """Book a room; returns the new reservation_id.
+
+    The Billing row and RoomNight entries are written by triggers inside
+    the same transaction, and the RoomNight primary key refuses a night
+    that is already held – so a booking is all-or-nothing. The clerk
+    chose the room, so reassign_rooms never moves the stay.
+    """
+    if check_out <= check_in:
+        raise OperationError("Check-out date must be after check-in date.")
+    return _book(conn, guest_id, room_no, check_in, check_out, adults, children, room_locked=1)
+
+@transactional
+def book_best_fit(conn, guest_id, type_id, check_in, check_out, adults, children):
+    """Book the free room of type_id that leaves the fewest short gaps
+    (assignment.best_room); returns (reservation_id, room_no)."""
+    if check_out <= check_in:
+        raise OperationError("Check-out date must be after check-in date.")
+    room_no = assignment.best_room(conn, type_id, adults + children, check_in, check_out)
+    if room_no is None:
+        raise OperationError("No room of this type is free for the selected dates.")
+    return _book(conn, guest_id, room_no, check_in, check_out, adults, children), room_no
+
+def _book(conn, guest_id, room_no, check_in, check_out, adults, children, room_locked=0):
+    try:
+        reservation_id = conn.execute("""
+            INSERT INTO Reservation (reservation_date, guest_id, room_no, check_in, check_out, adults, children,
+                                     room_locked)
+            VALUES (DATE('now'), ?, ?, ?, ?, ?, ?, ?)
+        """, (guest_id, room_no, check_in, check_out, adults, children, room_locked)).lastrowid
+    except sqlite3.IntegrityError as e:
+        if "RoomNight" in str(e):
+            raise OperationError("Room is already booked for the selected dates.") from e
+        raise
+    night_audit.refresh_room_status(conn, [room_no])
+    return reservation_id
+
+@transactional
+def reassign_rooms(conn, type_ids=None):
+    """Re-optimize the rooms of the future stays not locked to their room
+    (assignment.plan) and write the moves; returns the plan summary.
+
+    The moved stays' RoomNight rows are cleared first, so stays can swap
+    rooms; the update trigger then writes their new nights, and the
+    primary key still refuses any overlap with a stay left in place.
+    """
+    moves, summary = assignment.plan(conn, type_ids)
+    if moves:
+        conn.execute("DELETE FROM RoomNight WHERE reservation_id IN (SELECT value FROM json_each(?))",
+                     (json.dumps([reservation_id for reservation_id, _ in moves]),))
+        conn.executemany("UPDATE Reservation SET room_no = ? WHERE reservation_id = ?",
+                         [(room_no, reservation_id) for reservation_id, room_no in moves])
+    return summary
+
+@transactional
+def check_out(conn, reservation_id, payment_method):
+    """Settle the bill and free the room; returns the room number."""
+    row = conn.execute("SELECT room_no FROM Reservation WHERE reservation_id = ?", (reservation_id,)).fetchone()
+    if row is None:
+        raise OperationError(f"Reservation #{reservation_id} no longer exists.")
+    settled = conn.execute("""
+        UPDATE Billing
+        SET payment_status = 'paid',
+            payment_method = ?,
+            payment_date = DATE('now'),
+            overdue_since = NULL
+        WHERE reservation_id = ? AND payment_status = 'pending'
+    """, (payment_method, reservation_id)).rowcount
+    if not settled:
+        raise OperationError(f"Reservation #{reservation_id} has already been checked out.")
+    night_audit.refresh_room_status(conn, [row['room_no']])
+    return row['room_no']
+
+@transactional
+def delete_reservation(conn, reservation_id):
+    """Delete an unpaid reservation without services, with its bill."""
+    service_count = conn.execute(queries.RESERVATION_SERVICE_COUNT, (reservation_id,)).fetchone()[0]
+    if service_count > 0:
+        raise OperationError("Cannot delete reservation with associated services. "
+                             "Use the 'Delete Services' page to remove services first.")
+    paid = conn.execute(
+        "SELECT payment_status = 'paid' FROM Billing WHERE reservation_id = ?", (reservation_id,)
+    ).fetchone()
+    if paid and paid[0]:
+        raise OperationError(f"Reservation #{reservation_id} has been paid and cannot be deleted.")
+    row = conn.execute("SELECT room_no FROM Reservation WHERE reservation_id = ?", (reservation_id,)).fetchone()
+    if row is None:
+        raise OperationError(f"Reservation #{reservation_id} no longer exists.")
+    conn.execute("DELETE FROM Billing WHERE reservation_id = ?", (reservation_id,))
+    conn.execute("DELETE FROM Reservation WHERE reservation_id = ?", (reservation_id,))
+    night_audit.refresh_room_status(conn, [row['room_no']])
+
+@transactional
+def book_group(conn, guest_id, room_mix, check_in, check_out, adults, children):
+    """Book a block of rooms for one guest (or group master).
+
+    room_mix maps type_id -> number of rooms; adults and children are per
+    room. Rooms are picked by one set-based query and booked with one
+    executemany, all or nothing. Returns [(reservation_id, room_no)].
+    """
+    room_mix = {type_id: count for type_id, count in room_mix.items() if count > 0}
+    if not room_mix:
+        raise OperationError("Choose at least one room.")
+    if check_out <= check_in:
+        raise OperationError("Check-out date must be after check-in date.")
+
+    free = {}
+    for room_no, type_id in conn.execute(queries.FREE_ROOMS, (json.dumps(list(room_mix)), adults + children,
+                                                              check_in, check_out)):
+        free.setdefault(type_id, []).append(room_no)
+    short = {type_id: count - len(free.get(type_id, [])) for type_id, count in room_mix.items()
+             if len(free.get(type_id, [])) < count}
+    if short:
+        names = dict(conn.execute("SELECT type_id, type_name FROM RoomType").fetchall())
+        raise OperationError("Not enough rooms free for the selected dates: " + ', '.join(
+            f"{missing} more {names.get(type_id, type_id)}" for type_id, missing in short.items()))
+    room_nos = [room_no for type_id, count in room_mix.items() for room_no in free[type_id][:count]]
+
+    # We hold the write lock, so every id above the current maximum is ours
+    last_id = conn.execute("SELECT COALESCE(MAX(reservation_id), 0) FROM Reservation").fetchone()[0]
+    conn.executemany("""
+        INSERT INTO Reservation (reservation_date, guest_id, room_no, check_in, check_out, adults, children)
+        VALUES (DATE('now'), ?, ?, ?, ?, ?, ?)
+    """, [(guest_id, room_no, check_in, check_out, adults, children) for room_no in room_nos])
+    night_audit.refresh_room_status(conn, room_nos)
+    return [tuple(row) for row in conn.execute(
+        "SELECT reservation_id, room_no FROM Reservation WHERE reservation_id > ? ORDER BY reservation_id", (last_id,))]
+
+
+# -------------------------------------------------------------------
+#  Service postings – Billing follows through the ReservationServices
+#  triggers in the same transaction
+# -------------------------------------------------------------------
+@transactional
+def add_service(conn, reservation_id, service_id, quantity, service_date):
+    if conn.execute("SELECT 1 FROM Reservation WHERE reservation_id = ?", (reservation_id,)).fetchone() is None:
+        raise OperationError(f"Reservation #{reservation_id} no longer exists.")
+    return conn.execute("""
+        INSERT INTO ReservationServices (reservation_id, service_id, quantity, service_date)
+        VALUES (?, ?, ?, ?)
+    """, (reservation_id, service_id, quantity, service_date)).lastrowid
+
+@transactional
+def post_service_bulk(conn, service_id, quantity, service_date, type_ids=None, reservation_ids=None):
+    """Post one service line to many reservations; returns their ids.
+
+    Targets the given reservation_ids when set, otherwise every unpaid
+    stay in house on service_date, optionally only in rooms of type_ids.
+    The lines go in with one INSERT ... SELECT, and the Billing deltas
+    are applied by the triggers within that statement.
+    """
+    if conn.execute("SELECT 1 FROM Services WHERE service_id = ?", (service_id,)).fetchone() is None:
+        raise OperationError("This service no longer exists.")
+    if reservation_ids is not None:
+        targets = [row[0] for row in conn.execute("""
+            SELECT reservation_id FROM Billing
+            WHERE payment_status = 'pending' AND reservation_id IN (SELECT value FROM json_each(?))
+            ORDER BY reservation_id
+        """, (json.dumps(list(reservation_ids)),))]
+    else:
+        targets = [row[0] for row in conn.execute(
+            queries.IN_HOUSE_RESERVATIONS, (service_date, None if type_ids is None else json.dumps(list(type_ids))))]
+    if not targets:
+        raise OperationError("No unpaid reservations match the selection.")
+    conn.execute("""
+        INSERT INTO ReservationServices (reservation_id, service_id, quantity, service_date)
+        SELECT value, ?, ?, ? FROM json_each(?)
+    """, (service_id, quantity, service_date, json.dumps(targets)))
+    return targets
+
+@transactional
+def delete_service(conn, res_service_id):
+    if not conn.execute("DELETE FROM ReservationServices WHERE res_service_id = ?", (res_service_id,)).rowcount:
+        raise OperationError(f"Service line {res_service_id} has already been removed.")
+
+
+# -------------------------------------------------------------------
+#  Guests
+# -------------------------------------------------------------------
+@transactional
+def add_guest(conn, fname, lname, email, cnic, age, gender, city):
+    try:
+        return conn.execute("""
+            INSERT INTO Guest (guest_Fname, guest_Lname, guest_email, CNIC, age, gender, City)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (fname, lname, email, cnic, age, gender, city)).lastrowid
+    except sqlite3.IntegrityError as e:
+        if "UNIQUE constraint failed" in str(e):
+            raise OperationError("A guest with this CNIC or email already exists.") from e
+        raise
+
+@transactional
+def update_guest(conn, guest_id, fname, lname, email, cnic, city):
+    try:
+        updated = conn.execute("""
+            UPDATE Guest
+            SET guest_Fname=?, guest_Lname=?, guest_email=?, CNIC=?, City=?
+            WHERE guest_id = ?
+        """, (fname, lname, email, cnic, city, guest_id)).rowcount
+    except sqlite3.IntegrityError as e:
+        if "UNIQUE constraint failed" in str(e):
+            raise OperationError("A guest with this CNIC or email already exists.") from e
+        raise
+    if not updated:
+        raise OperationError("Guest not found.")
+
+@transactional
+def delete_guest(conn, guest_id):
+    active = conn.execute(queries.GUEST_ACTIVE_RESERVATIONS, (guest_id,)).fetchone()[0]
+    if active > 0:
+        raise OperationError("Cannot delete guest with active reservations.")
+    # Archived stays have no foreign key back to Guest, so check them here
+    if conn.execute("SELECT 1 FROM archive.Reservation WHERE guest_id = ? LIMIT 1", (guest_id,)).fetchone():
+        raise OperationError("Cannot delete a guest who still has reservations on record.")
+    try:
+        conn.execute("DELETE FROM Guest WHERE guest_id = ?", (guest_id,))
+    except sqlite3.IntegrityError as e:
+        raise OperationError("Cannot delete a guest who still has reservations on record.") from e
+
+
+# -------------------------------------------------------------------
+#  Room rates – per-date prices in RateCalendar (rates.py); bills of
+#  stays already booked keep the price they were written with
+# -------------------------------------------------------------------
+@transactional
+def set_rates(conn, type_id, start, end, price, weekdays=None):
+    """Price the nights start..end (inclusive) of one room type; returns
+    the number of nights set. weekdays limits them to strftime('%w')
+    numbers, e.g. [5, 6] for Friday and Saturday nights."""
+    if end < start:
+        raise OperationError("End date must be on or after start date.")
+    if price < 0:
+        raise OperationError("Price cannot be negative.")
+    if weekdays is not None and not weekdays:
+        raise OperationError("Choose at least one weekday.")
+    if conn.execute("SELECT 1 FROM RoomType WHERE type_id = ?", (type_id,)).fetchone() is None:
+        raise OperationError("This room type no longer exists.")
+    return conn.execute(rates.SET_RATES_SQL, (type_id, start, end, price,
+                                              None if weekdays is None else json.dumps(list(weekdays)))).rowcount
+
+@transactional
+def clear_rates(conn, type_id, start, end):
+    """Return the nights start..end (inclusive) to base_price; returns the count."""
+    return conn.execute(rates.CLEAR_RATES_SQL, (type_id, start, end)).rowcount
@@ -0,0 +1,232 @@
+import sys
+
+import guests
+import reports
+
+# -------------------------------------------------------------------
+#  Page queries – shared by app.py and the query-plan check below
+# -------------------------------------------------------------------
+# The unary + keeps the planner from walking the whole check_in index to
+# avoid a sort; seeking the short check_out >= today range is far cheaper.
+CURRENT_RESERVATIONS = """
+    SELECT r.reservation_id, g.guest_Fname, g.guest_Lname,
+           r.room_no, r.check_in, r.check_out, b.payment_status
+    FROM Reservation r
+    JOIN Guest g ON r.guest_id = g.guest_id
+    JOIN Billing b ON r.reservation_id = b.reservation_id
+    WHERE r.check_out >= DATE('now')
+    ORDER BY +r.check_in
+"""
+
+ACTIVE_RESERVATIONS = """
+    SELECT r.reservation_id, g.guest_Fname, g.guest_Lname, r.room_no
+    FROM Reservation r
+    JOIN Guest g ON r.guest_id = g.guest_id
+    WHERE r.check_out >= DATE('now')
+"""
+
+ACTIVE_RESERVATIONS_WITH_SERVICES = """
+    SELECT r.reservation_id, g.guest_Fname, g.guest_Lname, r.room_no
+    FROM Reservation r
+    JOIN Guest g ON r.guest_id = g.guest_id
+    WHERE r.check_out >= DATE('now')
+    AND EXISTS (SELECT 1 FROM ReservationServices rs WHERE rs.reservation_id = r.reservation_id)
+"""
+
+RESERVATION_SERVICE_LINES = """
+    SELECT rs.res_service_id, rs.service_id, rs.quantity, rs.service_date
+    FROM ReservationServices rs
+    WHERE rs.reservation_id = ?
+"""
+
+CHECKOUT_RESERVATIONS = """
+    SELECT r.reservation_id, r.room_no, g.guest_Fname, g.guest_Lname,
+           b.total AS estimated_total, b.payment_status
+    FROM Reservation r
+    JOIN Guest g ON r.guest_id = g.guest_id
+    JOIN Billing b ON r.reservation_id = b.reservation_id
+    WHERE r.check_out <= DATE('now')
+    AND b.payment_status = 'pending'
+"""
+
+CHECKOUT_DETAILS = """
+    SELECT b.*, r.check_in, r.check_out, r.room_no,
+           g.guest_Fname, g.guest_Lname
+    FROM Billing b
+    JOIN Reservation r ON b.reservation_id = r.reservation_id
+    JOIN Guest g ON r.guest_id = g.guest_id
+    WHERE b.reservation_id = ?
+"""
+
+DELETABLE_RESERVATIONS = """
+    SELECT r.reservation_id, g.guest_Fname, g.guest_Lname,
+           r.room_no, r.check_in, r.check_out, b.payment_status
+    FROM Reservation r
+    JOIN Guest g ON r.guest_id = g.guest_id
+    JOIN Billing b ON r.reservation_id = b.reservation_id
+    WHERE r.check_out >= DATE('now') AND b.payment_status = 'pending'
+    ORDER BY r.check_in
+"""
+
+RESERVATION_SERVICE_COUNT = """
+    SELECT COUNT(*) AS service_count
+    FROM ReservationServices
+    WHERE reservation_id = ?
+"""
+
+# Reports read the active stays in final.db and the settled history in
+# the attached archive (see archive.py). Guests and rooms stay in main.
+# Each arm walks its own check_in index, and SQLite merges the two
+# ordered streams, so the export still streams without a sort.
+_REPORT_ARM = """
+    SELECT
+        r.reservation_id,
+        g.guest_Fname,
+        g.guest_Lname,
+        rm.room_no,
+        rt.type_name,
+        b.room_charges,
+        b.service_charges,
+        b.total,
+        b.payment_status,
+        b.payment_method,
+        r.check_in,
+        r.check_out
+    FROM {schema}.Reservation r
+    JOIN main.Guest g ON r.guest_id = g.guest_id
+    JOIN main.Room rm ON r.room_no = rm.room_no
+    JOIN main.RoomType rt ON rm.type_id = rt.type_id
+    JOIN {schema}.Billing b ON r.reservation_id = b.reservation_id
+    WHERE r.check_in BETWEEN ?1 AND ?2
+"""
+
+REPORT_RESERVATIONS = (_REPORT_ARM.format(schema='main') + "    UNION ALL"
+                       + _REPORT_ARM.format(schema='archive') + "    ORDER BY check_in\n")
+
+GUEST_ACTIVE_RESERVATIONS = """
+    SELECT COUNT(*) AS active_reservations
+    FROM Reservation
+    WHERE guest_id = ? AND check_out >= DATE('now')
+"""
+
+# Group booking: rooms of the requested types (a JSON array of type_ids)
+# that hold no RoomNight in [check_in, check_out) – one ledger seek per
+# room instead of a booking attempt per room.
+FREE_ROOMS = """
+    SELECT rm.room_no, rm.type_id
+    FROM Room rm
+    WHERE rm.type_id IN (SELECT value FROM json_each(?))
+      AND COALESCE(rm.room_capacity, 0) >= ?
+      AND NOT EXISTS (
+          SELECT 1 FROM RoomNight n
+          WHERE n.room_no = rm.room_no AND n.night >= ? AND n.night < ?
+      )
+    ORDER BY rm.type_id, rm.room_no
+"""
+
+# Best-fit room assignment (assignment.best_room): free rooms of one type
+# with the last night held before the stay and the first one after it –
+# two RoomNight seeks per room.
+BEST_FIT_ROOMS = """
+    SELECT rm.room_no, COALESCE(rm.room_capacity, 0) AS room_capacity,
+           (SELECT MAX(n.night) FROM RoomNight n WHERE n.room_no = rm.room_no AND n.night < ?3) AS last_night,
+           (SELECT MIN(n.night) FROM RoomNight n WHERE n.room_no = rm.room_no AND n.night >= ?4) AS next_night
+    FROM Room rm
+    WHERE rm.type_id = ?1 AND COALESCE(rm.room_capacity, 0) >= ?2 AND rm.room_status != 'maintenance'
+      AND NOT EXISTS (
+          SELECT 1 FROM RoomNight n
+          WHERE n.room_no = rm.room_no AND n.night >= ?3 AND n.night < ?4
+      )
+    ORDER BY rm.room_no
+"""
+
+# Bulk service posting: unpaid stays holding the given night, optionally
+# limited to a JSON array of type_ids – one RoomNight seek per room.
+IN_HOUSE_RESERVATIONS = """
+    SELECT n.reservation_id, n.room_no
+    FROM Room rm
+    JOIN RoomNight n ON n.room_no = rm.room_no AND n.night = ?1
+    JOIN Billing b ON b.reservation_id = n.reservation_id
+    WHERE b.payment_status = 'pending'
+      AND (?2 IS NULL OR rm.type_id IN (SELECT value FROM json_each(?2)))
+    ORDER BY n.reservation_id
+"""
+
+# -------------------------------------------------------------------
+#  Cached page queries – app.py caches these results keyed on the
+#  DataVersion counters of the tables each one reads, so a rerun only
+#  runs the SQL again after one of those tables has been written.
+#  Room types and service names come from the catalog (catalog.py).
+# -------------------------------------------------------------------
+CACHED_QUERIES = {
+    'CURRENT_RESERVATIONS': (CURRENT_RESERVATIONS, ('Reservation', 'Guest', 'Billing')),
+    'ACTIVE_RESERVATIONS': (ACTIVE_RESERVATIONS, ('Reservation', 'Guest')),
+    'ACTIVE_RESERVATIONS_WITH_SERVICES': (ACTIVE_RESERVATIONS_WITH_SERVICES,
+                                          ('Reservation', 'Guest', 'ReservationServices')),
+    'CHECKOUT_RESERVATIONS': (CHECKOUT_RESERVATIONS, ('Reservation', 'Guest', 'Billing')),
+    'DELETABLE_RESERVATIONS': (DELETABLE_RESERVATIONS, ('Reservation', 'Guest', 'Billing')),
+}
+
+# -------------------------------------------------------------------
+#  Query-plan regression check
+#  Every page query must reach the large tables through an index
+#  search; a SCAN is only acceptable on the small reference tables, or
+#  as a full-text index lookup.
+# -------------------------------------------------------------------
+REFERENCE_TABLES = {'Room', 'RoomType', 'Services', 'rm', 'rt', 's'}
+
+PLAN_CHECKS = [
+    ("Dashboard", "CURRENT_RESERVATIONS", CURRENT_RESERVATIONS, ()),
+    ("Add Services", "ACTIVE_RESERVATIONS", ACTIVE_RESERVATIONS, ()),
+    ("Delete Services", "ACTIVE_RESERVATIONS_WITH_SERVICES", ACTIVE_RESERVATIONS_WITH_SERVICES, ()),
+    ("Delete Services", "RESERVATION_SERVICE_LINES", RESERVATION_SERVICE_LINES, (1,)),
+    ("Check Out", "CHECKOUT_RESERVATIONS", CHECKOUT_RESERVATIONS, ()),
+    ("Check Out", "CHECKOUT_DETAILS", CHECKOUT_DETAILS, (1,)),
+    ("Delete Reservation", "DELETABLE_RESERVATIONS", DELETABLE_RESERVATIONS, ()),
+    ("Delete Reservation", "RESERVATION_SERVICE_COUNT", RESERVATION_SERVICE_COUNT, (1,)),
+    ("Reports", "REPORT_RESERVATIONS", REPORT_RESERVATIONS, ('2025-01-01', '2025-01-31')),
+    ("Reports", "reports.SUMMARY_SQL", reports.SUMMARY_SQL, ('2025-01-01', '2025-01-31')),
+    ("Reports", "reports.BREAKDOWN_SQL", reports.BREAKDOWN_SQL, ('2025-01-01', '2025-01-31')),
+    ("Guest Management", "guests.DIRECTORY_PAGE_SQL", guests.DIRECTORY_PAGE_SQL, ('Khan', 'Ali', 1, 25)),
+    ("Guest Management", "guests.SEARCH_PAGE_SQL", guests.SEARCH_PAGE_SQL, ('"ali"*', 'Khan', 'Ali', 1, 25)),
+    ("Guest Management", "GUEST_ACTIVE_RESERVATIONS", GUEST_ACTIVE_RESERVATIONS, (1,)),
+    ("Add Services", "IN_HOUSE_RESERVATIONS", IN_HOUSE_RESERVATIONS, ('2025-01-01', None)),
+    ("Group Booking", "FREE_ROOMS", FREE_ROOMS, ('[1, 2]', 2, '2025-01-01', '2025-01-08')),
+    ("Make Reservation", "BEST_FIT_ROOMS", BEST_FIT_ROOMS, (1, 2, '2025-01-01', '2025-01-08')),
+]
+
+def query_plan(conn, sql, params=()):
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+def full_scans(conn, checks=PLAN_CHECKS):
+    """Return (page, query, plan step) for every scan of a large table."""
+    failures = []
+    for page, name, sql, params in checks:
+        plan = query_plan(conn, sql, params)
+        # A scan of a subquery reads rows its own (checked) steps produced
+        subqueries = {detail.split()[1] for detail in plan if detail.startswith(('MATERIALIZE ', 'CO-ROUTINE '))}
+        for detail in plan:
+            if not detail.startswith('SCAN '):
+                continue
+            if detail.split()[1] in REFERENCE_TABLES | subqueries:
+                continue
+            if 'VIRTUAL TABLE INDEX' in detail:
+                continue
+            failures.append((page, name, detail))
+    return failures
+
+
+if __name__ == '__main__':
+    # python queries.py [database]  – exits non-zero when a page query
+    # falls back to a full table scan (defaults to a fresh in-memory schema).
+    from db import open_connection
+    from migrations import migrate
+
+    conn = open_connection(sys.argv[1] if len(sys.argv) > 1 else ':memory:')
+    migrate(conn)
+    failures = full_scans(conn)
+    for page, name, detail in failures:
+        print(f"{page}: {name} -> {detail}")
+    print(f"{len(PLAN_CHECKS) - len({f[1] for f in failures})}/{len(PLAN_CHECKS)} page queries use an index")
+    conn.close()
+    sys.exit(1 if failures else 0)
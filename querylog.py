@@ -0,0 +1,343 @@
+import io
+import pstats
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+
+# -------------------------------------------------------------------
+#  Query instrumentation – connections opened with a QueryLog time every
+#  execute through to its last fetch, and record statement text, the
+#  parameter types (never their values), row count and latency. Slow
+#  statements keep their query plan in a ring buffer, and each statement
+#  and page keeps a bounded window of samples for percentiles. SQLite
+#  connections get an instrumented factory, mysql.connector ones a
+#  wrapper (see the end of the file).
+# -------------------------------------------------------------------
+SLOW_QUERY_MS = 100
+RECENT_SLOW = 50
+SAMPLES = 1000
+PERCENTILES = (50, 95, 99)
+
+
+def _statement(sql):
+    return ' '.join(sql.split())
+
+def _shape(parameters):
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f"{name}: {type(value).__name__}" for name, value in parameters.items()) + '}'
+    return '(' + ', '.join(type(value).__name__ for value in parameters) + ')'
+
+def _percentiles(samples):
+    values = np.percentile(np.fromiter(samples, dtype=float), PERCENTILES)
+    return {f"p{p}_ms": round(float(v), 2) for p, v in zip(PERCENTILES, values)}
+
+
+class QueryLog:
+    def __init__(self, slow_ms=SLOW_QUERY_MS, recent_slow=RECENT_SLOW, samples=SAMPLES):
+        self.slow_ms = slow_ms
+        self._samples = samples
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.slow = deque(maxlen=recent_slow)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._statements = defaultdict(lambda: {'calls': 0, 'rows': 0, 'ms': deque(maxlen=self._samples)})
+            self._pages = defaultdict(lambda: {'reruns': 0, 'queries': 0,
+                                               'sql_ms': deque(maxlen=self._samples),
+                                               'rerun_ms': deque(maxlen=self._samples)})
+            self.slow.clear()
+
+    # ---------------------------------------------------------------
+    #  Rerun bracketing – the app calls begin_rerun(page) at the top of
+    #  the script and end_rerun() at the bottom. A rerun cut short by
+    #  st.rerun()/st.stop() is closed by the next begin_rerun.
+    # ---------------------------------------------------------------
+    def begin_rerun(self, page):
+        self.end_rerun()
+        self._local.rerun = {'page': page, 'started': time.perf_counter(), 'queries': 0, 'sql_ms': 0.0}
+
+    def end_rerun(self):
+        rerun = getattr(self._local, 'rerun', None)
+        if rerun is None:
+            return
+        self._local.rerun = None
+        with self._lock:
+            page = self._pages[rerun['page']]
+            page['reruns'] += 1
+            page['queries'] += rerun['queries']
+            page['sql_ms'].append(rerun['sql_ms'])
+            page['rerun_ms'].append((time.perf_counter() - rerun['started']) * 1000)
+
+    def record(self, sql, shape, rows, ms, plan=None):
+        rerun = getattr(self._local, 'rerun', None)
+        if rerun is not None:
+            rerun['queries'] += 1
+            rerun['sql_ms'] += ms
+        statement = _statement(sql)
+        with self._lock:
+            stats = self._statements[statement]
+            stats['calls'] += 1
+            stats['rows'] += rows
+            stats['ms'].append(ms)
+            if ms >= self.slow_ms:
+                self.slow.appendleft({
+                    'at': time.strftime('%H:%M:%S'),
+                    'page': rerun['page'] if rerun else None,
+                    'statement': statement,
+                    'parameters': shape,
+                    'rows': rows,
+                    'ms': round(ms, 2),
+                    'plan': plan or [],
+                })
+
+    # ---------------------------------------------------------------
+    #  Reporting
+    # ---------------------------------------------------------------
+    def statement_stats(self):
+        with self._lock:
+            items = [(statement, dict(stats, ms=list(stats['ms']))) for statement, stats in self._statements.items()]
+        return sorted((
+            {'statement': statement, 'calls': stats['calls'],
+             'rows_per_call': round(stats['rows'] / stats['calls'], 1),
+             **_percentiles(stats['ms']), 'max_ms': round(max(stats['ms']), 2)}
+            for statement, stats in items
+        ), key=lambda row: -row['p95_ms'])
+
+    def page_stats(self):
+        with self._lock:
+            items = [(page, dict(stats, sql_ms=list(stats['sql_ms']), rerun_ms=list(stats['rerun_ms'])))
+                     for page, stats in self._pages.items()]
+        rows = []
+        for page, stats in items:
+            sql = {f"sql_{key}": value for key, value in _percentiles(stats['sql_ms']).items()}
+            rerun = {f"rerun_{key}": value for key, value in _percentiles(stats['rerun_ms']).items()}
+            rows.append({'page': page, 'reruns': stats['reruns'],
+                         'queries_per_rerun': round(stats['queries'] / stats['reruns'], 1), **sql, **rerun})
+        return sorted(rows, key=lambda row: -row['rerun_p95_ms'])
+
+
+# -------------------------------------------------------------------
+#  Instrumented connection – pass factory=InstrumentedConnection to
+#  sqlite3.connect and set conn.query_log; conn.execute, cursors and
+#  pandas.read_sql all get an InstrumentedCursor.
+# -------------------------------------------------------------------
+def explain(conn, sql, parameters=()):
+    # A plain Cursor, so the plan lookup is not itself recorded
+    try:
+        return [row[3] for row in sqlite3.Cursor(conn).execute("EXPLAIN QUERY PLAN " + sql, parameters)]
+    except sqlite3.Error:
+        return []
+
+
+class _Timed:
+    """Execute-to-last-fetch accounting shared by the cursor classes."""
+    _pending = None        # [sql, parameters, rows, seconds] until the last fetch
+
+    def _fetched(self, started, rows, done):
+        pending = self._pending
+        if pending is not None:
+            pending[2] += rows
+            pending[3] += time.perf_counter() - started
+            if done:
+                self._finish()
+
+    def _finish(self, rows=None):
+        pending, self._pending = self._pending, None
+        log = getattr(self.connection, 'query_log', None)
+        if pending is None or log is None:
+            return
+        sql, parameters, fetched, seconds = pending
+        ms = seconds * 1000
+        plan = None
+        if ms >= log.slow_ms and parameters is not None:
+            plan = self._explain(sql, parameters)
+        shape = 'executemany' if parameters is None else _shape(parameters)
+        log.record(sql, shape, fetched if rows is None else rows, ms, plan)
+
+
+class InstrumentedCursor(_Timed, sqlite3.Cursor):
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        finally:
+            self._pending = [sql, parameters, 0, time.perf_counter() - started]
+            if self.description is None:
+                self._finish(max(self.rowcount, 0))
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            super().executemany(sql, seq_of_parameters)
+        finally:
+            self._pending = [sql, None, max(self.rowcount, 0), time.perf_counter() - started]
+            self._finish()
+        return self
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(started, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows), True)
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(started, 0, True)
+            raise
+        self._fetched(started, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+    def _explain(self, sql, parameters):
+        return explain(self.connection, sql, parameters)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    query_log = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # Connection.execute creates its cursor internally, not through cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# -------------------------------------------------------------------
+#  mysql.connector – the pool wraps each connection it opens; cursor()
+#  takes the usual options (dictionary, buffered) and returns a wrapped
+#  cursor that records like InstrumentedCursor. Slow statements keep the
+#  rows of EXPLAIN.
+# -------------------------------------------------------------------
+def explain_mysql(conn, sql, parameters=()):
+    cursor = conn.cursor(dictionary=True, buffered=True)
+    try:
+        cursor.execute("EXPLAIN " + sql, parameters)
+        # MySQL gives a row per table; TiDB and OceanBase a plan as text lines
+        return [f"{row['table']}: {row['type']} on {row['key'] or 'no index'}, ~{row['rows']} rows"
+                if 'table' in row else ' '.join(str(value) for value in row.values())
+                for row in cursor.fetchall()]
+    except Exception:          # mysql.connector is optional here; a plan is best effort
+        return []
+    finally:
+        cursor.close()
+
+
+class InstrumentedMySQLCursor(_Timed):
+    def __init__(self, cursor, connection):
+        self._cursor = cursor
+        self.connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            self._cursor.execute(sql, parameters)
+        finally:
+            self._pending = [sql, parameters, 0, time.perf_counter() - started]
+            if self._cursor.description is None:
+                self._finish(max(self._cursor.rowcount, 0))
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            self._cursor.executemany(sql, seq_of_parameters)
+        finally:
+            self._pending = [sql, None, max(self._cursor.rowcount, 0), time.perf_counter() - started]
+            self._finish()
+
+    def callproc(self, name, args=()):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            return self._cursor.callproc(name, args)
+        finally:
+            self._pending = [f"CALL {name}", None, 0, time.perf_counter() - started]
+            self._finish()
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(started, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=1):
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany(size)
+        self._fetched(started, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(started, len(rows), True)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+    def _explain(self, sql, parameters):
+        return explain_mysql(self.connection.raw, sql, parameters)
+
+
+class InstrumentedMySQLConnection:
+    def __init__(self, raw, query_log):
+        self.raw = raw
+        self.query_log = query_log
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedMySQLCursor(self.raw.cursor(*args, **kwargs), self)
+
+
+# -------------------------------------------------------------------
+#  One-shot cProfile of a script rerun
+# -------------------------------------------------------------------
+def profile_report(profiler, limit=40):
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).strip_dirs().sort_stats('cumulative').print_stats(limit)
+    return out.getvalue()
@@ -0,0 +1,118 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+# -------------------------------------------------------------------
+#  Rate calendar – per-date prices by room type (RateCalendar table,
+#  migration 12). A night without a calendar price costs the type's
+#  base_price. The in-memory calendar keeps one cumulative price array
+#  per room type, so any stay is quoted as one subtraction, and a whole
+#  availability grid as one vectorized gather.
+#
+#  Billing is written by trg_create_bill, which prices a stay with
+#  STAY_PRICE_SQL: the same rule in SQL, i.e. base_price for every night
+#  plus the calendar's difference on the nights that have one.
+# -------------------------------------------------------------------
+HORIZON_DAYS = 730
+
+# DataVersion counters a loaded calendar depends on (base prices come
+# with the Catalog)
+RATE_VERSION = ['RateCalendar']
+
+STAY_PRICE_SQL = """
+    ROUND(rt.base_price * (JULIANDAY({check_out}) - JULIANDAY({check_in}))
+          + (SELECT TOTAL(rc.price - rt.base_price) FROM RateCalendar rc
+             WHERE rc.type_id = rt.type_id AND rc.rate_date >= {check_in} AND rc.rate_date < {check_out}), 2)
+"""
+
+RATES_SQL = "SELECT type_id, rate_date, price FROM RateCalendar"
+RATE_RANGE_SQL = "SELECT MIN(rate_date), MAX(rate_date) FROM RateCalendar"
+
+# Weekday numbers follow strftime('%w'): 0 = Sunday ... 6 = Saturday
+SET_RATES_SQL = """
+    WITH RECURSIVE night(day) AS (
+        SELECT DATE(?2)
+        UNION ALL
+        SELECT DATE(day, '+1 day') FROM night WHERE day < DATE(?3)
+    )
+    INSERT INTO RateCalendar (type_id, rate_date, price)
+    SELECT ?1, day, ?4 FROM night
+    WHERE ?5 IS NULL OR CAST(strftime('%w', day) AS INTEGER) IN (SELECT value FROM json_each(?5))
+    ON CONFLICT (type_id, rate_date) DO UPDATE SET price = excluded.price
+"""
+
+CLEAR_RATES_SQL = "DELETE FROM RateCalendar WHERE type_id = ? AND rate_date BETWEEN ? AND ?"
+
+
+def _day(value):
+    return np.datetime64(value, 'D').astype(np.int64)
+
+
+class RateCalendar:
+    def __init__(self, type_ids, base_prices, start, cumulative):
+        self.type_ids = type_ids          # (types,) int
+        self.base_prices = base_prices    # (types,) float
+        self.start = start                # first day covered, as days since 1970-01-01
+        self.cumulative = cumulative      # (types, days + 1): price of the nights before day start + i
+
+    @classmethod
+    def build(cls, base_prices, rates, start, days):
+        """base_prices: type_id -> base_price; rates: (type_id, 'YYYY-MM-DD', price)."""
+        type_ids = np.array(sorted(base_prices), dtype=np.int64)
+        bases = np.array([base_prices[type_id] or 0.0 for type_id in type_ids], dtype=float)
+        start = _day(start)
+        nightly = np.repeat(bases[:, None], days, axis=1)
+        rows = {int(type_id): row for row, type_id in enumerate(type_ids)}
+        for type_id, rate_date, price in rates:
+            offset = _day(rate_date) - start
+            if type_id in rows and 0 <= offset < days:
+                nightly[rows[type_id], offset] = price
+        cumulative = np.zeros((len(type_ids), days + 1))
+        np.cumsum(nightly, axis=1, out=cumulative[:, 1:])
+        return cls(type_ids, bases, start, cumulative)
+
+    @classmethod
+    def load(cls, conn, base_prices, days=HORIZON_DAYS):
+        first, last = conn.execute(RATE_RANGE_SQL).fetchone()
+        return cls.from_rates(base_prices, conn.execute(RATES_SQL), first, last, days)
+
+    @classmethod
+    def from_rates(cls, base_prices, rates, first, last, days=HORIZON_DAYS):
+        """Cover today to days ahead, widened to every date with a rate.
+
+        rates: rows of RATES_SQL, first and last: RATE_RANGE_SQL, from any backend.
+        """
+        start = date.today()
+        end = start + timedelta(days=days)
+        if first:
+            start = min(start, date.fromisoformat(first))
+            end = max(end, date.fromisoformat(last) + timedelta(days=1))
+        return cls.build(base_prices, rates, start, (end - start).days)
+
+    @property
+    def days(self):
+        return self.cumulative.shape[1] - 1
+
+    def quote_many(self, type_ids, check_ins, check_outs):
+        """Room charges of many stays at once (arrays of equal length)."""
+        type_ids = np.atleast_1d(np.asarray(type_ids, dtype=np.int64))
+        rows = np.minimum(np.searchsorted(self.type_ids, type_ids), max(len(self.type_ids) - 1, 0))
+        if len(type_ids) and (not len(self.type_ids) or (self.type_ids[rows] != type_ids).any()):
+            raise KeyError(f"unknown room type in {sorted(set(type_ids.tolist()) - set(self.type_ids.tolist()))}")
+        first = np.atleast_1d(np.asarray(check_ins, dtype='datetime64[D]')).astype(np.int64) - self.start
+        last = np.atleast_1d(np.asarray(check_outs, dtype='datetime64[D]')).astype(np.int64) - self.start
+        # Nights outside the covered window have no calendar price
+        inside_first = np.clip(first, 0, self.days)
+        inside_last = np.clip(last, 0, self.days)
+        inside = self.cumulative[rows, inside_last] - self.cumulative[rows, inside_first]
+        outside = (last - first) - (inside_last - inside_first)
+        return np.round(inside + self.base_prices[rows] * outside, 2)
+
+    def quote(self, type_id, check_in, check_out):
+        return float(self.quote_many([type_id], [check_in], [check_out])[0])
+
+    def nightly(self, start, days):
+        """(types, days) price of each night from start, for rate grids."""
+        dates = np.datetime64(start, 'D') + np.arange(days)
+        return self.quote_many(np.repeat(self.type_ids, days), np.tile(dates, len(self.type_ids)),
+                               np.tile(dates + 1, len(self.type_ids))).reshape(len(self.type_ids), days)
@@ -0,0 +1,76 @@
+import sys
+
+# -------------------------------------------------------------------
+#  DailyRevenue rollup – Billing totals pre-aggregated by check-in day,
+#  room type and payment method. Triggers (migration 7) apply each
+#  Billing write as a delta, so the Reports summary reads a few hundred
+#  rows however much history there is. Archived stays are rolled up the
+#  same way in archive.DailyRevenue, and the report queries read both.
+# -------------------------------------------------------------------
+REBUILD_SQL = """
+    INSERT INTO DailyRevenue (day, type_id, payment_method, reservations, paid, pending,
+                              room_charges, service_charges, total)
+    SELECT r.check_in, rm.type_id, COALESCE(b.payment_method, ''),
+           COUNT(*),
+           SUM(b.payment_status = 'paid'),
+           SUM(b.payment_status = 'pending'),
+           ROUND(SUM(b.room_charges), 2),
+           ROUND(SUM(b.service_charges), 2),
+           ROUND(SUM(b.total), 2)
+    FROM Billing b
+    JOIN Reservation r ON r.reservation_id = b.reservation_id
+    JOIN Room rm ON rm.room_no = r.room_no
+    GROUP BY r.check_in, rm.type_id, COALESCE(b.payment_method, '')
+"""
+
+SUMMARY_SQL = """
+    SELECT TOTAL(total) AS total_revenue,
+           TOTAL(room_charges) AS room_revenue,
+           TOTAL(service_charges) AS service_revenue,
+           CAST(TOTAL(reservations) AS INTEGER) AS reservations,
+           CAST(TOTAL(paid) AS INTEGER) AS paid_count,
+           CAST(TOTAL(pending) AS INTEGER) AS pending_count
+    FROM (SELECT * FROM main.DailyRevenue UNION ALL SELECT * FROM archive.DailyRevenue)
+    WHERE day BETWEEN ? AND ?
+"""
+
+BREAKDOWN_SQL = """
+    SELECT rt.type_name AS room_type,
+           CASE dr.payment_method WHEN '' THEN 'Unpaid' ELSE dr.payment_method END AS payment_method,
+           SUM(dr.reservations) AS reservations,
+           ROUND(SUM(dr.room_charges), 2) AS room_revenue,
+           ROUND(SUM(dr.service_charges), 2) AS service_revenue,
+           ROUND(SUM(dr.total), 2) AS total_revenue
+    FROM (SELECT * FROM main.DailyRevenue UNION ALL SELECT * FROM archive.DailyRevenue) dr
+    JOIN RoomType rt ON rt.type_id = dr.type_id
+    WHERE dr.day BETWEEN ? AND ?
+    GROUP BY rt.type_name, dr.payment_method
+    HAVING SUM(dr.reservations) > 0
+    ORDER BY rt.type_name, dr.payment_method
+"""
+
+def rebuild(c):
+    """Recompute DailyRevenue from Billing inside the caller's transaction."""
+    c.execute("DELETE FROM DailyRevenue")
+    c.execute(REBUILD_SQL)
+
+def revenue_summary(conn, start, end):
+    return dict(conn.execute(SUMMARY_SQL, (start, end)).fetchone())
+
+def revenue_breakdown(conn, start, end):
+    return [dict(row) for row in conn.execute(BREAKDOWN_SQL, (start, end))]
+
+
+if __name__ == '__main__':
+    # python reports.py [database]  – rebuild the DailyRevenue rollup
+    from db import DB_PATH, open_connection
+    from migrations import migrate
+
+    conn = open_connection(sys.argv[1] if len(sys.argv) > 1 else DB_PATH)
+    migrate(conn)
+    conn.execute("BEGIN IMMEDIATE")
+    rebuild(conn)
+    conn.execute("COMMIT")
+    rows = conn.execute("SELECT COUNT(*) FROM DailyRevenue").fetchone()[0]
+    print(f"DailyRevenue rebuilt: {rows} rows")
+    conn.close()
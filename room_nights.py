@@ -0,0 +1,71 @@
+import sys
+
+# -------------------------------------------------------------------
+#  RoomNight ledger – one row per (room_no, night) a reservation holds.
+#  Triggers on Reservation (migration 4) keep it in step with every
+#  insert, delete and amendment; this module rebuilds it from scratch.
+# -------------------------------------------------------------------
+BACKFILL_SQL = """
+    INSERT OR IGNORE INTO RoomNight (room_no, night, reservation_id)
+    WITH RECURSIVE nights(reservation_id, room_no, night, check_out) AS (
+        SELECT reservation_id, room_no, check_in, check_out
+        FROM Reservation
+        WHERE check_in < check_out
+        UNION ALL
+        SELECT reservation_id, room_no, DATE(night, '+1 day'), check_out
+        FROM nights
+        WHERE DATE(night, '+1 day') < check_out
+    )
+    SELECT room_no, night, reservation_id FROM nights ORDER BY reservation_id
+"""
+
+# Reservations that hold fewer ledger nights than they span were already
+# double-booked before the ledger existed.
+CONFLICTS_SQL = """
+    SELECT r.reservation_id, r.room_no, r.check_in, r.check_out,
+           CAST(JULIANDAY(r.check_out) - JULIANDAY(r.check_in) AS INTEGER)
+               - COUNT(n.night) AS missing_nights
+    FROM Reservation r
+    LEFT JOIN RoomNight n ON n.reservation_id = r.reservation_id
+    WHERE r.check_in < r.check_out
+    GROUP BY r.reservation_id
+    HAVING missing_nights > 0
+    ORDER BY r.reservation_id
+"""
+
+def backfill(c):
+    """Fill RoomNight from Reservation; earlier reservations win clashes.
+
+    Runs inside the caller's transaction and returns the conflicting
+    reservations as (reservation_id, room_no, check_in, check_out, missing_nights).
+    """
+    c.execute(BACKFILL_SQL)
+    return [tuple(row) for row in c.execute(CONFLICTS_SQL).fetchall()]
+
+def rebuild(conn):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM RoomNight")
+        conflicts = backfill(conn.cursor())
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return conflicts
+
+
+if __name__ == '__main__':
+    # python room_nights.py [database]  – rebuild the ledger and list clashes
+    from db import DB_PATH, open_connection
+    from migrations import migrate
+
+    conn = open_connection(sys.argv[1] if len(sys.argv) > 1 else DB_PATH)
+    migrate(conn)
+    conflicts = rebuild(conn)
+    nights = conn.execute("SELECT COUNT(*) FROM RoomNight").fetchone()[0]
+    print(f"RoomNight rebuilt: {nights} room-nights")
+    for reservation_id, room_no, check_in, check_out, missing in conflicts:
+        print(f"  reservation #{reservation_id} room {room_no} {check_in} to {check_out}: "
+              f"{missing} night(s) already held by another reservation")
+    conn.close()
+    sys.exit(1 if conflicts else 0)
@@ -0,0 +1,269 @@
+import io
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from numpy.lib import format as npy
+
+try:
+    import fcntl  # optional: serialises extractors across processes (POSIX)
+except ImportError:
+    fcntl = None
+
+# -------------------------------------------------------------------
+#  Revenue snapshot – settled stays (paid, in final.db or the archive)
+#  as one typed .npy file per column next to the database, with room
+#  type and payment method dictionary-encoded. extract() appends only
+#  the stays paid since the last run. RevenueSnapshot.load()
+#  memory-maps the columns, and aggregate() groups them with bincount,
+#  without building Row objects or DataFrames per row.
+#
+#  manifest.json is replaced last, and readers take only its row count
+#  from each column. An interrupted append is therefore invisible, and
+#  the next run cuts it off. Facts are kept as they were when settled;
+#  use --rebuild after correcting a paid bill.
+# -------------------------------------------------------------------
+COLUMNS = {
+    'reservation_id': np.int64,
+    'check_in': 'datetime64[D]',
+    'nights': np.int16,
+    'room_type': np.uint8,            # code into dictionaries['room_type']
+    'payment_method': np.uint8,       # code into dictionaries['payment_method']
+    'room_charges': np.float64,
+    'service_charges': np.float64,
+    'total': np.float64,
+}
+DICTIONARIES = ('room_type', 'payment_method')
+PERIODS = ('day', 'week', 'month')
+MANIFEST = 'manifest.json'
+FETCH_CHUNK = 50000
+
+PAID_IDS_SQL = "SELECT reservation_id FROM {schema}.Billing WHERE payment_status = 'paid'"
+
+FACTS_SQL = """
+    SELECT r.reservation_id, r.check_in,
+           CAST(JULIANDAY(r.check_out) - JULIANDAY(r.check_in) AS INTEGER),
+           rt.type_name, COALESCE(b.payment_method, ''),
+           b.room_charges, b.service_charges, b.total
+    FROM json_each(?) j
+    JOIN {schema}.Reservation r ON r.reservation_id = j.value
+    JOIN {schema}.Billing b ON b.reservation_id = j.value
+    JOIN main.Room rm ON rm.room_no = r.room_no
+    JOIN main.RoomType rt ON rt.type_id = rm.type_id
+"""
+
+
+def snapshot_path(db_path):
+    return os.path.splitext(db_path)[0] + '_snapshot'
+
+def _read_manifest(path):
+    try:
+        with open(os.path.join(path, MANIFEST)) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {'rows': 0, 'dictionaries': {name: [] for name in DICTIONARIES}, 'extracted_at': None}
+
+def _write_manifest(path, manifest):
+    tmp = os.path.join(path, MANIFEST + '.tmp')
+    with open(tmp, 'w') as fh:
+        json.dump(manifest, fh)
+    os.replace(tmp, os.path.join(path, MANIFEST))
+
+def _append_column(filename, values, rows):
+    """Write values after the first rows entries of a 1-D .npy file.
+
+    numpy pads the header so the shape can grow without moving the data,
+    so the header is rewritten in place after the data is down.
+    """
+    header = io.BytesIO()
+    npy.write_array_header_1_0(header, {'descr': npy.dtype_to_descr(values.dtype), 'fortran_order': False,
+                                        'shape': (rows + len(values),)})
+    header = header.getvalue()
+    with open(filename, 'r+b' if os.path.exists(filename) else 'w+b') as fh:
+        fh.seek(len(header) + rows * values.dtype.itemsize)
+        fh.truncate()
+        fh.write(values.tobytes())
+        fh.seek(0)
+        fh.write(header)
+
+def _encode(values, dictionary):
+    codes = {value: code for code, value in enumerate(dictionary)}
+    for value in values:
+        if value not in codes:
+            codes[value] = len(dictionary)
+            dictionary.append(value)
+    if len(dictionary) > 256:
+        raise ValueError("dictionary-encoded columns hold at most 256 distinct values")
+    return np.array([codes[value] for value in values], dtype=np.uint8)
+
+
+def read_facts(conn, known):
+    """FACTS_SQL rows of the paid stays whose ids are not in known."""
+    # One read transaction, so a stay moving to the archive meanwhile
+    # is seen in exactly one of the two databases
+    facts = []
+    conn.execute("BEGIN")
+    try:
+        for schema in ('main', 'archive'):
+            paid = np.fromiter((row[0] for row in conn.execute(PAID_IDS_SQL.format(schema=schema))), np.int64)
+            new = np.setdiff1d(paid, known)
+            known = np.union1d(known, new)
+            for chunk in range(0, len(new), FETCH_CHUNK):
+                facts.extend(conn.execute(FACTS_SQL.format(schema=schema),
+                                          (json.dumps(new[chunk:chunk + FETCH_CHUNK].tolist()),)).fetchall())
+    finally:
+        conn.execute("COMMIT")
+    return facts
+
+def extract(conn, path, read=read_facts):
+    """Append the settled stays the snapshot does not hold yet; returns the count.
+
+    read(conn, known_ids) returns the new stays as FACTS_SQL rows; other
+    storage backends pass their own.
+    """
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, '.lock'), 'w') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        manifest = _read_manifest(path)
+        facts = read(conn, RevenueSnapshot.load(path).columns['reservation_id'])
+        if not facts:
+            return 0
+
+        ids, check_ins, nights, room_types, methods, room_charges, service_charges, totals = zip(*facts)
+        dictionaries = manifest['dictionaries']
+        columns = {
+            'reservation_id': ids,
+            'check_in': check_ins,
+            'nights': nights,
+            'room_type': _encode(room_types, dictionaries['room_type']),
+            'payment_method': _encode(methods, dictionaries['payment_method']),
+            'room_charges': room_charges,
+            'service_charges': service_charges,
+            'total': totals,
+        }
+        append(path, columns, dictionaries)
+    return len(facts)
+
+def append(path, columns, dictionaries):
+    """Append one batch (name -> values; codes for the encoded columns).
+
+    dictionaries must cover every code in the batch; the rows become
+    visible when the manifest is replaced.
+    """
+    rows = _read_manifest(path)['rows']
+    columns = {name: np.asarray(columns[name], dtype=dtype) for name, dtype in COLUMNS.items()}
+    for name, values in columns.items():
+        _append_column(os.path.join(path, f"{name}.npy"), values, rows)
+    _write_manifest(path, {'rows': rows + len(columns['reservation_id']), 'dictionaries': dictionaries,
+                           'extracted_at': time.strftime('%Y-%m-%d %H:%M:%S')})
+
+
+class RevenueSnapshot:
+    def __init__(self, columns, dictionaries, extracted_at=None):
+        self.columns = columns              # name -> (rows,) array, memory-mapped when loaded
+        self.dictionaries = dictionaries    # name -> values, indexed by code
+        self.extracted_at = extracted_at
+
+    @classmethod
+    def load(cls, path):
+        manifest = _read_manifest(path)
+        rows = manifest['rows']
+        columns = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')[:rows] if rows else np.empty(0, dtype)
+            for name, dtype in COLUMNS.items()
+        }
+        return cls(columns, manifest['dictionaries'], manifest['extracted_at'])
+
+    def __len__(self):
+        return len(self.columns['reservation_id'])
+
+    def aggregate(self, by='month', start=None, end=None, group=None):
+        """Stays, nights and revenue per check-in day, week or month.
+
+        group: None, 'room_type' or 'payment_method'. start and end bound
+        the check-in date (inclusive). Weeks start on Monday.
+        """
+        if by not in PERIODS:
+            raise ValueError(f"by must be one of {PERIODS}")
+        if group is not None and group not in DICTIONARIES:
+            raise ValueError(f"group must be None or one of {DICTIONARIES}")
+
+        columns = self.columns
+        days = columns['check_in'].view(np.int64)
+        if start is not None or end is not None:
+            lo = np.datetime64(start, 'D').astype(np.int64) if start is not None else days.min(initial=0)
+            hi = np.datetime64(end, 'D').astype(np.int64) if end is not None else days.max(initial=0)
+            mask = (days >= lo) & (days <= hi)
+            columns = {name: values[mask] for name, values in columns.items()}
+            days = columns['check_in'].view(np.int64)
+        measures = ['reservations', 'nights', 'room_revenue', 'service_revenue', 'total_revenue']
+        if not len(days):
+            return pd.DataFrame(columns=['period'] + ([group] if group else []) + measures)
+
+        # Map each calendar day in range to its period once, then gather;
+        # far cheaper than converting every row to weeks or months
+        first_day = days.min()
+        calendar = np.arange(first_day, days.max() + 1)
+        if by == 'day':
+            period_of_day = calendar
+        elif by == 'week':
+            period_of_day = (calendar + 3) // 7        # 1970-01-01 was a Thursday
+        else:
+            period_of_day = calendar.astype('datetime64[D]').astype('datetime64[M]').view(np.int64)
+        first = period_of_day[0]
+        period = period_of_day[days - first_day] - first
+
+        # One bincount per measure over a dense (period, code) key
+        labels = self.dictionaries[group] if group else ['']
+        keys = period * len(labels) + columns[group] if group else period
+        size = (period_of_day[-1] - first + 1) * len(labels)
+        sums = {
+            'reservations': np.bincount(keys, minlength=size),
+            'nights': np.bincount(keys, weights=columns['nights'], minlength=size).astype(np.int64),
+            'room_revenue': np.bincount(keys, weights=columns['room_charges'], minlength=size).round(2),
+            'service_revenue': np.bincount(keys, weights=columns['service_charges'], minlength=size).round(2),
+            'total_revenue': np.bincount(keys, weights=columns['total'], minlength=size).round(2),
+        }
+        present = np.flatnonzero(sums['reservations'])
+        starts = first + present // len(labels)
+        if by == 'week':
+            starts = (starts * 7 - 3).astype('datetime64[D]')
+        else:
+            starts = starts.astype('datetime64[D]' if by == 'day' else 'datetime64[M]').astype('datetime64[D]')
+
+        frame = {'period': starts.astype('datetime64[ns]')}
+        if group:
+            frame[group] = np.array(labels, dtype=object)[present % len(labels)]
+        frame.update({name: values[present] for name, values in sums.items()})
+        return pd.DataFrame(frame)
+
+
+if __name__ == '__main__':
+    # python snapshot.py [database] [--rebuild]  – bring the snapshot up to date
+    from db import DB_PATH, open_connection
+    from migrations import migrate
+
+    args = sys.argv[1:]
+    paths = [a for a in args if not a.startswith('--')]
+    db_path = paths[0] if paths else DB_PATH
+    path = snapshot_path(db_path)
+    if '--rebuild' in args:
+        shutil.rmtree(path, ignore_errors=True)
+
+    conn = open_connection(db_path)
+    migrate(conn)
+    started = time.perf_counter()
+    added = extract(conn, path)
+    extracted = time.perf_counter() - started
+    conn.close()
+
+    snapshot = RevenueSnapshot.load(path)
+    started = time.perf_counter()
+    monthly = snapshot.aggregate('month', group='room_type')
+    print(f"{path}: {added:,} stays added in {extracted:.2f}s, {len(snapshot):,} in total; "
+          f"{len(monthly):,} month x room type rows aggregated in {(time.perf_counter() - started) * 1000:.0f} ms")
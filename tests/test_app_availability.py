@@ -0,0 +1,41 @@
+import os
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # app.py opens final.db in the working directory
+    monkeypatch.chdir(tmp_path)
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.run()
+    yield at
+    st.cache_resource.clear()
+    st.cache_data.clear()
+
+
+def test_room_list_follows_bookings_from_other_connections(app):
+    other = sqlite3.connect('final.db', isolation_level=None)
+    other.execute("INSERT INTO Guest (guest_Fname, guest_Lname, guest_email, CNIC, age, gender, City) "
+                  "VALUES ('Ali', 'Khan', 'ali@example.com', '1234567890123', 30, 'M', 'Lahore')")
+    app.sidebar.radio[0].set_value("Make Reservation").run()
+    room_no = other.execute("SELECT MIN(room_no) FROM Room").fetchone()[0]
+    assert any(option.startswith(f"Room {room_no} ") for option in app.selectbox[1].options)
+
+    # Another process books the room for the default dates
+    today = date.today()
+    other.execute("INSERT INTO Reservation (reservation_date, guest_id, room_no, check_in, check_out, adults, children) "
+                  "VALUES (?, 1, ?, ?, ?, 1, 0)", (today.isoformat(), room_no, today.isoformat(),
+                                                   (today + timedelta(days=1)).isoformat()))
+    other.close()
+    app.run()
+    assert not app.exception
+    assert not any(option.startswith(f"Room {room_no} ") for option in app.selectbox[1].options)
@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+import archive
+import operations
+import reports
+from db import open_connection
+from migrations import migrate
+
+TODAY = '2031-06-01'
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = open_connection(str(tmp_path / 'hotel.db'))
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+def _settled_stay(conn):
+    guest_id = operations.add_guest(conn, 'Ada', 'Lovelace', 'ada@example.com', '1234567890123', 36, 'F', 'London')
+    reservation_id = operations.make_reservation(conn, guest_id, 101, '2030-01-01', '2030-01-03', 1, 0)
+    operations.add_service(conn, reservation_id, 1, 2, '2030-01-01')
+    operations.check_out(conn, reservation_id, 'Cash')
+    return reservation_id
+
+def _held(conn, reservation_id):
+    return tuple(conn.execute(f"SELECT COUNT(*) FROM {schema}.Reservation WHERE reservation_id = ?",
+                              (reservation_id,)).fetchone()[0] for schema in ('main', 'archive'))
+
+
+def test_archive_moves_settled_stays(conn):
+    reservation_id = _settled_stay(conn)
+    before = reports.revenue_summary(conn, '2030-01-01', '2030-01-31')
+
+    summary = archive.archive_settled(conn, 365, TODAY)
+    assert (summary['reservations'], summary['service_lines'], summary['removed']) == (1, 1, 1)
+    assert _held(conn, reservation_id) == (0, 1)
+    assert reports.revenue_summary(conn, '2030-01-01', '2030-01-31') == before
+
+
+def test_archive_finishes_a_move_interrupted_after_the_copy(conn):
+    reservation_id = _settled_stay(conn)
+    before = reports.revenue_summary(conn, '2030-01-01', '2030-01-31')
+
+    # The copy commits; the delete from final.db fails
+    conn.execute("""
+        CREATE TEMP TRIGGER fail_delete BEFORE DELETE ON main.Billing
+        BEGIN SELECT RAISE(ABORT, 'interrupted'); END
+    """)
+    with pytest.raises(sqlite3.IntegrityError):
+        archive.archive_settled(conn, 365, TODAY)
+    assert _held(conn, reservation_id) == (1, 1)
+    conn.execute("DROP TRIGGER temp.fail_delete")
+
+    summary = archive.archive_settled(conn, 365, TODAY)
+    assert (summary['reservations'], summary['removed']) == (0, 1)
+    assert _held(conn, reservation_id) == (0, 1)
+    # Rolled up into the archive once, not once per run
+    assert reports.revenue_summary(conn, '2030-01-01', '2030-01-31') == before
+    assert archive.archive_settled(conn, 365, TODAY)['removed'] == 0
@@ -0,0 +1,59 @@
+import pytest
+
+import operations
+from db import open_connection
+from migrations import migrate
+
+
+@pytest.fixture
+def conn():
+    conn = open_connection(':memory:')
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def guest_id(conn):
+    return operations.add_guest(conn, 'Ada', 'Lovelace', 'ada@example.com', '12345-1234567-1', 36, 'Female', 'London')
+
+
+def _room(conn, reservation_id):
+    return conn.execute("SELECT room_no FROM Reservation WHERE reservation_id = ?", (reservation_id,)).fetchone()[0]
+
+def _locked(conn, reservation_id):
+    return conn.execute("SELECT room_locked FROM Reservation WHERE reservation_id = ?", (reservation_id,)).fetchone()[0]
+
+
+def test_a_chosen_room_is_locked_and_an_assigned_one_is_not(conn, guest_id):
+    chosen = operations.make_reservation(conn, guest_id, 101, '2099-01-01', '2099-01-05', 1, 0)
+    assigned, room_no = operations.book_best_fit(conn, guest_id, 1, '2099-01-01', '2099-01-05', 1, 0)
+    assert (room_no, _locked(conn, chosen), _locked(conn, assigned)) == (102, 1, 0)
+
+
+def test_reassignment_moves_only_unlocked_stays(conn, guest_id):
+    # Room 101 is left empty for one night before the later stay; 102
+    # frees up exactly when it arrives
+    operations.make_reservation(conn, guest_id, 101, '2099-01-01', '2099-01-05', 1, 0)
+    operations.make_reservation(conn, guest_id, 102, '2099-01-01', '2099-01-06', 1, 0)
+    later = operations.make_reservation(conn, guest_id, 101, '2099-01-06', '2099-01-09', 1, 0)
+
+    assert operations.reassign_rooms(conn)['moved'] == 0
+    assert _room(conn, later) == 101
+
+    conn.execute("UPDATE Reservation SET room_locked = 0 WHERE reservation_id = ?", (later,))
+    summary = operations.reassign_rooms(conn)
+    assert (summary['moved'], summary['short_gap_nights_before'], summary['short_gap_nights_after']) == (1, 1, 0)
+    assert _room(conn, later) == 102
+
+
+def test_reassignment_fits_around_locked_stays(conn, guest_id):
+    operations.make_reservation(conn, guest_id, 101, '2099-01-01', '2099-01-05', 1, 0)
+    operations.make_reservation(conn, guest_id, 102, '2099-01-01', '2099-01-06', 1, 0)
+    locked = operations.make_reservation(conn, guest_id, 102, '2099-01-08', '2099-01-10', 1, 0)
+    later = operations.make_reservation(conn, guest_id, 101, '2099-01-06', '2099-01-09', 1, 0)
+    conn.execute("UPDATE Reservation SET room_locked = 0 WHERE reservation_id != ?", (locked,))
+
+    # 102 would take the later stay with no gap, but the locked one is there
+    operations.reassign_rooms(conn)
+    assert (_room(conn, later), _room(conn, locked)) == (101, 102)
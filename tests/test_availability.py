@@ -0,0 +1,20 @@
+from availability import AvailabilityIndex
+from catalog import Room
+
+
+def _index(stays):
+    rooms = {101: Room(101, 1, 'Standard', 1, 100.0)}
+    return AvailabilityIndex.from_stays(rooms, stays)
+
+
+def test_a_long_stay_behind_a_double_booking_still_blocks():
+    # Legacy double booking (migration 4 keeps it): #2 lies inside #1
+    index = _index([(101, '2030-01-01', '2030-01-10', 1), (101, '2030-01-02', '2030-01-03', 2)])
+    assert not index.is_free(101, '2030-01-05', '2030-01-06')
+    assert index.is_free(101, '2030-01-10', '2030-01-12')
+
+    index.remove(1)
+    assert index.is_free(101, '2030-01-05', '2030-01-06')
+    index.add(3, 101, '2029-12-30', '2030-01-08')
+    assert not index.is_free(101, '2030-01-05', '2030-01-06')
+    assert [room.room_no for room in index.available_rooms('2030-01-08', '2030-01-09')] == [101]
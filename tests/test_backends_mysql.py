@@ -0,0 +1,253 @@
+import csv
+import io
+import os
+from datetime import date, timedelta
+
+import pytest
+
+import backends
+from querylog import QueryLog
+from snapshot import RevenueSnapshot
+
+# Runs only against a real server: MYSQL_HOST=127.0.0.1 MYSQL_PORT=3306
+# (MYSQL_USER and MYSQL_PASSWORD too if needed). final.sql is loaded into
+# a throwaway database that is dropped afterwards.
+MYSQL_HOST = os.environ.get('MYSQL_HOST')
+
+pytestmark = pytest.mark.skipif(not MYSQL_HOST or not backends.MYSQL_AVAILABLE,
+                                reason="set MYSQL_HOST (and MYSQL_PORT) to run against MySQL")
+
+SCHEMA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'final.sql')
+DATABASE = f"hotel_test_{os.getpid()}"
+TODAY = date.today()
+
+
+def _day(offset):
+    return (TODAY + timedelta(days=offset)).isoformat()
+
+def _config():
+    return {'host': MYSQL_HOST, 'port': int(os.environ.get('MYSQL_PORT', 3306)),
+            'user': os.environ.get('MYSQL_USER', 'root'), 'password': os.environ.get('MYSQL_PASSWORD', '')}
+
+
+@pytest.fixture(scope='module')
+def backend():
+    import mysql.connector
+
+    admin = mysql.connector.connect(autocommit=True, **_config())
+    with open(SCHEMA) as fh:
+        backends.run_script(admin, fh.read().replace('streamlit_db8', DATABASE))
+    backend = backends.MySQLBackend(pool_size=4, database=DATABASE, **_config())
+    backend.migrate()
+    backend.migrate()                # a second run finds everything in place
+    yield backend
+    backend.close()
+    admin.cursor().execute(f"DROP DATABASE {DATABASE}")
+    admin.close()
+
+
+@pytest.fixture
+def conn(backend):
+    conn = backend.connection()
+    yield conn
+    backend.release(conn)
+
+
+def _guest(backend, conn, name):
+    stamp = str(abs(hash(name)))[:12]
+    return backend.add_guest(conn, name, 'Tester', f"{name.lower()}@example.com", f"7{stamp:0>12}", 30, 'F', 'Lahore')
+
+
+def test_write_counters_move_with_the_tables_they_cover(backend, conn):
+    tables = ['Guest', 'Reservation', 'Billing', 'Catalog']
+    before = backend.data_version(conn, tables)
+    guest_id = _guest(backend, conn, 'Counter')
+    room_no = min(backend.load_catalog(conn).rooms)
+    reservation_id = backend.make_reservation(conn, guest_id, room_no, _day(400), _day(402), 1, 0)
+    after = backend.data_version(conn, tables)
+    assert [b > a for a, b in zip(before, after)] == [True, True, True, False]
+
+    # Billing goes with the reservation by cascade, which fires no trigger
+    backend.delete_reservation(conn, reservation_id)
+    assert backend.data_version(conn, ['Billing'])[0] > after[2]
+
+    catalog = backend.data_version(conn, ['Catalog'])
+    cursor = conn.cursor()
+    cursor.execute("UPDATE Room SET room_status = 'maintenance' WHERE room_no = %s", (room_no,))
+    cursor.execute("UPDATE Room SET room_status = 'vacant' WHERE room_no = %s", (room_no,))
+    assert backend.data_version(conn, ['Catalog']) == catalog
+    cursor.execute("UPDATE Room SET room_capacity = room_capacity WHERE room_no = %s", (room_no,))
+    cursor.execute("UPDATE Services SET service_price = service_price + 1 WHERE service_id = 1")
+    cursor.close()
+    assert backend.data_version(conn, ['Catalog'])[0] == catalog[0] + 1
+
+
+def test_page_reads(backend, conn):
+    catalog = backend.load_catalog(conn)
+    room_no = max(catalog.rooms)
+    guest_id = _guest(backend, conn, 'Reader')
+    reservation_id = backend.make_reservation(conn, guest_id, room_no, _day(-2), _day(3), 1, 0)
+    service_id = min(catalog.services)
+    line_id = backend.add_service(conn, reservation_id, service_id, 2, _day(-1))
+
+    assert backend.has_guests(conn)
+    assert [guest['guest_id'] for guest in backend.search_guests(conn, 'read test')] == [guest_id]
+    assert backend.guest(conn, guest_id)['guest_Fname'] == 'Reader'
+    assert backend.guest(conn, -1) is None
+    current = backend.cached_rows(conn, 'CURRENT_RESERVATIONS')
+    assert {row['reservation_id'] for row in current} >= {reservation_id}
+    assert set(backend.cached_queries) == set(backends.MYSQL_CACHED_QUERIES)
+
+    assert [line['res_service_id'] for line in backend.service_lines(conn, reservation_id)] == [line_id]
+    details = backend.checkout_details(conn, reservation_id)
+    assert (details['room_no'], details['check_in'], details['payment_status']) == (room_no, _day(-2), 'pending')
+    assert isinstance(details['total'], float)
+    assert (reservation_id, room_no) in backend.in_house(conn, _day(0))
+    assert backend.in_house(conn, _day(0), [catalog.rooms[room_no].type_id + 1000]) == []
+
+    summary = backend.revenue_summary(conn, _day(-2), _day(-2))
+    assert (summary['reservations'], summary['pending_count']) == (1, 1)
+    assert summary['total_revenue'] == details['total']
+    assert [row['reservations'] for row in backend.revenue_breakdown(conn, _day(-2), _day(-2))] == [1]
+    assert [row['reservation_id'] for row in backend.report_rows(conn, _day(-2), _day(-2), 10)] == [reservation_id]
+    exported = list(csv.DictReader(io.TextIOWrapper(backend.export_report(conn, _day(-2), _day(-2)), 'utf-8')))
+    assert [row['reservation_id'] for row in exported] == [str(reservation_id)]
+
+    availability = backend.load_availability(conn, catalog.rooms)
+    assert room_no not in {room.room_no for room in availability.available_rooms(_day(0), _day(1))}
+    occupancy = backend.load_occupancy(conn, TODAY, 7)
+    assert occupancy.daily()['rooms_sold'].iloc[0] >= 1
+    rates = backend.load_rate_calendar(conn, {t.type_id: t.base_price for t in catalog.room_types.values()})
+    room_type = catalog.rooms[room_no].type_id
+    assert rates.quote(room_type, _day(10), _day(12)) == 2 * catalog.room_types[room_type].base_price
+
+
+def test_night_audit_posts_nights_and_settles(backend, conn, tmp_path):
+    catalog = backend.load_catalog(conn)
+    room_no = sorted(catalog.rooms)[1]
+    guest_id = _guest(backend, conn, 'Auditor')
+    staying = backend.make_reservation(conn, guest_id, room_no, _day(-30), _day(-27), 1, 0)
+    leaving = backend.make_reservation(conn, guest_id, room_no, _day(-20), _day(-18), 1, 0)
+
+    assert [row['reservation_id'] for row in backend.due_out(conn, _day(-18))] == [leaving]
+    summary = backend.run_night_audit(conn, _day(-19))
+    assert (summary['settled'], summary['nights_posted']) == (0, 1)
+    assert staying in {row['reservation_id'] for row in backend.overdue_bills(conn, 100)}
+
+    # The next run posts the nights since the last one (the departure day
+    # is not a night of the stay) and settles the departure
+    summary = backend.run_night_audit(conn, _day(-18), [leaving], 'Cash')
+    assert (summary['audit_date'], summary['settled'], summary['nights_posted']) == (_day(-18), 1, 0)
+    assert backend.run_night_audit(conn, _day(-18), [leaving])['settled'] == 0
+    assert backend.recent_audits(conn, 1)[0]['audit_date'] == _day(-18)
+    # The Reports page's daily figure, through sp_daily_revenue_report
+    assert 'sp_daily_revenue_report' in backend.procedures
+    daily = backend.daily_revenue(conn, _day(-18))
+    assert (daily['report_date'], daily['reservations']) == (_day(-18), 1)
+    assert daily['total_revenue'] == backend.checkout_details(conn, leaving)['total']
+
+    backend.snapshot_path = str(tmp_path / 'snapshot')
+    backend.refresh_snapshot(conn)
+    snapshot = RevenueSnapshot.load(backend.snapshot_path)
+    assert leaving in set(snapshot.columns['reservation_id'].tolist())
+    assert staying not in set(snapshot.columns['reservation_id'].tolist())
+
+
+def test_rates_price_new_bills(backend, conn):
+    catalog = backend.load_catalog(conn)
+    room_no = sorted(catalog.rooms)[2]
+    room_type = catalog.rooms[room_no].type_id
+    base_price = catalog.room_types[room_type].base_price
+    before = backend.data_version(conn, ['RateCalendar'])
+
+    assert backend.set_rates(conn, room_type, _day(500), _day(501), base_price + 50) == 2
+    assert backend.set_rates(conn, room_type, _day(501), _day(501), base_price + 20) == 1
+    assert backend.data_version(conn, ['RateCalendar'])[0] > before[0]
+    with pytest.raises(backends.OperationError, match="weekday"):
+        backend.set_rates(conn, room_type, _day(500), _day(501), base_price, [])
+
+    rates = backend.load_rate_calendar(conn, {t.type_id: t.base_price for t in catalog.room_types.values()})
+    quote = rates.quote(room_type, _day(500), _day(503))
+    assert quote == 3 * base_price + 70
+    reservation_id = backend.make_reservation(conn, _guest(backend, conn, 'Rated'), room_no, _day(500), _day(503), 1, 0)
+    details = backend.checkout_details(conn, reservation_id)
+    assert details['room_charges'] == quote
+
+    assert backend.clear_rates(conn, room_type, _day(500), _day(510)) == 2
+    backend.delete_reservation(conn, reservation_id)
+
+
+def test_room_assignment_keeps_locked_stays(backend, conn):
+    catalog = backend.load_catalog(conn)
+    by_type = {}
+    for room_no in sorted(catalog.rooms):
+        by_type.setdefault(catalog.rooms[room_no].type_id, []).append(room_no)
+    first, second = next(rooms for rooms in by_type.values() if len(rooms) == 2 and max(catalog.rooms) not in rooms)
+    guest_id = _guest(backend, conn, 'Assigned')
+    backend.make_reservation(conn, guest_id, first, _day(600), _day(604), 1, 0)
+    backend.make_reservation(conn, guest_id, second, _day(600), _day(605), 1, 0)
+    later = backend.make_reservation(conn, guest_id, first, _day(606), _day(609), 1, 0)
+
+    def room_of(reservation_id):
+        return backends._rows(conn, "SELECT room_no, room_locked FROM Reservation WHERE reservation_id = %s",
+                              (reservation_id,), dictionary=False)[0]
+
+    assert backend.reassign_rooms(conn)['moved'] == 0
+    assert room_of(later) == (first, 1)
+    cursor = conn.cursor()
+    cursor.execute("UPDATE Reservation SET room_locked = 0 WHERE reservation_id = %s", (later,))
+    cursor.close()
+    backend.reassign_rooms(conn)
+    assert room_of(later) == (second, 0)
+
+    # Back to back with the first room's stay, as SQLite would book it
+    reservation_id, room_no = backend.book_best_fit(conn, guest_id, catalog.rooms[first].type_id,
+                                                    _day(604), _day(606), 1, 0)
+    assert (room_no, room_of(reservation_id)) == (first, (first, 0))
+    reservation_id, room_no = backend.book_best_fit(conn, guest_id, catalog.rooms[first].type_id,
+                                                    _day(612), _day(614), 1, 0)
+    assert (room_no, room_of(reservation_id)) == (second, (second, 0))
+
+
+def test_same_day_turnover(backend, conn):
+    catalog = backend.load_catalog(conn)
+    room_no = sorted(catalog.rooms)[3]
+    guest_id = _guest(backend, conn, 'Turnover')
+    backend.make_reservation(conn, guest_id, room_no, _day(-2), _day(0), 1, 0)
+    # Last night's audit left the room occupied; its guest leaves today
+    cursor = conn.cursor()
+    cursor.execute("UPDATE Room SET room_status = 'occupied' WHERE room_no = %s", (room_no,))
+    cursor.close()
+
+    arriving = backend.make_reservation(conn, guest_id, room_no, _day(0), _day(2), 1, 0)
+    assert backend.checkout_details(conn, arriving)['room_no'] == room_no
+    with pytest.raises(backends.OperationError, match="already booked"):
+        backend.make_reservation(conn, guest_id, room_no, _day(1), _day(3), 1, 0)
+
+
+def test_features_and_pool(backend, conn):
+    assert backend.features == {'rates', 'assignment'}
+    with pytest.raises(NotImplementedError):
+        backend.archive_settled(conn)
+    stats = backend.stats()
+    assert stats['open'] >= 1 and set(stats) == {'hits', 'misses', 'hit_rate', 'open', 'idle'}
+
+
+def test_query_log_records_mysql_statements(backend):
+    log = QueryLog(slow_ms=0)
+    logged = backends.open_backend({'backend': 'mysql', 'pool_size': 1, 'database': DATABASE, **_config()},
+                                   query_log=log)
+    conn = logged.connection()
+    try:
+        log.begin_rerun('Reports')
+        logged.load_catalog(conn)
+        logged.revenue_summary(conn, _day(-2), _day(-2))
+        log.end_rerun()
+    finally:
+        logged.release(conn)
+        logged.close()
+
+    statements = {row['statement']: row for row in log.statement_stats()}
+    assert any(statement.startswith("SELECT") and row['rows_per_call'] > 0 for statement, row in statements.items())
+    assert log.page_stats()[0]['page'] == 'Reports' and log.page_stats()[0]['queries_per_rerun'] >= 2
+    assert log.slow and all(slow['plan'] for slow in log.slow)
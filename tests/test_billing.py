@@ -0,0 +1,44 @@
+import pytest
+
+import billing
+import operations
+from db import open_connection
+from migrations import migrate
+
+
+@pytest.fixture
+def conn():
+    conn = open_connection(':memory:')
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+def _stay(conn):
+    guest_id = operations.add_guest(conn, 'Ada', 'Lovelace', 'ada@example.com', '12345-1234567-1', 36, 'Female', 'London')
+    reservation_id = operations.make_reservation(conn, guest_id, 101, '2030-01-01', '2030-01-03', 1, 0)
+    room_charges = conn.execute("SELECT room_charges FROM Billing WHERE reservation_id = ?", (reservation_id,)).fetchone()[0]
+    return reservation_id, room_charges
+
+def _bill(conn, reservation_id):
+    return tuple(conn.execute("SELECT service_charges, total FROM Billing WHERE reservation_id = ?",
+                              (reservation_id,)).fetchone())
+
+
+def test_service_lines_keep_the_price_they_were_posted_at(conn):
+    reservation_id, room_charges = _stay(conn)
+    line = operations.add_service(conn, reservation_id, 1, 2, '2030-01-01')
+    assert _bill(conn, reservation_id) == (30, room_charges + 30)
+
+    conn.execute("UPDATE Services SET service_price = 99 WHERE service_id = 1")
+    operations.post_service_bulk(conn, 1, 1, '2030-01-02', reservation_ids=[reservation_id])
+    assert _bill(conn, reservation_id) == (129, room_charges + 129)
+
+    conn.execute("UPDATE ReservationServices SET quantity = 3 WHERE res_service_id = ?", (line,))
+    assert _bill(conn, reservation_id) == (144, room_charges + 144)
+    assert billing.check(conn) == ([], [])
+
+    for res_service_id, in conn.execute("SELECT res_service_id FROM ReservationServices").fetchall():
+        operations.delete_service(conn, res_service_id)
+    assert _bill(conn, reservation_id) == (0, room_charges)
+    assert billing.check(conn) == ([], [])
@@ -0,0 +1,61 @@
+import random
+import threading
+from datetime import date, timedelta
+
+import operations
+from benchmarks.booking_stress import INTEGRITY_CHECKS, fill
+from db import open_connection
+
+THREADS = 4
+ATTEMPTS = 75                 # per thread
+ROOMS = 3
+WINDOW_DAYS = 20
+START = date(2030, 1, 1)
+
+# Every RoomNight row lies inside its reservation, in the reservation's room
+STRAY_NIGHTS_SQL = """
+    SELECT n.room_no, n.night FROM RoomNight n
+    JOIN Reservation r ON r.reservation_id = n.reservation_id
+    WHERE n.room_no != r.room_no OR n.night < r.check_in OR n.night >= r.check_out
+"""
+
+
+def _book(path, seed, outcomes):
+    rng = random.Random(seed)
+    conn = open_connection(path)
+    guest_ids = [row[0] for row in conn.execute("SELECT guest_id FROM Guest")]
+    for _ in range(ATTEMPTS):
+        check_in = START + timedelta(days=rng.randrange(WINDOW_DAYS))
+        check_out = check_in + timedelta(days=rng.randint(1, 4))
+        try:
+            operations.make_reservation(conn, rng.choice(guest_ids), 1000 + rng.randrange(ROOMS),
+                                        str(check_in), str(check_out), 1, 0)
+            outcomes.append('booked')
+        except Exception as e:
+            outcomes.append(e)
+    conn.close()
+
+
+def test_concurrent_bookings_never_overlap(tmp_path):
+    path = str(tmp_path / 'stress.db')
+    fill(path, ROOMS)
+    outcomes = []
+    threads = [threading.Thread(target=_book, args=(path, seed, outcomes)) for seed in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(outcomes) == THREADS * ATTEMPTS
+    failures = [outcome for outcome in outcomes if outcome != 'booked']
+    # Lock waits are retried inside the operation; a caller only ever sees
+    # the business-rule refusal
+    assert [f for f in failures if not isinstance(f, operations.OperationError)] == []
+    assert failures, "the window is narrow enough that some attempts must collide"
+
+    conn = open_connection(path)
+    assert {name: conn.execute(sql).fetchall() for name, sql in INTEGRITY_CHECKS.items()} == {
+        name: [] for name in INTEGRITY_CHECKS}
+    assert conn.execute(STRAY_NIGHTS_SQL).fetchall() == []
+    assert conn.execute("SELECT COUNT(*) FROM Reservation").fetchone()[0] == outcomes.count('booked')
+    conn.close()
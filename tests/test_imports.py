@@ -0,0 +1,110 @@
+import io
+from datetime import date, timedelta
+
+import pytest
+
+import billing
+import imports
+from db import data_version, open_connection
+from migrations import migrate
+
+GUESTS = """guest_Fname,guest_Lname,guest_email,CNIC,age,gender,City
+Ada,Lovelace,ada@example.com,1111111111111,36,F,London
+Alan,Turing,alan@example.com,2222222222222,41,M,Wilmslow
+Bad,Row,not-an-email,123,12,X,
+"""
+
+RESERVATIONS = """guest_id,room_no,check_in,check_out,adults,children
+1,101,2030-01-01,2030-01-04,1,0
+2,102,2030-01-02,2030-01-03,1,0
+1,201,2030-01-01,2030-01-03,2,0
+2,999,2030-01-01,2030-01-02,1,0
+"""
+
+SERVICES = """reservation_id,service_id,quantity,service_date
+1,1,2,2030-01-01
+1,4,1,2030-01-02
+2,2,1,2030-01-02
+3,5,3,2030-01-01
+3,99,1,2030-01-01
+"""
+
+# DailyRevenue rebuilt from the bills, to compare with the maintained rollup
+ROLLUP_SQL = """
+    SELECT r.check_in, rm.type_id, COALESCE(b.payment_method, ''), COUNT(*),
+           SUM(b.payment_status = 'paid'), SUM(b.payment_status = 'pending'),
+           ROUND(SUM(b.room_charges), 2), ROUND(SUM(b.service_charges), 2), ROUND(SUM(b.total), 2)
+    FROM Reservation r JOIN Room rm ON rm.room_no = r.room_no JOIN Billing b ON b.reservation_id = r.reservation_id
+    GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+"""
+
+
+@pytest.fixture
+def conn():
+    conn = open_connection(':memory:')
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+def _triggers(conn):
+    return sorted(tuple(row) for row in conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'"))
+
+def _import(conn, kind, text):
+    result = imports.import_file(conn, kind, io.StringIO(text))
+    return result['imported'], {reject['row']: reject['reason'] for reject in result['rejects']}
+
+
+def test_import_writes_through_the_triggers(conn):
+    triggers = _triggers(conn)
+    versions = data_version(conn, ['Guest', 'Reservation', 'Billing', 'ReservationServices'])
+
+    imported, rejects = _import(conn, 'guests', GUESTS)
+    assert imported == 2 and list(rejects) == [3]
+    imported, rejects = _import(conn, 'reservations', RESERVATIONS)
+    assert imported == 3 and rejects == {4: "room does not exist"}
+    imported, rejects = _import(conn, 'services', SERVICES)
+    assert imported == 4 and rejects == {5: "service does not exist"}
+
+    # The schema is left as it was, foreign keys enforced
+    assert _triggers(conn) == triggers
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+    assert [row[0] for row in conn.execute(
+        "SELECT rowid FROM GuestSearch WHERE GuestSearch MATCH 'turing'")] == [2]
+    assert conn.execute("SELECT COUNT(*) FROM RoomNight").fetchone()[0] == 3 + 1 + 2
+    assert [row[0] for row in conn.execute("SELECT night FROM RoomNight WHERE reservation_id = 1 ORDER BY night")] == [
+        '2030-01-01', '2030-01-02', '2030-01-03']
+    assert conn.execute("SELECT room_charges FROM Billing WHERE reservation_id = 1").fetchone()[0] == 300
+    assert conn.execute("SELECT service_charges FROM Billing WHERE reservation_id = 1").fetchone()[0] == 2 * 15 + 50
+    assert billing.check(conn) == ([], [])
+    assert [tuple(row) for row in conn.execute(ROLLUP_SQL)] == [
+        tuple(row) for row in conn.execute("SELECT * FROM DailyRevenue WHERE reservations != 0 ORDER BY 1, 2, 3")]
+    assert all(after > before for before, after in zip(
+        versions, data_version(conn, ['Guest', 'Reservation', 'Billing', 'ReservationServices'])))
+
+
+def test_overlapping_booking_is_rejected_and_nothing_is_written(conn):
+    _import(conn, 'guests', GUESTS)
+    _import(conn, 'reservations', RESERVATIONS)
+    imported, rejects = _import(conn, 'reservations', "guest_id,room_no,check_in,check_out,adults\n2,101,2030-01-03,2030-01-05,1\n")
+    assert imported == 0
+    assert rejects == {1: "room is already booked for the selected dates"}
+    assert conn.execute("SELECT COUNT(*) FROM RoomNight").fetchone()[0] == 6
+
+
+def test_imported_stays_keep_their_room_and_set_its_status(conn):
+    _import(conn, 'guests', GUESTS)
+    today = date.today()
+    stays = [(101, today - timedelta(days=5), today - timedelta(days=3)),
+             (102, today, today + timedelta(days=2)),
+             (201, today + timedelta(days=10), today + timedelta(days=12))]
+    text = "guest_id,room_no,check_in,check_out,adults\n" + ''.join(
+        f"1,{room_no},{check_in},{check_out},1\n" for room_no, check_in, check_out in stays)
+    assert _import(conn, 'reservations', text) == (3, {})
+
+    assert [tuple(row) for row in conn.execute("SELECT room_no, room_locked FROM Reservation ORDER BY room_no")] == [
+        (101, 0), (102, 0), (201, 1)]
+    assert [tuple(row) for row in conn.execute(
+        "SELECT room_no, room_status FROM Room WHERE room_no IN (101, 102, 201) ORDER BY room_no")] == [
+        (101, 'vacant'), (102, 'occupied'), (201, 'vacant')]
@@ -0,0 +1,54 @@
+import logging
+
+import migrations
+from db import open_connection
+
+
+def _migrate_to(conn, target):
+    for version, _, fn in migrations.MIGRATIONS:
+        if version > target:
+            break
+        conn.execute("BEGIN IMMEDIATE")
+        fn(conn.cursor())
+        conn.execute(f"PRAGMA user_version = {version}")
+        conn.execute("COMMIT")
+
+
+def test_migrate_from_empty_reaches_latest():
+    conn = open_connection(':memory:')
+    assert migrations.migrate(conn) == [version for version, _, _ in migrations.MIGRATIONS]
+    assert migrations.current_version(conn) == migrations.latest_version()
+    assert migrations.migrate(conn) == []
+
+
+def test_room_night_backfill_logs_existing_double_bookings(caplog, capsys):
+    conn = open_connection(':memory:')
+    _migrate_to(conn, 3)
+    conn.execute("INSERT INTO Guest (guest_Fname, guest_Lname, guest_email, CNIC, age, gender, City) "
+                 "VALUES ('Ali', 'Khan', 'ali@example.com', '1234567890123', 30, 'M', 'Lahore')")
+    room_no = conn.execute("SELECT MIN(room_no) FROM Room").fetchone()[0]
+    for check_in, check_out in [('2025-01-01', '2025-01-04'), ('2025-01-03', '2025-01-05')]:
+        conn.execute("INSERT INTO Reservation (reservation_date, guest_id, room_no, check_in, check_out, adults, children) "
+                     "VALUES ('2024-12-01', 1, ?, ?, ?, 1, 0)", (room_no, check_in, check_out))
+
+    with caplog.at_level(logging.WARNING, logger='migrations'):
+        migrations.migrate(conn)
+
+    assert capsys.readouterr().out == ''
+    assert [record.getMessage() for record in caplog.records] == [
+        "RoomNight backfill: 1 reservation(s) overlap an earlier booking: #2"]
+    assert conn.execute("SELECT COUNT(*) FROM RoomNight WHERE reservation_id = 1").fetchone()[0] == 3
+
+
+def test_future_stays_booked_before_room_locks_keep_their_room():
+    conn = open_connection(':memory:')
+    _migrate_to(conn, 13)
+    conn.execute("INSERT INTO Guest (guest_Fname, guest_Lname, guest_email, CNIC, age, gender, City) "
+                 "VALUES ('Ali', 'Khan', 'ali@example.com', '1234567890123', 30, 'M', 'Lahore')")
+    for check_in, check_out in [('2020-01-01', '2020-01-03'), ('2099-01-01', '2099-01-03')]:
+        conn.execute("INSERT INTO Reservation (reservation_date, guest_id, room_no, check_in, check_out, adults, children) "
+                     "VALUES ('2019-12-01', 1, 101, ?, ?, 1, 0)", (check_in, check_out))
+
+    migrations.migrate(conn)
+    assert [tuple(row) for row in conn.execute("SELECT check_in, room_locked FROM Reservation ORDER BY check_in")] == [
+        ('2020-01-01', 0), ('2099-01-01', 1)]
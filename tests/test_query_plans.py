@@ -0,0 +1,22 @@
+import pytest
+
+import queries
+from db import open_connection
+from migrations import migrate
+
+
+@pytest.fixture(scope='module')
+def conn():
+    conn = open_connection(':memory:')
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+def test_page_queries_use_an_index(conn):
+    assert queries.full_scans(conn) == []
+
+
+@pytest.mark.parametrize('check', queries.PLAN_CHECKS, ids=lambda check: f"{check[0]}:{check[1]}")
+def test_page_query_plan(conn, check):
+    assert queries.full_scans(conn, [check]) == []